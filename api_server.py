@@ -0,0 +1,452 @@
+"""
+FitLife Nutrition AI - Serveur d'API JSON (sans interface)
+Expose le calculateur, le moteur de recommandation, le générateur de plans
+et l'assistant aux clients HTTP (applications mobiles, scripts)
+
+Usage:
+    python api_server.py --port 8000 --workers 4 --threads 8 --timeout 10
+
+Points d'entrée (corps et réponses JSON):
+    GET  /health            état du processus
+    POST /needs             {"profile": {...}}
+    POST /recommendations   {"profile": {...}} ou {"needs": {...}, "goal": ...}, "n", "exclude", ...
+    POST /alternatives      {"food": "saumon", "n": 5, "goal": ...}
+    POST /plan              {"profile": {...}, "preferences": {...}}
+    POST /chat              {"query": "...", "profile": {...}}
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from dataclasses import asdict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from modules.food_catalog import VERDICT_COLUMNS, goal_verdict, load_food_table, row_tags
+
+MAX_BODY_BYTES = 1 << 20
+MAX_RECOMMENDATIONS = 50
+MAX_PLAN_DAYS = 28
+MEALS_PER_DAY_RANGE = (3, 6)  # Comme le curseur de l'application (au plus len(MEAL_NAMES))
+MAX_IMPROVE_MS = 500
+MEAL_RATIO = 0.30  # Part des besoins journaliers pour une recherche d'aliments (comme l'application)
+
+FOOD_FIELDS = ['food', 'Caloric Value', 'Protein', 'Carbohydrates', 'Fat', 'Dietary Fiber']
+SEXES = ('Homme', 'Femme')
+BUDGETS = ('Économique', 'Moyen', 'Élevé')
+PREP_TIMES = ('Rapide', 'Moyen', 'Élaboré')
+MACRO_KEYS = ('proteins', 'carbs', 'fats')
+
+
+class ApiError(Exception):
+    """Erreur renvoyée au client avec son code HTTP"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _choice(value, allowed, field: str) -> str:
+    """Valeur parmi celles acceptées par les modules (400 sinon, pas de repli silencieux)"""
+    if value not in allowed:
+        raise ApiError(400, f"Valeur inconnue pour '{field}': {value!r} (attendu: {', '.join(allowed)})")
+    return value
+
+
+def _number(value, field: str, cast=float):
+    """Valeur numérique fournie par le client (400 si absente du bon type)"""
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        raise ApiError(400, f"'{field}' doit être numérique: {value!r}")
+
+
+def _mapping(payload: Dict, field: str) -> Dict:
+    """Objet JSON optionnel (vide si absent)"""
+    value = payload.get(field)
+    if value is None:
+        return {}
+    if not isinstance(value, dict):
+        raise ApiError(400, f"'{field}' doit être un objet JSON")
+    return value
+
+
+def _str_list(payload: Dict, field: str, default: List[str]) -> List[str]:
+    value = payload.get(field, default)
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise ApiError(400, f"'{field}' doit être une liste de textes")
+    return value
+
+
+def _positive_int(payload: Dict, field: str, default: int, maximum: int) -> int:
+    """Entier strictement positif, plafonné à `maximum`"""
+    value = _number(payload.get(field, default), field, int)
+    if value <= 0:
+        raise ApiError(400, f"'{field}' doit être positif")
+    return min(value, maximum)
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if hasattr(value, 'item'):
+        return value.item()  # Scalaires numpy
+    raise TypeError(f"Type non sérialisable: {type(value).__name__}")
+
+
+class Engine:
+    """
+    Modules chargés une fois par processus et partagés par tous ses threads
+    (recommandation, plans et assistant sont sans état par requête)
+    """
+
+    def __init__(self, food_df=None):
+        from modules import (FoodRecommendationEngine, MealPlanGenerator, NutritionAssistant,
+                             NutritionalCalculator)
+
+        self.food_df = food_df if food_df is not None else load_food_table()
+        if self.food_df is None:
+            raise RuntimeError("Aucun fichier FOOD-DATA-GROUP*.csv dans data/nutrition")
+        self.calculator = NutritionalCalculator
+        self.recommender = FoodRecommendationEngine(self.food_df)
+        self.meal_generator = MealPlanGenerator(self.food_df, self.recommender)
+        self.assistant = NutritionAssistant(self.food_df, self.recommender)
+
+    # ----- Lecture des requêtes -----
+
+    def _profile(self, payload: Dict):
+        """UserProfile à partir de payload['profile'] (400 si incomplet ou valeur inconnue)"""
+        from modules import UserProfile
+
+        profile = payload.get('profile')
+        if not isinstance(profile, dict):
+            raise ApiError(400, "Champ 'profile' manquant")
+        try:
+            return UserProfile(
+                weight=_number(profile['weight'], 'weight'),
+                height=_number(profile['height'], 'height'),
+                age=_number(profile['age'], 'age', int),
+                sex=_choice(profile['sex'], SEXES, 'sex'),
+                activity_level=_choice(profile['activity_level'], list(self.calculator.ACTIVITY_FACTORS),
+                                       'activity_level'),
+                goal=_choice(profile['goal'], list(VERDICT_COLUMNS), 'goal'),
+                target_weight=_number(profile.get('target_weight', profile['weight']), 'target_weight')
+            )
+        except KeyError as e:
+            raise ApiError(400, f"Profil incomplet: {e.args[0]}")
+
+    def _needs(self, payload: Dict) -> Dict:
+        """
+        Besoins fournis par le client (forme vérifiée: target_calories, macros.*)
+        ou calculés depuis le profil
+        """
+        if payload.get('needs') is None:
+            return self.calculator.calculate_complete_needs(self._profile(payload))
+        needs = _mapping(payload, 'needs')
+        macros = _mapping(needs, 'macros')
+        try:
+            checked = {
+                **needs,
+                'target_calories': _number(needs['target_calories'], 'target_calories'),
+                'macros': {**macros, **{key: _number(macros[key], f"macros.{key}") for key in MACRO_KEYS}}
+            }
+        except KeyError as e:
+            raise ApiError(400, f"Besoins incomplets: {e.args[0]}")
+        if 'goal' in needs:
+            _choice(needs['goal'], list(VERDICT_COLUMNS), 'goal')
+        return checked
+
+    def _goal(self, payload: Dict) -> str:
+        profile = payload.get('profile')
+        goal = payload.get('goal') or (profile.get('goal') if isinstance(profile, dict) else None) or 'Maintien'
+        return _choice(goal, list(VERDICT_COLUMNS), 'goal')
+
+    @staticmethod
+    def _meals_per_day(options: Dict) -> int:
+        low, high = MEALS_PER_DAY_RANGE
+        meals = _number(options.get('meals_per_day', 4), 'meals_per_day', int)
+        if not low <= meals <= high:
+            raise ApiError(400, f"'meals_per_day' doit être entre {low} et {high}")
+        return meals
+
+    def _food_record(self, row, goal: Optional[str] = None) -> Dict:
+        record = {field: row[field] for field in FOOD_FIELDS}
+        record['tags'] = row_tags(row)
+        if goal is not None:
+            record['verdict'] = goal_verdict(row, goal)
+        return record
+
+    # ----- Points d'entrée -----
+
+    def needs(self, payload: Dict) -> Dict:
+        return self.calculator.calculate_complete_needs(self._profile(payload))
+
+    def recommendations(self, payload: Dict) -> Dict:
+        from modules import NutritionalTarget
+
+        needs = self._needs(payload)
+        goal = self._goal(payload)
+        ratio = _number(payload.get('meal_ratio', MEAL_RATIO), 'meal_ratio')
+        target = NutritionalTarget(
+            calories=needs['target_calories'] * ratio,
+            proteins=needs['macros']['proteins'] * ratio,
+            carbs=needs['macros']['carbs'] * ratio,
+            fats=needs['macros']['fats'] * ratio,
+            goal=goal
+        )
+        results = self.recommender.recommend_foods(
+            target,
+            n_recommendations=_positive_int(payload, 'n', 10, MAX_RECOMMENDATIONS),
+            exclude_foods=_str_list(payload, 'exclude', []) or None,
+            min_protein=_number(payload.get('min_protein', 0), 'min_protein'),
+            max_calories=_number(payload.get('max_calories', 1000), 'max_calories')
+        )
+        foods = []
+        for _, row in results.iterrows():
+            record = self._food_record(row, goal)
+            record['match_percentage'] = row['match_percentage']
+            foods.append(record)
+        return {'goal': goal, 'foods': foods}
+
+    def alternatives(self, payload: Dict) -> Dict:
+        food = payload.get('food')
+        if not isinstance(food, str) or not food.strip():
+            raise ApiError(400, "Champ 'food' manquant")
+        results = self.recommender.find_alternatives(
+            food.strip(),
+            n_alternatives=_positive_int(payload, 'n', 5, MAX_RECOMMENDATIONS),
+            goal=self._goal(payload) if payload.get('goal') else None
+        )
+        if results.empty:
+            raise ApiError(404, f"Aliment inconnu: {food}")
+        return {'food': food, 'alternatives': [self._food_record(row) for _, row in results.iterrows()]}
+
+    def plan(self, payload: Dict) -> Dict:
+        from modules import MealPlanGenerator, MealPlanPreferences
+
+        needs = self._needs(payload)
+        options = _mapping(payload, 'preferences')
+        periodization = _choice(options.get('periodization', 'Constante'),
+                                list(MealPlanGenerator.PERIODIZATION_PRESETS), 'periodization')
+        start = options.get('start_date')
+        try:
+            start_date = date.fromisoformat(start) if start else date.today()
+        except (TypeError, ValueError):
+            raise ApiError(400, f"'start_date' doit être une date AAAA-MM-JJ: {start!r}")
+        preferences = MealPlanPreferences(
+            meals_per_day=self._meals_per_day(options),
+            variety_days=_positive_int(options, 'variety_days', 7, MAX_PLAN_DAYS),
+            budget=_choice(options.get('budget', 'Moyen'), BUDGETS, 'budget'),
+            prep_time=_choice(options.get('prep_time', 'Moyen'), PREP_TIMES, 'prep_time'),
+            diet_type=_str_list(options, 'diet_type', ['Omnivore']),
+            exclude_foods=_str_list(options, 'exclude_foods', []),
+            horizon_days=_positive_int(options, 'days', 7, MAX_PLAN_DAYS),
+            start_date=start_date,
+            periodization=MealPlanGenerator.PERIODIZATION_PRESETS[periodization],
+            improve_ms=max(0, min(_number(options.get('improve_ms', 0), 'improve_ms', int), MAX_IMPROVE_MS))
+        )
+
+        plan = self.meal_generator.generate_compact_plan(needs, preferences)
+        food_names = self.food_df['food'].values
+        totals = plan.daily_totals()
+        days = []
+        for day in range(plan.n_days):
+            calories, proteins, carbs, fats = totals[day]
+            days.append({
+                'date': plan.day_date(day),
+                'totals': {'calories': calories, 'proteins': proteins, 'carbs': carbs, 'fats': fats},
+                'meals': plan.day_for_display(day, food_names, MealPlanGenerator.MEAL_NAMES)
+            })
+        return {'target_calories': needs['target_calories'], 'stats': plan.stats(), 'days': days}
+
+    def chat(self, payload: Dict) -> Dict:
+        from modules import ConversationContext
+
+        query = payload.get('query')
+        if not isinstance(query, str) or not query.strip():
+            raise ApiError(400, "Champ 'query' manquant")
+        if payload.get('profile') is None:
+            context = ConversationContext(None, None)  # L'assistant demande de configurer le profil
+        else:
+            # Profil complet et valeurs normalisées: l'assistant les lit sans repli
+            profile = {**payload['profile'], **asdict(self._profile(payload))}
+            context = ConversationContext(profile, self._needs(payload))
+        return {'answer': self.assistant.answer_query(query, context)}
+
+
+ROUTES = {
+    '/needs': 'needs',
+    '/recommendations': 'recommendations',
+    '/alternatives': 'alternatives',
+    '/plan': 'plan',
+    '/chat': 'chat'
+}
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    """Lecture/écriture JSON; le calcul s'exécute dans le pool de threads du serveur"""
+
+    server_version = 'FitLifeAPI/1.0'
+    protocol_version = 'HTTP/1.1'  # Connexions persistantes
+
+    def setup(self):
+        # Délai de lecture du socket: un client lent ou inactif ne bloque pas un thread indéfiniment
+        self.timeout = self.server.request_timeout
+        super().setup()
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, body: Dict):
+        data = json.dumps(body, default=_json_default, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # Client déjà déconnecté (délai côté client): rien à renvoyer
+            self.close_connection = True
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok', 'pid': os.getpid(), 'foods': len(self.server.engine.food_df)})
+        else:
+            self._send_json(404, {'error': f"Chemin inconnu: {self.path}"})
+
+    def do_POST(self):
+        try:
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                # rfile.read(-1) attendrait la fermeture du socket: refuser sans lire
+                self.close_connection = True
+                raise ApiError(400, "Content-Length invalide")
+            if length > MAX_BODY_BYTES:
+                self.close_connection = True  # Corps non lu: la connexion ne peut pas être réutilisée
+                raise ApiError(413, "Requête trop volumineuse")
+            body = self.rfile.read(length)
+
+            method = ROUTES.get(self.path)
+            if method is None:
+                raise ApiError(404, f"Chemin inconnu: {self.path}")
+            try:
+                payload = json.loads(body or b'{}')
+            except ValueError:
+                raise ApiError(400, "JSON invalide")
+            if not isinstance(payload, dict):
+                raise ApiError(400, "Objet JSON attendu")
+
+            future = self.server.compute_pool.submit(getattr(self.server.engine, method), payload)
+            try:
+                result = future.result(timeout=self.server.request_timeout)
+            except FutureTimeout:
+                future.cancel()
+                raise ApiError(504, f"Délai de {self.server.request_timeout:g}s dépassé")
+            self._send_json(200, result)
+        except ApiError as e:
+            self._send_json(e.status, {'error': str(e)})
+        except Exception as e:
+            # Entrées du client vérifiées par Engine (ApiError): le reste est une erreur du serveur
+            self.log_error("Erreur interne: %r", e)
+            self._send_json(500, {'error': "Erreur interne"})
+
+
+class ApiServer(ThreadingHTTPServer):
+    """
+    Un thread léger par connexion (lecture/écriture), calcul borné par un
+    pool de `threads` threads: la charge CPU d'un processus reste maîtrisée
+    """
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, threads: int = 8, request_timeout: float = 10.0, verbose: bool = False):
+        super().__init__(address, ApiRequestHandler)
+        self.threads = threads
+        self.request_timeout = request_timeout
+        self.verbose = verbose
+        self.engine: Optional[Engine] = None
+        self.compute_pool: Optional[ThreadPoolExecutor] = None
+
+    def serve(self, engine: Optional[Engine] = None):
+        """Charge le moteur (dans le processus courant) puis sert jusqu'à l'arrêt"""
+        self.engine = engine if engine is not None else Engine()
+        self.compute_pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='fitlife-api')
+        try:
+            self.serve_forever()
+        finally:
+            self.compute_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _worker(server: ApiServer):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Arrêt piloté par le processus parent (SIGTERM)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    server.serve()
+
+
+def run(host: str = '127.0.0.1', port: int = 8000, workers: int = 1, threads: int = 8,
+        timeout: float = 10.0, verbose: bool = False):
+    """
+    Lance le serveur: le socket d'écoute est ouvert une fois puis partagé par
+    `workers` processus (fork), chacun avec son propre moteur et son pool
+    """
+    server = ApiServer((host, port), threads=threads, request_timeout=timeout, verbose=verbose)
+    if workers > 1 and 'fork' not in multiprocessing.get_all_start_methods():
+        print("⚠️ Plusieurs processus nécessitent fork (Linux/macOS): un seul processus lancé")
+        workers = 1
+    print(f"FitLife API sur http://{host}:{server.server_address[1]} "
+          f"({workers} processus × {threads} threads, délai {timeout:g}s)")
+
+    if workers == 1:
+        try:
+            server.serve()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return
+
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=_worker, args=(server,), daemon=True) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    # SIGTERM -> SystemExit: le bloc finally arrête aussi les processus de travail
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        while all(process.is_alive() for process in processes):
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serveur d'API JSON FitLife")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=1, help="Processus (un moteur chacun)")
+    parser.add_argument('--threads', type=int, default=8, help="Threads de calcul par processus")
+    parser.add_argument('--timeout', type=float, default=10.0, help="Délai par requête (secondes)")
+    parser.add_argument('--verbose', action='store_true', help="Journal de chaque requête")
+    args = parser.parse_args(argv)
+    run(args.host, args.port, args.workers, args.threads, args.timeout, args.verbose)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,22 +4,17 @@ Assistant Nutritionnel IA
 """
 
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.graph_objects as go
-import plotly.express as px
 from datetime import datetime, timedelta
 import sys
 import os
+import uuid
 
 # Ajouter le dossier modules au path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'modules'))
 
-# Import des modules locaux
-from modules.nutrition_calculator import NutritionalCalculator, UserProfile
-from modules.food_recommender import FoodRecommendationEngine, NutritionalTarget
-from modules.meal_plan_generator import MealPlanGenerator, MealPlanPreferences
-from modules.nutrition_assistant import NutritionAssistant
+# Import des modules locaux: pandas, plotly, scikit-learn et modules IA sont
+# importés par les pages qui les utilisent (l'accueil s'affiche sans eux)
+from modules.import_profiler import import_timer, import_report
 
 # Configuration de la page
 st.set_page_config(
@@ -95,19 +90,35 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Stockage local
+@st.cache_resource
+def get_store():
+    """Stockage SQLite partagé par toutes les sessions (pool de lecture, écritures regroupées)"""
+    with import_timer("Stockage"):
+        from modules import LocalStore
+    return LocalStore()
+
+SAVE_TIMEOUT_S = 10
+
+def confirm_saved(*tickets):
+    """Attend les écritures d'une sauvegarde explicite; affiche l'erreur en cas d'échec"""
+    for ticket in tickets:
+        if not ticket.wait(SAVE_TIMEOUT_S):
+            st.error(f"❌ Échec de la sauvegarde: {ticket.error or 'délai dépassé'}")
+            return False
+    return True
+
 # Initialisation de la session
-if 'profile' not in st.session_state:
-    st.session_state.profile = None
-if 'nutritional_needs' not in st.session_state:
-    st.session_state.nutritional_needs = None
-if 'weight_history' not in st.session_state:
-    st.session_state.weight_history = []
-if 'meal_plan' not in st.session_state:
-    st.session_state.meal_plan = None
-if 'chat_history' not in st.session_state:
-    st.session_state.chat_history = []
-if 'favorite_foods' not in st.session_state:
-    st.session_state.favorite_foods = []
+if 'user_id' not in st.session_state:
+    # Identifiant conservé dans l'URL: les données sont retrouvées au rechargement
+    st.session_state.user_id = st.query_params.get('user') or uuid.uuid4().hex
+    st.query_params['user'] = st.session_state.user_id
+    
+    # Données sauvegardées de l'utilisateur (une requête indexée par table)
+    store = get_store()
+    st.session_state.profile, st.session_state.nutritional_needs = store.load_profile(st.session_state.user_id)
+    st.session_state.weight_history = store.weigh_ins(st.session_state.user_id)
+    st.session_state.favorite_foods = store.favorites(st.session_state.user_id)
 if 'recommender' not in st.session_state:
     st.session_state.recommender = None
 if 'assistant' not in st.session_state:
@@ -115,31 +126,46 @@ if 'assistant' not in st.session_state:
 if 'meal_generator' not in st.session_state:
     st.session_state.meal_generator = None
 
+def ensure_session_state(**factories):
+    """
+    Crée les objets de session manquants au premier passage sur une page qui les utilise
+    (estimateur TDEE, contexte de conversation, historique du chat)
+    """
+    for key, factory in factories.items():
+        if key not in st.session_state:
+            st.session_state[key] = factory()
+
+def new_conversation():
+    """Contexte de conversation initialisé avec le profil sauvegardé"""
+    from modules import ConversationContext
+    return ConversationContext(st.session_state.profile, st.session_state.nutritional_needs)
+
+def new_tdee_estimator():
+    """Estimateur de dépense reconstruit à partir des pesées sauvegardées (début de session)"""
+    from modules import AdaptiveTDEEEstimator
+    estimator = AdaptiveTDEEEstimator()
+    for entry in st.session_state.weight_history:
+        if entry.get('intake') is not None:
+            estimator.add_weigh_in(entry['date'], entry['weight'], entry['intake'])
+    return estimator
+
 # Chargement des données
 @st.cache_data
 def load_food_data():
-    """Charge le dataset alimentaire"""
+    """Charge le dataset alimentaire (avec les champs d'affichage précalculés)"""
+    with import_timer("Données"):
+        import pandas as pd
+        from modules.food_catalog import load_food_table, with_display_fields
+    
     try:
-        dfs = []
-        data_path = "data/nutrition"
-        
-        if os.path.exists(data_path):
-            for i in range(1, 6):
-                file_path = os.path.join(data_path, f"FOOD-DATA-GROUP{i}.csv")
-                if os.path.exists(file_path):
-                    df = pd.read_csv(file_path)
-                    dfs.append(df)
-        
-        if dfs:
-            combined_df = pd.concat(dfs, ignore_index=True)
-            combined_df = combined_df.dropna(subset=['food'])
-            combined_df = combined_df.fillna(0)
-            return combined_df
+        food_df = load_food_table()
+        if food_df is not None:
+            return food_df
     except Exception as e:
         st.error(f"⚠️ Erreur lors du chargement des données: {str(e)}")
     
     # Dataset de fallback
-    return pd.DataFrame({
+    return with_display_fields(pd.DataFrame({
         'food': [
             'Poulet grillé', 'Riz complet', 'Brocoli', 'Saumon', 'Œufs',
             'Quinoa', 'Avocat', 'Amandes', 'Yaourt grec', 'Banane',
@@ -165,15 +191,15 @@ def load_food_data():
         'Magnesium': [29, 143, 21, 29, 10, 197, 29, 268, 11, 27, 79, 25, 53, 36, 5, 29, 177, 11, 90, 11, 53, 30, 13, 25, 17],
         'Potassium': [256, 268, 316, 363, 126, 563, 485, 705, 141, 358, 558, 337, 121, 369, 107, 252, 429, 220, 240, 237, 169, 302, 147, 209, 312],
         'Nutrition Density': [8.5, 7.2, 9.1, 8.8, 7.9, 8.3, 7.5, 7.8, 8.0, 6.5, 9.5, 7.8, 7.6, 8.4, 7.1, 8.6, 7.9, 8.2, 6.8, 8.9, 7.0, 8.7, 9.2, 8.8, 8.1]
-    })
-
-# Charger les données
-food_data = load_food_data()
+    }))
 
 # Initialiser les modules
 @st.cache_resource
 def initialize_ai_modules(_food_data):
     """Initialise tous les modules"""
+    with import_timer("Modules IA"):
+        from modules import FoodRecommendationEngine, MealPlanGenerator, NutritionAssistant
+    
     try:
         recommender = FoodRecommendationEngine(_food_data)
         meal_generator = MealPlanGenerator(_food_data, recommender)
@@ -183,16 +209,584 @@ def initialize_ai_modules(_food_data):
         st.error(f"❌ Erreur d'initialisation: {str(e)}")
         return None, None, None
 
-# Initialiser
-if st.session_state.recommender is None:
-    recommender, meal_generator, assistant = initialize_ai_modules(food_data)
-    st.session_state.recommender = recommender
-    st.session_state.meal_generator = meal_generator
-    st.session_state.assistant = assistant
-else:
-    recommender = st.session_state.recommender
-    meal_generator = st.session_state.meal_generator
-    assistant = st.session_state.assistant
+@st.cache_resource
+def get_plan_rollup(_food_data):
+    """Table nutritionnelle précalculée pour les bilans de plan"""
+    from modules import PlanRollup
+    return PlanRollup(_food_data)
+
+@st.fragment
+def render_goal_scenarios(profile, key_prefix):
+    """Matrice de scénarios: semaines jusqu'à l'objectif et trajectoires de poids"""
+    with import_timer("Scénarios"):
+        import numpy as np
+        import plotly.graph_objects as go
+        import plotly.express as px
+        from modules import NutritionalCalculator, GoalSimulator
+    
+    goal = profile['goal']
+    if goal == 'Maintien':
+        st.info("🎯 Objectif de maintien: aucune trajectoire à projeter")
+        return
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        activities = st.multiselect(
+            "Niveaux d'activité",
+            list(NutritionalCalculator.ACTIVITY_FACTORS),
+            default=list(NutritionalCalculator.ACTIVITY_FACTORS),
+            key=f"{key_prefix}_activities"
+        )
+    with col2:
+        deficits = st.multiselect(
+            "Écart calorique (%)", [5, 10, 15, 20, 25],
+            default=[10, 15, 20, 25],
+            key=f"{key_prefix}_deficits"
+        )
+    with col3:
+        n_weeks = st.slider("Horizon (semaines)", 4, 104, 52, key=f"{key_prefix}_weeks")
+    
+    if not activities or not deficits:
+        st.warning("Sélectionnez au moins un niveau d'activité et un écart calorique")
+        return
+    
+    deficits = sorted(deficits)
+    grid = GoalSimulator.from_profile(profile).simulate(
+        [goal], activities, [d / 100 for d in deficits], n_weeks=n_weeks
+    )
+    
+    # Matrice activité × écart
+    weeks = grid.weeks_table(goal)
+    labels = [[f"{w:.0f} sem." if np.isfinite(w) else "—" for w in row] for row in weeks.to_numpy()]
+    fig = go.Figure(go.Heatmap(
+        z=weeks.where(np.isfinite(weeks)).to_numpy(),
+        x=[f"{d}%" for d in deficits],
+        y=activities,
+        text=labels,
+        texttemplate="%{text}",
+        colorscale='RdYlGn_r',
+        colorbar=dict(title="Semaines")
+    ))
+    fig.update_layout(
+        title=f"Semaines pour atteindre {profile['target_weight']} kg",
+        xaxis_title="Écart calorique",
+        height=350
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    
+    # Trajectoires semaine par semaine
+    frame = grid.to_frame()
+    frame['Écart'] = (frame['deficit_pct'] * 100).round().astype(int).astype(str) + '%'
+    fig = px.line(
+        frame, x='week', y='weight', color='Écart', line_dash='activity_level',
+        hover_data={'bmr': ':.0f', 'tdee': ':.0f', 'intake': ':.0f'},
+        labels={'week': 'Semaine', 'weight': 'Poids (kg)', 'activity_level': 'Activité',
+                'bmr': 'BMR', 'tdee': 'TDEE', 'intake': 'Apport'}
+    )
+    fig.update_layout(height=450, legend=dict(orientation="h", y=-0.25))
+    st.plotly_chart(fig, use_container_width=True)
+
+@st.cache_data(max_entries=256)
+def cached_recommendations(_recommender, target, n_recommendations=10, exclude_foods=None,
+                           min_protein=0, max_calories=1000):
+    """Recommandations mises en cache par cible et filtres"""
+    return _recommender.recommend_foods(
+        target,
+        n_recommendations=n_recommendations,
+        exclude_foods=exclude_foods,
+        min_protein=min_protein,
+        max_calories=max_calories
+    )
+
+@st.cache_data(max_entries=1024)
+def cached_alternatives(_recommender, food_name, n_alternatives=3):
+    """Noms des aliments similaires (calcul mis en cache par aliment)"""
+    if _recommender is None:
+        return []
+    alternatives = _recommender.find_alternatives(food_name, n_alternatives=n_alternatives)
+    return [] if alternatives.empty else alternatives['food'].tolist()
+
+@st.cache_resource
+def get_food_index(_food_data):
+    """Index de requêtes de la base (ordres de tri précalculés, résultats en cache)"""
+    from modules import FoodQueryIndex
+    return FoodQueryIndex(_food_data)
+
+@st.fragment
+def render_food_actions(food_name, key, fav_label="⭐ Favoris", alt_label=None, plan_label=None):
+    """
+    Boutons d'action d'un aliment (favoris, alternatives, ajout au plan)
+    Fragment: un clic ne réexécute que ces boutons, pas toute la page
+    (sauf l'ajout aux favoris, affichés et utilisés hors de ce fragment)
+    """
+    n_buttons = 1 + bool(alt_label) + bool(plan_label)
+    columns = iter(st.columns(n_buttons))
+    
+    with next(columns):
+        if st.button(fav_label, key=f"fav_{key}"):
+            if food_name not in st.session_state.favorite_foods:
+                st.session_state.favorite_foods.append(food_name)
+                get_store().add_favorite(st.session_state.user_id, food_name)
+                # Le toast survit à la réexécution complète qui rafraîchit la liste des favoris
+                st.toast(f"✅ {food_name} ajouté aux favoris!")
+                st.rerun()
+    
+    if alt_label:
+        with next(columns):
+            if st.button(alt_label, key=f"alt_{key}"):
+                alternatives = cached_alternatives(st.session_state.recommender, food_name)
+                if alternatives:
+                    st.write("**Alternatives similaires:**")
+                    for alternative in alternatives:
+                        st.text(f"• {alternative}")
+    
+    if plan_label:
+        with next(columns):
+            if st.button(plan_label, key=f"add_{key}"):
+                st.info(f"📝 {food_name} sera ajouté lors de la prochaine génération de plan")
+
+@st.fragment
+def render_recommendation_search(profile, needs, recommender):
+    """
+    Recherche d'aliments recommandés (filtres et résultats)
+    Fragment: changer un filtre ne réexécute pas le reste de la page
+    """
+    from modules import NutritionalTarget
+    from modules.food_catalog import LOW_CALORIE_TAG, VERDICT_STYLES, goal_verdict
+    
+    st.markdown("### 🔍 Recherche d'Aliments")
+    
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        search = st.text_input("🔎 Rechercher un aliment", "")
+    with col2:
+        n_results = st.number_input("Nombre de résultats", 5, 20, 10)
+    with col3:
+        sort_by = st.selectbox("Trier par", ["Compatibilité", "Protéines", "Calories"])
+    
+    # Filtres avancés
+    with st.expander("🔧 Filtres avancés"):
+        col1, col2 = st.columns(2)
+        with col1:
+            min_protein = st.slider("Protéines minimum (g/100g)", 0, 50, 0)
+            max_calories = st.slider("Calories maximum (kcal/100g)", 0, 1000, 1000)
+        with col2:
+            exclude_foods = st.multiselect(
+                "Exclure des aliments",
+                st.session_state.favorite_foods if st.session_state.favorite_foods else ["Aucun"]
+            )
+    
+    if st.button("🎯 Voir les recommandations", use_container_width=True, type="primary"):
+        with st.spinner("🔍 Recherche des meilleurs aliments pour vous..."):
+            # Calculer les besoins pour un repas
+            meal_ratio = 0.30
+    
+            target = NutritionalTarget(
+                calories=needs['target_calories'] * meal_ratio,
+                proteins=needs['macros']['proteins'] * meal_ratio,
+                carbs=needs['macros']['carbs'] * meal_ratio,
+                fats=needs['macros']['fats'] * meal_ratio,
+                goal=profile['goal']
+            )
+    
+            # Obtenir recommandations
+            recommendations = cached_recommendations(
+                recommender,
+                target,
+                n_recommendations=n_results,
+                exclude_foods=exclude_foods if exclude_foods else None,
+                min_protein=min_protein,
+                max_calories=max_calories
+            )
+    
+            # Filtrer par recherche
+            if search:
+                recommendations = recommendations[
+                    recommendations['food'].str.contains(search, case=False, na=False)
+                ]
+    
+            st.success(f"✅ {len(recommendations)} aliments recommandés pour votre objectif: **{profile['goal']}**")
+    
+            # Afficher résultats
+            for idx, (_, food) in enumerate(recommendations.iterrows()):
+                with st.expander(f"#{idx+1} - {food['food']} (Compatibilité: {food['match_percentage']:.0f}%)", expanded=(idx < 3)):
+                    col1, col2, col3 = st.columns(3)
+    
+                    with col1:
+                        st.markdown("**📊 Valeurs nutritionnelles /100g:**")
+                        st.text(f"🔥 Calories: {food['Caloric Value']:.0f} kcal")
+                        st.text(f"🥩 Protéines: {food['Protein']:.1f}g")
+                        st.text(f"🌾 Glucides: {food['Carbohydrates']:.1f}g")
+                        st.text(f"🥑 Lipides: {food['Fat']:.1f}g")
+                        st.text(f"🌿 Fibres: {food['Dietary Fiber']:.1f}g")
+    
+                    with col2:
+                        st.markdown("**🍽️ Portion suggérée:**")
+                        if food['Caloric Value'] > 0:
+                            suggested_portion = min(200, target.calories * 0.4 / food['Caloric Value'] * 100)
+                        else:
+                            suggested_portion = 100
+                        st.text(f"📏 {suggested_portion:.0f}g recommandés")
+    
+                        portion_cal = food['Caloric Value'] * suggested_portion / 100
+                        portion_prot = food['Protein'] * suggested_portion / 100
+                        st.text(f"🔥 {portion_cal:.0f} kcal")
+                        st.text(f"🥩 {portion_prot:.1f}g protéines")
+    
+                        # Indicateurs (champs précalculés du catalogue)
+                        if isinstance(food['protein_highlight'], str):
+                            st.success(food['protein_highlight'])
+                        if isinstance(food['fiber_tag'], str):
+                            st.success(food['fiber_tag'])
+                        if food['calorie_tag'] == LOW_CALORIE_TAG:
+                            st.info(LOW_CALORIE_TAG)
+    
+                    with col3:
+                        st.markdown("**⭐ Évaluation:**")
+                        score = food.get('Nutrition Density', 5)
+                        st.progress(food['density_progress'])
+                        st.caption(f"Score nutritionnel: {score:.1f}/10")
+    
+                        st.markdown("**🎯 Pour votre objectif:**")
+                        verdict = goal_verdict(food, profile['goal'])
+                        getattr(st, VERDICT_STYLES[verdict])(verdict)
+    
+                    # Actions
+                    render_food_actions(food['food'], f"rec_{idx}",
+                                        fav_label="⭐ Ajouter aux favoris", alt_label="🔄 Voir alternatives")
+
+@st.fragment
+def render_favorites():
+    """
+    Liste des aliments favoris (retrait sans réexécuter la page)
+    """
+    if st.session_state.favorite_foods:
+        st.markdown("---")
+        st.markdown("### ⭐ Mes Aliments Favoris")
+    
+        cols = st.columns(4)
+        for idx, food_name in enumerate(st.session_state.favorite_foods):
+            with cols[idx % 4]:
+                st.markdown(f"""
+                <div class="food-card">
+                    <p><strong>{food_name}</strong></p>
+                </div>
+                """, unsafe_allow_html=True)
+    
+                if st.button("🗑️ Retirer", key=f"remove_fav_{idx}"):
+                    st.session_state.favorite_foods.remove(food_name)
+                    get_store().remove_favorite(st.session_state.user_id, food_name)
+                    st.rerun(scope="fragment")
+
+@st.fragment
+def render_plan_day(meal_plan, meal_generator, food_data):
+    """
+    Bilan et repas du jour choisi (changer de jour ne réexécute que ce bloc)
+    """
+    from modules import MealPlanGenerator
+    
+    selected_idx = st.selectbox(
+        "📆 Choisissez un jour",
+        range(meal_plan.n_days),
+        format_func=lambda d: meal_generator.format_day_label(meal_plan.day_date(d))
+    )
+    
+    if selected_idx is not None:
+        selected_day = meal_generator.format_day_label(meal_plan.day_date(selected_idx))
+        day_meals = meal_plan.day_for_display(
+            selected_idx, food_data['food'].values, MealPlanGenerator.MEAL_NAMES
+        )
+    
+        # Totaux du jour
+        total_cal, total_prot, total_carbs, total_fats = meal_plan.daily_totals()[selected_idx]
+    
+        st.markdown(f"### 📊 Bilan nutritionnel - {selected_day}")
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Total Calories", f"{total_cal:.0f} kcal")
+        with col2:
+            st.metric("Total Protéines", f"{total_prot:.0f}g")
+        with col3:
+            st.metric("Total Glucides", f"{total_carbs:.0f}g")
+        with col4:
+            st.metric("Total Lipides", f"{total_fats:.0f}g")
+    
+        # Comparaison
+        target = st.session_state.nutritional_needs['target_calories']
+        diff = total_cal - target
+        if abs(diff) < 100:
+            st.success(f"✅ Parfait! Vous êtes à {diff:+.0f} kcal de votre objectif")
+        elif abs(diff) < 200:
+            st.warning(f"⚠️ Proche de l'objectif ({diff:+.0f} kcal de différence)")
+        else:
+            st.error(f"❌ Écart important: {diff:+.0f} kcal")
+    
+        st.markdown("---")
+    
+        # Repas du jour
+        for meal_name, meal_data in day_meals.items():
+            with st.expander(f"🍽️ {meal_name}", expanded=True):
+                col1, col2 = st.columns([2, 1])
+    
+                with col1:
+                    st.markdown("**🥘 Composition du repas:**")
+                    for aliment in meal_data.get('aliments', []):
+                        st.markdown(f"• {aliment}")
+    
+                with col2:
+                    st.markdown("**📊 Valeurs nutritionnelles:**")
+                    st.markdown(f"- 🔥 {meal_data.get('calories', 0):.0f} kcal")
+                    st.markdown(f"- 🥩 {meal_data.get('proteines', 0):.0f}g protéines")
+                    st.markdown(f"- 🌾 {meal_data.get('glucides', 0):.0f}g glucides")
+                    st.markdown(f"- 🥑 {meal_data.get('lipides', 0):.0f}g lipides")
+
+@st.fragment
+def render_plan_week(meal_plan, food_data):
+    """
+    Liste de courses et bilan complet de la semaine choisie
+    """
+    rollup = get_plan_rollup(food_data)
+    plan_grams = rollup.gram_matrix(meal_plan)
+    n_weeks = (meal_plan.n_days + 6) // 7
+    
+    st.markdown("---")
+    week = st.selectbox("🗓️ Semaine", range(1, n_weeks + 1),
+                        format_func=lambda w: f"Semaine {w}")
+    first_day = (week - 1) * 7
+    last_day = min(first_day + 6, meal_plan.n_days - 1)
+    
+    with st.expander("🛒 Liste de courses", expanded=False):
+        shopping = rollup.shopping_list(meal_plan, first_day, last_day, grams=plan_grams)
+        st.dataframe(
+            shopping.rename(columns={'food': 'Aliment', 'grams': 'Quantité (g)'}),
+            use_container_width=True, hide_index=True
+        )
+        st.download_button(
+            "📥 Télécharger la liste (CSV)",
+            shopping.to_csv(index=False).encode('utf-8'),
+            file_name=f"liste_courses_semaine_{week}.csv",
+            mime="text/csv"
+        )
+    
+    with st.expander("🧪 Bilan nutritionnel complet", expanded=False):
+        daily_totals = rollup.daily_totals(meal_plan, plan_grams)
+        st.markdown("**Apports par jour**")
+        st.dataframe(daily_totals.iloc[first_day:last_day + 1].round(1).T, use_container_width=True)
+        st.markdown("**Totaux par semaine**")
+        st.dataframe(rollup.weekly_totals(meal_plan, plan_grams).round(1).T, use_container_width=True)
+
+@st.fragment
+def render_chat(assistant):
+    """
+    Questions rapides, historique et saisie du chat
+    Fragment: envoyer un message ne réexécute que la conversation
+    """
+    st.markdown("### 💡 Questions Fréquentes (Cliquez pour poser)")
+    
+    # Quick actions (réponses mémorisées par l'assistant: clics répétés gratuits)
+    quick_question = None
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        if st.button("🍳 Petit-déjeuner protéiné", use_container_width=True):
+            quick_question = "Suggère-moi un petit-déjeuner protéiné adapté à mon objectif"
+    with col2:
+        if st.button("🏋️ Post-entraînement", use_container_width=True):
+            quick_question = "Que dois-je manger après mon entraînement?"
+    with col3:
+        if st.button("💧 Hydratation", use_container_width=True):
+            quick_question = "Combien d'eau dois-je boire par jour?"
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        if st.button("🐟 Bienfaits du saumon", use_container_width=True):
+            quick_question = "Quels sont les bienfaits du saumon pour moi?"
+    with col2:
+        if st.button("🔄 Alternatives poulet", use_container_width=True):
+            quick_question = "Quelles sont les alternatives au poulet?"
+    with col3:
+        if st.button("⏰ Timing des repas", use_container_width=True):
+            quick_question = "À quelle heure dois-je prendre mes repas?"
+    
+    st.markdown("---")
+    
+    # Historique du chat
+    chat_container = st.container()
+    with chat_container:
+        for msg in st.session_state.chat_history.recent():
+            if msg["role"] == "user":
+                st.markdown(f"""
+                <div style='background: linear-gradient(135deg, #E3F2FD 0%, #BBDEFB 100%); 
+                            padding: 1rem; border-radius: 15px; margin: 0.5rem 0; 
+                            margin-left: 20%; box-shadow: 0 2px 4px rgba(0,0,0,0.1);'>
+                    <strong>👤 Vous:</strong> {msg["content"]}
+                </div>
+                """, unsafe_allow_html=True)
+            else:
+                st.markdown(f"""
+                <div style='background: linear-gradient(135deg, #F5F5F5 0%, #E0E0E0 100%); 
+                            padding: 1rem; border-radius: 15px; margin: 0.5rem 0; 
+                            margin-right: 20%; box-shadow: 0 2px 4px rgba(0,0,0,0.1);'>
+                    <strong>🤖 Assistant:</strong><br>{msg["content"]}
+                </div>
+                """, unsafe_allow_html=True)
+    
+    # Zone de saisie
+    st.markdown("---")
+    col1, col2 = st.columns([5, 1])
+    with col1:
+        user_input = st.text_input("💬 Votre question...", 
+                                   key="chat_input", 
+                                   label_visibility="collapsed",
+                                   placeholder="Ex: Suggère-moi un repas, Quels aliments pour mon objectif?")
+    with col2:
+        send = st.button("📤 Envoyer", use_container_width=True)
+    
+    question = quick_question or (user_input if send else None)
+    if question:
+        st.session_state.chat_history.append("user", question)
+    
+        with st.spinner("🤖 Réflexion en cours..."):
+            if assistant and st.session_state.profile:
+                response = assistant.answer_query(question, st.session_state.conversation)
+            else:
+                response = """
+⚠️ **Configuration nécessaire**
+
+Pour recevoir des conseils personnalisés, veuillez:
+1. Configurer votre profil dans l'onglet **👤 Profil**
+2. Renseigner vos informations personnelles
+3. Enregistrer votre profil
+
+Je pourrai ensuite vous fournir des recommandations adaptées à votre objectif! 💪
+"""
+    
+            st.session_state.chat_history.append("assistant", response)
+    
+        st.rerun(scope="fragment")
+    
+    # Historique complet (lu par pages depuis le disque)
+    history = st.session_state.chat_history
+    if len(history) > history.window:
+        with st.expander(f"📜 Historique complet ({len(history)} messages)"):
+            page_number = st.number_input("Page (1 = la plus récente)", min_value=1,
+                                          max_value=history.n_pages(), value=1, step=1)
+            for msg in history.page(int(page_number) - 1):
+                author = "👤 Vous" if msg["role"] == "user" else "🤖 Assistant"
+                st.markdown(f"**{author}:** {msg['content']}")
+    
+    # Effacer historique
+    if st.session_state.chat_history:
+        st.markdown("---")
+        if st.button("🗑️ Effacer l'historique", use_container_width=True):
+            st.session_state.chat_history.clear()
+            st.rerun(scope="fragment")
+
+@st.fragment
+def render_food_browser(food_data):
+    """
+    Exploration paginée de la base (filtres, pages et actions dans un seul fragment)
+    """
+    import pandas as pd
+    from modules.food_catalog import row_tags
+    
+    # Filtres
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        search = st.text_input("🔎 Rechercher", placeholder="Nom d'aliment...")
+    with col2:
+        sort_by = st.selectbox("Trier par", 
+                               ["Nutrition Density", "Caloric Value", "Protein", 
+                                "Carbohydrates", "Fat", "Dietary Fiber"])
+    with col3:
+        min_protein = st.slider("Protéines min (g)", 0, 50, 0)
+    with col4:
+        max_calories = st.slider("Calories max", 0, 1000, 1000)
+    
+    # Filtrage (index précalculé, résultat en cache par combinaison de filtres)
+    food_index = get_food_index(food_data)
+    filtered = food_index.query(search, sort_by, min_protein, max_calories)
+    
+    st.markdown(f"### 📊 {len(filtered)} aliments trouvés")
+    
+    # Statistiques globales (calculées une fois par requête)
+    if not filtered.empty:
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Calories moyenne", f"{filtered.means['Caloric Value']:.0f} kcal")
+        with col2:
+            st.metric("Protéines moyenne", f"{filtered.means['Protein']:.1f}g")
+        with col3:
+            st.metric("Glucides moyenne", f"{filtered.means['Carbohydrates']:.1f}g")
+        with col4:
+            st.metric("Lipides moyenne", f"{filtered.means['Fat']:.1f}g")
+    
+    st.markdown("---")
+    
+    # Affichage paginé
+    items_per_page = 10
+    total_pages = food_index.n_pages(filtered, items_per_page)
+    
+    if total_pages > 0:
+        page_num = st.number_input("Page", 1, total_pages, 1, label_visibility="collapsed")
+        st.caption(f"Page {page_num} sur {total_pages}")
+    
+        start_idx = (page_num - 1) * items_per_page
+        page_data = food_index.page(filtered, page_num, items_per_page)
+    
+        for idx, (_, row) in enumerate(page_data.iterrows()):
+            with st.expander(f"🍽️ {row['food']} - {row['Caloric Value']:.0f} kcal/100g", expanded=False):
+                col1, col2, col3 = st.columns(3)
+    
+                with col1:
+                    st.markdown("#### 📊 Macronutriments")
+                    st.markdown(f"""
+                    - 🔥 **Calories:** {row['Caloric Value']:.0f} kcal
+                    - 🥩 **Protéines:** {row['Protein']:.1f}g
+                    - 🌾 **Glucides:** {row['Carbohydrates']:.1f}g
+                    - 🥑 **Lipides:** {row['Fat']:.1f}g
+                    - 🌿 **Fibres:** {row['Dietary Fiber']:.1f}g
+                    - 🍬 **Sucres:** {row['Sugars']:.1f}g
+                    """)
+    
+                with col2:
+                    st.markdown("#### 💊 Vitamines")
+                    st.markdown(f"""
+                    - 🅰️ **Vitamine A:** {row['Vitamin A']:.1f}µg
+                    - 🅱️ **Vitamine B12:** {row['Vitamin B12']:.2f}µg
+                    - 🍊 **Vitamine C:** {row['Vitamin C']:.1f}mg
+                    - ☀️ **Vitamine D:** {row['Vitamin D']:.1f}µg
+                    """)
+    
+                    st.markdown("#### ⚗️ Minéraux")
+                    st.markdown(f"""
+                    - 🦴 **Calcium:** {row['Calcium']:.0f}mg
+                    - 🩸 **Fer:** {row['Iron']:.1f}mg
+                    - 💪 **Magnésium:** {row['Magnesium']:.0f}mg
+                    """)
+    
+                with col3:
+                    st.markdown("#### 🧂 Autres")
+                    st.markdown(f"""
+                    - 🧂 **Sodium:** {row['Sodium']:.0f}mg
+                    - 💧 **Eau:** {row['Water']:.0f}%
+                    - ⚡ **Potassium:** {row['Potassium']:.0f}mg
+                    """)
+    
+                    # Score nutritionnel
+                    st.markdown("#### ⭐ Score Nutritionnel")
+                    if pd.notna(row['density_progress']):
+                        st.progress(row['density_progress'])
+                        st.caption(f"**{row['Nutrition Density']:.1f}/10**")
+    
+                    # Tags nutritionnels (précalculés au chargement de la base)
+                    st.markdown("#### 🏷️ Caractéristiques")
+                    for tag in row_tags(row):
+                        st.success(tag)
+    
+                # Actions
+                render_food_actions(row['food'], f"db_{start_idx + idx}",
+                                    alt_label="🔄 Alternatives", plan_label="➕ Ajouter au plan")
 
 # Sidebar - Navigation
 st.sidebar.markdown("# 🥗 FitLife AI Assistant")
@@ -216,6 +810,22 @@ if st.session_state.profile:
 else:
     st.sidebar.warning("⚠️ Configurez votre profil")
 
+# Charger les données et initialiser les modules (pages qui en ont besoin uniquement)
+DATA_PAGES = ["📊 Dashboard", "🎯 Recommandations", "🍽️ Plan Alimentaire",
+              "💬 Assistant", "📚 Base Aliments"]
+if page in DATA_PAGES:
+    food_data = load_food_data()
+    
+    if st.session_state.recommender is None:
+        recommender, meal_generator, assistant = initialize_ai_modules(food_data)
+        st.session_state.recommender = recommender
+        st.session_state.meal_generator = meal_generator
+        st.session_state.assistant = assistant
+    else:
+        recommender = st.session_state.recommender
+        meal_generator = st.session_state.meal_generator
+        assistant = st.session_state.assistant
+
 # ==================== PAGES ====================
 
 # PAGE: ACCUEIL
@@ -358,6 +968,10 @@ if page == "🏠 Accueil":
 
 # PAGE: PROFIL
 elif page == "👤 Profil":
+    with import_timer(page):
+        from modules import NutritionalCalculator, UserProfile
+    ensure_session_state(tdee_estimator=new_tdee_estimator, conversation=new_conversation)
+    
     st.markdown('<h1 class="main-header">👤 Configuration du Profil</h1>', unsafe_allow_html=True)
     
     st.markdown("""
@@ -416,7 +1030,9 @@ elif page == "👤 Profil":
             )
             
             # Calculer besoins nutritionnels
-            needs = NutritionalCalculator.calculate_complete_needs(profile_data)
+            needs = NutritionalCalculator.calculate_complete_needs(
+                profile_data, st.session_state.tdee_estimator
+            )
             
             # Sauvegarder
             st.session_state.profile = {
@@ -433,13 +1049,17 @@ elif page == "👤 Profil":
             }
             
             st.session_state.nutritional_needs = needs
+            saved = confirm_saved(
+                get_store().save_profile(st.session_state.user_id, st.session_state.profile, needs)
+            )
             
-            # Mettre à jour le contexte de l'assistant
-            if assistant:
-                assistant.set_context(st.session_state.profile, needs)
+            # Mettre à jour le contexte de conversation de la session
+            st.session_state.conversation.user_profile = st.session_state.profile
+            st.session_state.conversation.nutritional_needs = needs
             
-            st.success("✅ Profil enregistré avec succès!")
-            st.balloons()
+            if saved:
+                st.success("✅ Profil enregistré avec succès!")
+                st.balloons()
             
             # Afficher les résultats
             st.markdown("---")
@@ -484,9 +1104,17 @@ elif page == "👤 Profil":
             - **Niveau d'activité:** {activity_level}
             - **Régime alimentaire:** {', '.join(diet_type)}
             """)
+    
+    if st.session_state.profile:
+        with st.expander("🔮 Simulateur de scénarios", expanded=False):
+            render_goal_scenarios(st.session_state.profile, "profile_sim")
 
 # PAGE: DASHBOARD
 elif page == "📊 Dashboard":
+    with import_timer(page):
+        import plotly.graph_objects as go
+        from modules import NutritionalTarget
+    
     st.markdown('<h1 class="main-header">📊 Tableau de Bord</h1>', unsafe_allow_html=True)
     
     if not st.session_state.profile:
@@ -563,6 +1191,11 @@ elif page == "📊 Dashboard":
             fig.update_layout(height=400)
             st.plotly_chart(fig, use_container_width=True)
         
+        # Projection de l'objectif
+        st.markdown("---")
+        st.markdown("### 🔮 Projection vers l'Objectif")
+        render_goal_scenarios(profile, "dash_sim")
+        
         # Recommandations du jour
         st.markdown("---")
         st.markdown("### 🎯 Aliments Recommandés pour Vous")
@@ -576,7 +1209,7 @@ elif page == "📊 Dashboard":
                 goal=profile['goal']
             )
             
-            recommendations = recommender.recommend_foods(target, n_recommendations=6)
+            recommendations = cached_recommendations(recommender, target, n_recommendations=6)
             
             cols = st.columns(3)
             for idx, (_, food) in enumerate(recommendations.iterrows()):
@@ -595,13 +1228,13 @@ elif page == "📊 Dashboard":
                     </div>
                     """, unsafe_allow_html=True)
                     
-                    if st.button(f"⭐ Favoris", key=f"fav_dash_{idx}"):
-                        if food['food'] not in st.session_state.favorite_foods:
-                            st.session_state.favorite_foods.append(food['food'])
-                            st.success(f"✅ {food['food']} ajouté aux favoris!")
+                    render_food_actions(food['food'], f"dash_{idx}")
 
 # PAGE: RECOMMANDATIONS
 elif page == "🎯 Recommandations":
+    with import_timer(page):
+        from modules import NutritionalTarget
+    
     st.markdown('<h1 class="main-header">🎯 Recommandations Personnalisées</h1>', unsafe_allow_html=True)
     
     if not st.session_state.profile:
@@ -616,149 +1249,21 @@ elif page == "🎯 Recommandations":
         </div>
         """, unsafe_allow_html=True)
         
-        st.markdown("### 🔍 Recherche d'Aliments")
-        
-        col1, col2, col3 = st.columns([2, 1, 1])
-        with col1:
-            search = st.text_input("🔎 Rechercher un aliment", "")
-        with col2:
-            n_results = st.number_input("Nombre de résultats", 5, 20, 10)
-        with col3:
-            sort_by = st.selectbox("Trier par", ["Compatibilité", "Protéines", "Calories"])
-        
-        # Filtres avancés
-        with st.expander("🔧 Filtres avancés"):
-            col1, col2 = st.columns(2)
-            with col1:
-                min_protein = st.slider("Protéines minimum (g/100g)", 0, 50, 0)
-                max_calories = st.slider("Calories maximum (kcal/100g)", 0, 1000, 1000)
-            with col2:
-                exclude_foods = st.multiselect(
-                    "Exclure des aliments",
-                    st.session_state.favorite_foods if st.session_state.favorite_foods else ["Aucun"]
-                )
-        
-        if st.button("🎯 Voir les recommandations", use_container_width=True, type="primary"):
-            with st.spinner("🔍 Recherche des meilleurs aliments pour vous..."):
-                # Calculer les besoins pour un repas
-                meal_ratio = 0.30
-                
-                target = NutritionalTarget(
-                    calories=needs['target_calories'] * meal_ratio,
-                    proteins=needs['macros']['proteins'] * meal_ratio,
-                    carbs=needs['macros']['carbs'] * meal_ratio,
-                    fats=needs['macros']['fats'] * meal_ratio,
-                    goal=profile['goal']
-                )
-                
-                # Obtenir recommandations
-                recommendations = recommender.recommend_foods(
-                    target,
-                    n_recommendations=n_results,
-                    exclude_foods=exclude_foods if exclude_foods else None,
-                    min_protein=min_protein,
-                    max_calories=max_calories
-                )
-                
-                # Filtrer par recherche
-                if search:
-                    recommendations = recommendations[
-                        recommendations['food'].str.contains(search, case=False, na=False)
-                    ]
-                
-                st.success(f"✅ {len(recommendations)} aliments recommandés pour votre objectif: **{profile['goal']}**")
-                
-                # Afficher résultats
-                for idx, (_, food) in enumerate(recommendations.iterrows()):
-                    with st.expander(f"#{idx+1} - {food['food']} (Compatibilité: {food['match_percentage']:.0f}%)", expanded=(idx < 3)):
-                        col1, col2, col3 = st.columns(3)
-                        
-                        with col1:
-                            st.markdown("**📊 Valeurs nutritionnelles /100g:**")
-                            st.text(f"🔥 Calories: {food['Caloric Value']:.0f} kcal")
-                            st.text(f"🥩 Protéines: {food['Protein']:.1f}g")
-                            st.text(f"🌾 Glucides: {food['Carbohydrates']:.1f}g")
-                            st.text(f"🥑 Lipides: {food['Fat']:.1f}g")
-                            st.text(f"🌿 Fibres: {food['Dietary Fiber']:.1f}g")
-                        
-                        with col2:
-                            st.markdown("**🍽️ Portion suggérée:**")
-                            if food['Caloric Value'] > 0:
-                                suggested_portion = min(200, target.calories * 0.4 / food['Caloric Value'] * 100)
-                            else:
-                                suggested_portion = 100
-                            st.text(f"📏 {suggested_portion:.0f}g recommandés")
-                            
-                            portion_cal = food['Caloric Value'] * suggested_portion / 100
-                            portion_prot = food['Protein'] * suggested_portion / 100
-                            st.text(f"🔥 {portion_cal:.0f} kcal")
-                            st.text(f"🥩 {portion_prot:.1f}g protéines")
-                            
-                            # Indicateurs
-                            if food['Protein'] > 15:
-                                st.success("💪 Riche en protéines")
-                            if food['Dietary Fiber'] > 5:
-                                st.success("🌿 Riche en fibres")
-                            if food['Caloric Value'] < 100:
-                                st.info("🔥 Faible en calories")
-                        
-                        with col3:
-                            st.markdown("**⭐ Évaluation:**")
-                            score = food.get('Nutrition Density', 5)
-                            st.progress(min(score / 10, 1.0))
-                            st.caption(f"Score nutritionnel: {score:.1f}/10")
-                            
-                            st.markdown("**🎯 Pour votre objectif:**")
-                            if profile['goal'] == 'Perte de poids':
-                                if food['Caloric Value'] < 150 and food['Protein'] > 10:
-                                    st.success("✅ EXCELLENT CHOIX")
-                                elif food['Caloric Value'] < 300:
-                                    st.warning("⚠️ BON AVEC MODÉRATION")
-                                else:
-                                    st.error("❌ À LIMITER")
-                            elif profile['goal'] == 'Prise de masse':
-                                if food['Caloric Value'] > 200 and food['Protein'] > 15:
-                                    st.success("✅ EXCELLENT CHOIX")
-                                else:
-                                    st.info("ℹ️ BON ALIMENT")
-                            else:
-                                st.success("✅ COMPATIBLE")
-                        
-                        # Actions
-                        col_a, col_b = st.columns(2)
-                        with col_a:
-                            if st.button(f"⭐ Ajouter aux favoris", key=f"fav_rec_{idx}"):
-                                if food['food'] not in st.session_state.favorite_foods:
-                                    st.session_state.favorite_foods.append(food['food'])
-                                    st.success(f"✅ {food['food']} ajouté!")
-                        with col_b:
-                            if st.button(f"🔄 Voir alternatives", key=f"alt_rec_{idx}"):
-                                alternatives = recommender.find_alternatives(food['food'], n_alternatives=3)
-                                if not alternatives.empty:
-                                    st.write("**Alternatives similaires:**")
-                                    for _, alt in alternatives.iterrows():
-                                        st.text(f"• {alt['food']}")
+        render_recommendation_search(profile, needs, recommender)
         
         # Favoris
-        if st.session_state.favorite_foods:
-            st.markdown("---")
-            st.markdown("### ⭐ Mes Aliments Favoris")
-            
-            cols = st.columns(4)
-            for idx, food_name in enumerate(st.session_state.favorite_foods):
-                with cols[idx % 4]:
-                    st.markdown(f"""
-                    <div class="food-card">
-                        <p><strong>{food_name}</strong></p>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    if st.button("🗑️ Retirer", key=f"remove_fav_{idx}"):
-                        st.session_state.favorite_foods.remove(food_name)
-                        st.rerun()
+        render_favorites()
+
 
 # PAGE: PLAN ALIMENTAIRE
 elif page == "🍽️ Plan Alimentaire":
+    with import_timer(page):
+        from modules import MealPlanGenerator, MealPlanPreferences
+    # Plan sauvegardé (ignoré s'il a été créé pour un autre catalogue)
+    ensure_session_state(
+        meal_plan=lambda: get_store().load_plan(st.session_state.user_id, catalog_size=len(food_data))
+    )
+    
     st.markdown('<h1 class="main-header">🍽️ Votre Plan Alimentaire Personnalisé</h1>', unsafe_allow_html=True)
     
     if not st.session_state.profile:
@@ -766,7 +1271,7 @@ elif page == "🍽️ Plan Alimentaire":
     else:
         st.markdown("""
         <div class="info-box">
-            📅 Générez un plan alimentaire hebdomadaire adapté à vos besoins et préférences
+            📅 Générez un plan alimentaire hebdomadaire ou un programme de plusieurs semaines adapté à vos besoins et préférences
         </div>
         """, unsafe_allow_html=True)
         
@@ -778,113 +1283,112 @@ elif page == "🍽️ Plan Alimentaire":
             with col1:
                 meals_per_day = st.slider("Nombre de repas par jour", 3, 6, 4,
                                          help="3 repas = Petit-déj, Déjeuner, Dîner | 4+ = Ajout de collations")
-                variety_days = st.slider("Variété des repas (jours)", 1, 7, 7,
+                variety_days = st.slider("Variété des repas (jours)", 1, 28, 7,
                                         help="Nombre de jours avant de répéter les mêmes repas")
+                program_weeks = st.slider("Durée du programme (semaines)", 1, 12, 1,
+                                         help="Programmes de coaching de 4 à 12 semaines")
             
             with col2:
                 budget = st.selectbox("Budget alimentaire", ["Économique", "Moyen", "Élevé"])
                 prep_time = st.selectbox("Temps de préparation", 
                                         ["Rapide (<30min)", "Moyen (30-60min)", "Élaboré (>60min)"])
+                periodization = st.selectbox("Périodisation", 
+                                            list(MealPlanGenerator.PERIODIZATION_PRESETS.keys()),
+                                            help="Ajustement des calories et glucides semaine par semaine")
+                improve_plan = st.checkbox("⚡ Optimiser le plan après génération", value=True,
+                                           help="Recherche locale (~200 ms) pour rapprocher chaque jour des cibles de macros")
             
             st.markdown("---")
             generate = st.form_submit_button("🎨 Générer mon plan alimentaire", use_container_width=True, type="primary")
             
             if generate and meal_generator:
-                with st.spinner("🍳 Création de votre plan personnalisé..."):
-                    # Préparer les préférences
-                    preferences = MealPlanPreferences(
-                        meals_per_day=meals_per_day,
-                        variety_days=variety_days,
-                        budget=budget,
-                        prep_time=prep_time,
-                        diet_type=st.session_state.profile.get('diet_type', ['Omnivore']),
-                        exclude_foods=st.session_state.profile.get('allergies', '').split(',') if st.session_state.profile.get('allergies') else []
-                    )
+                # Préparer les préférences
+                preferences = MealPlanPreferences(
+                    meals_per_day=meals_per_day,
+                    variety_days=variety_days,
+                    budget=budget,
+                    prep_time=prep_time,
+                    diet_type=st.session_state.profile.get('diet_type', ['Omnivore']),
+                    exclude_foods=st.session_state.profile.get('allergies', '').split(',') if st.session_state.profile.get('allergies') else [],
+                    horizon_days=program_weeks * 7,
+                    start_date=datetime.now().date(),
+                    periodization=MealPlanGenerator.PERIODIZATION_PRESETS[periodization],
+                    improve_ms=200 if improve_plan else 0
+                )
+                
+                # Zones mises à jour au fil de la génération
+                progress_bar = st.progress(0.0, text="🍳 Création de votre plan personnalisé...")
+                col1, col2, col3, col4 = st.columns(4)
+                metric_cal = col1.empty()
+                metric_prot = col2.empty()
+                metric_foods = col3.empty()
+                metric_variety = col4.empty()
+                days_container = st.container()
+                
+                compact_plan = meal_generator.new_compact_plan(preferences.start_date)
+                target_cal = st.session_state.nutritional_needs['target_calories']
+                
+                # Générer le plan: chaque jour est affiché dès qu'il est prêt
+                for day_date, day_plan, stats in meal_generator.stream_plan(
+                    st.session_state.nutritional_needs,
+                    preferences
+                ):
+                    day_label = meal_generator.format_day_label(day_date)
+                    day_display = meal_generator.format_day_for_display(day_plan)
+                    compact_plan.append_day(day_plan, MealPlanGenerator.MEAL_NAMES, meal_generator.macro_matrix)
                     
-                    # Générer le plan
-                    week_plan = meal_generator.generate_week_plan(
-                        st.session_state.nutritional_needs,
-                        preferences
+                    day_cal = sum(meal['calories'] for meal in day_display.values())
+                    day_prot = sum(meal['proteines'] for meal in day_display.values())
+                    days_container.markdown(
+                        f"✅ **{day_label}** — {day_cal:.0f} kcal "
+                        f"({day_cal - target_cal:+.0f}) | {day_prot:.0f}g protéines | "
+                        f"{len(day_display)} repas"
                     )
                     
-                    # Formater
-                    formatted_plan = meal_generator.format_plan_for_display(week_plan)
-                    st.session_state.meal_plan = formatted_plan
-                    
-                    # Stats
-                    stats = meal_generator.calculate_plan_stats(week_plan)
-                    
-                    st.success("✅ Votre plan alimentaire est prêt!")
-                    st.balloons()
-                    
-                    # Statistiques
-                    col1, col2, col3, col4 = st.columns(4)
-                    with col1:
-                        st.metric("Calories moy/jour", f"{stats['avg_daily_calories']:.0f}")
-                    with col2:
-                        st.metric("Protéines moy/jour", f"{stats['avg_daily_proteins']:.0f}g")
-                    with col3:
-                        st.metric("Aliments différents", stats['unique_foods_count'])
-                    with col4:
-                        st.metric("Score de variété", f"{stats['variety_score']:.0f}%")
+                    metric_cal.metric("Calories moy/jour", f"{stats['avg_daily_calories']:.0f}")
+                    metric_prot.metric("Protéines moy/jour", f"{stats['avg_daily_proteins']:.0f}g")
+                    metric_foods.metric("Aliments différents", stats['unique_foods_count'])
+                    metric_variety.metric("Score de variété", f"{stats['variety_score']:.0f}%")
+                    progress_bar.progress(
+                        stats['days_generated'] / preferences.horizon_days,
+                        text=f"🍳 Jour {stats['days_generated']}/{preferences.horizon_days} prêt"
+                    )
+                
+                if preferences.improve_ms > 0:
+                    progress_bar.progress(1.0, text="⚡ Optimisation du plan...")
+                    result = meal_generator.improve_plan(
+                        compact_plan, st.session_state.nutritional_needs, preferences
+                    )
+                    stats = compact_plan.stats()
+                    metric_cal.metric("Calories moy/jour", f"{stats['avg_daily_calories']:.0f}")
+                    metric_prot.metric("Protéines moy/jour", f"{stats['avg_daily_proteins']:.0f}g")
+                    metric_foods.metric("Aliments différents", stats['unique_foods_count'])
+                    metric_variety.metric("Score de variété", f"{stats['variety_score']:.0f}%")
+                    if result['initial_cost'] > 0:
+                        gain = (1 - result['final_cost'] / result['initial_cost']) * 100
+                        st.caption(f"⚡ Plan optimisé: écart aux cibles réduit de {gain:.0f}% "
+                                   f"({result['iterations']} ajustements testés)")
+                
+                compact_plan.trim()
+                st.session_state.meal_plan = compact_plan
+                confirm_saved(get_store().save_plan(st.session_state.user_id, compact_plan))
+                progress_bar.empty()
+                
+                st.success("✅ Votre plan alimentaire est prêt!")
+                st.balloons()
         
         # Affichage du plan
         if st.session_state.meal_plan:
             st.markdown("---")
-            st.markdown("### 📅 Votre Plan de la Semaine")
+            st.markdown("### 📅 Votre Plan Alimentaire")
+            
+            meal_plan = st.session_state.meal_plan
             
             # Sélecteur de jour
-            days = list(st.session_state.meal_plan.keys())
-            selected_day = st.selectbox("📆 Choisissez un jour", days)
+            render_plan_day(meal_plan, meal_generator, food_data)
             
-            if selected_day in st.session_state.meal_plan:
-                day_meals = st.session_state.meal_plan[selected_day]
-                
-                # Totaux du jour
-                total_cal = sum([meal.get('calories', 0) for meal in day_meals.values()])
-                total_prot = sum([meal.get('proteines', 0) for meal in day_meals.values()])
-                total_carbs = sum([meal.get('glucides', 0) for meal in day_meals.values()])
-                total_fats = sum([meal.get('lipides', 0) for meal in day_meals.values()])
-                
-                st.markdown(f"### 📊 Bilan nutritionnel - {selected_day}")
-                col1, col2, col3, col4 = st.columns(4)
-                with col1:
-                    st.metric("Total Calories", f"{total_cal:.0f} kcal")
-                with col2:
-                    st.metric("Total Protéines", f"{total_prot:.0f}g")
-                with col3:
-                    st.metric("Total Glucides", f"{total_carbs:.0f}g")
-                with col4:
-                    st.metric("Total Lipides", f"{total_fats:.0f}g")
-                
-                # Comparaison
-                target = st.session_state.nutritional_needs['target_calories']
-                diff = total_cal - target
-                if abs(diff) < 100:
-                    st.success(f"✅ Parfait! Vous êtes à {diff:+.0f} kcal de votre objectif")
-                elif abs(diff) < 200:
-                    st.warning(f"⚠️ Proche de l'objectif ({diff:+.0f} kcal de différence)")
-                else:
-                    st.error(f"❌ Écart important: {diff:+.0f} kcal")
-                
-                st.markdown("---")
-                
-                # Repas du jour
-                for meal_name, meal_data in day_meals.items():
-                    with st.expander(f"🍽️ {meal_name}", expanded=True):
-                        col1, col2 = st.columns([2, 1])
-                        
-                        with col1:
-                            st.markdown("**🥘 Composition du repas:**")
-                            for aliment in meal_data.get('aliments', []):
-                                st.markdown(f"• {aliment}")
-                        
-                        with col2:
-                            st.markdown("**📊 Valeurs nutritionnelles:**")
-                            st.markdown(f"- 🔥 {meal_data.get('calories', 0):.0f} kcal")
-                            st.markdown(f"- 🥩 {meal_data.get('proteines', 0):.0f}g protéines")
-                            st.markdown(f"- 🌾 {meal_data.get('glucides', 0):.0f}g glucides")
-                            st.markdown(f"- 🥑 {meal_data.get('lipides', 0):.0f}g lipides")
+            # Bilan complet et liste de courses
+            render_plan_week(meal_plan, food_data)
             
             # Actions
             st.markdown("---")
@@ -892,16 +1396,26 @@ elif page == "🍽️ Plan Alimentaire":
             with col1:
                 if st.button("🔄 Générer un nouveau plan", use_container_width=True):
                     st.session_state.meal_plan = None
+                    get_store().delete_plan(st.session_state.user_id)
                     st.rerun()
             with col2:
                 if st.button("📥 Exporter en PDF", use_container_width=True):
                     st.info("🚧 Fonctionnalité d'export bientôt disponible")
             with col3:
                 if st.button("💾 Sauvegarder", use_container_width=True):
-                    st.success("✅ Plan sauvegardé!")
+                    if confirm_saved(get_store().save_plan(st.session_state.user_id, meal_plan)):
+                        st.success("✅ Plan sauvegardé!")
 
 # PAGE: ASSISTANT
 elif page == "💬 Assistant":
+    with import_timer(page):
+        from modules import ChatHistory
+    ensure_session_state(
+        conversation=new_conversation,
+        # Fenêtre affichée en mémoire, messages plus anciens dans le stockage local
+        chat_history=lambda: ChatHistory(st.session_state.user_id, get_store(), window=10)
+    )
+    
     st.markdown('<h1 class="main-header">💬 Assistant Nutritionnel</h1>', unsafe_allow_html=True)
     
     st.markdown("""
@@ -913,108 +1427,16 @@ elif page == "💬 Assistant":
     if not st.session_state.profile:
         st.warning("⚠️ Configurez votre profil pour des réponses personnalisées")
     
-    st.markdown("### 💡 Questions Fréquentes (Cliquez pour poser)")
-    
-    # Quick actions
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        if st.button("🍳 Petit-déjeuner protéiné", use_container_width=True):
-            question = "Suggère-moi un petit-déjeuner protéiné adapté à mon objectif"
-            st.session_state.chat_history.append({"role": "user", "content": question})
-            st.rerun()
-    with col2:
-        if st.button("🏋️ Post-entraînement", use_container_width=True):
-            question = "Que dois-je manger après mon entraînement?"
-            st.session_state.chat_history.append({"role": "user", "content": question})
-            st.rerun()
-    with col3:
-        if st.button("💧 Hydratation", use_container_width=True):
-            question = "Combien d'eau dois-je boire par jour?"
-            st.session_state.chat_history.append({"role": "user", "content": question})
-            st.rerun()
-    
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        if st.button("🐟 Bienfaits du saumon", use_container_width=True):
-            question = "Quels sont les bienfaits du saumon pour moi?"
-            st.session_state.chat_history.append({"role": "user", "content": question})
-            st.rerun()
-    with col2:
-        if st.button("🔄 Alternatives poulet", use_container_width=True):
-            question = "Quelles sont les alternatives au poulet?"
-            st.session_state.chat_history.append({"role": "user", "content": question})
-            st.rerun()
-    with col3:
-        if st.button("⏰ Timing des repas", use_container_width=True):
-            question = "À quelle heure dois-je prendre mes repas?"
-            st.session_state.chat_history.append({"role": "user", "content": question})
-            st.rerun()
-    
-    st.markdown("---")
-    
-    # Historique du chat
-    chat_container = st.container()
-    with chat_container:
-        for msg in st.session_state.chat_history[-10:]:
-            if msg["role"] == "user":
-                st.markdown(f"""
-                <div style='background: linear-gradient(135deg, #E3F2FD 0%, #BBDEFB 100%); 
-                            padding: 1rem; border-radius: 15px; margin: 0.5rem 0; 
-                            margin-left: 20%; box-shadow: 0 2px 4px rgba(0,0,0,0.1);'>
-                    <strong>👤 Vous:</strong> {msg["content"]}
-                </div>
-                """, unsafe_allow_html=True)
-            else:
-                st.markdown(f"""
-                <div style='background: linear-gradient(135deg, #F5F5F5 0%, #E0E0E0 100%); 
-                            padding: 1rem; border-radius: 15px; margin: 0.5rem 0; 
-                            margin-right: 20%; box-shadow: 0 2px 4px rgba(0,0,0,0.1);'>
-                    <strong>🤖 Assistant:</strong><br>{msg["content"]}
-                </div>
-                """, unsafe_allow_html=True)
-    
-    # Zone de saisie
-    st.markdown("---")
-    col1, col2 = st.columns([5, 1])
-    with col1:
-        user_input = st.text_input("💬 Votre question...", 
-                                   key="chat_input", 
-                                   label_visibility="collapsed",
-                                   placeholder="Ex: Suggère-moi un repas, Quels aliments pour mon objectif?")
-    with col2:
-        send = st.button("📤 Envoyer", use_container_width=True)
-    
-    if send and user_input:
-        st.session_state.chat_history.append({"role": "user", "content": user_input})
-        
-        with st.spinner("🤖 Réflexion en cours..."):
-            if assistant and st.session_state.profile:
-                response = assistant.answer_query(user_input)
-            else:
-                response = """
-⚠️ **Configuration nécessaire**
+    render_chat(assistant)
 
-Pour recevoir des conseils personnalisés, veuillez:
-1. Configurer votre profil dans l'onglet **👤 Profil**
-2. Renseigner vos informations personnelles
-3. Enregistrer votre profil
-
-Je pourrai ensuite vous fournir des recommandations adaptées à votre objectif! 💪
-"""
-            
-            st.session_state.chat_history.append({"role": "assistant", "content": response})
-        
-        st.rerun()
-    
-    # Effacer historique
-    if st.session_state.chat_history:
-        st.markdown("---")
-        if st.button("🗑️ Effacer l'historique", use_container_width=True):
-            st.session_state.chat_history = []
-            st.rerun()
 
 # PAGE: SUIVI
 elif page == "📈 Suivi":
+    with import_timer(page):
+        import plotly.graph_objects as go
+        from modules import NutritionalCalculator, UserProfile
+    ensure_session_state(tdee_estimator=new_tdee_estimator, conversation=new_conversation)
+    
     st.markdown('<h1 class="main-header">📈 Suivi de Votre Progression</h1>', unsafe_allow_html=True)
     
     if not st.session_state.profile:
@@ -1041,13 +1463,52 @@ elif page == "📈 Suivi":
                                         placeholder="Comment vous sentez-vous? Observations...")
                 
                 if st.form_submit_button("💾 Enregistrer", use_container_width=True, type="primary"):
-                    st.session_state.weight_history.append({
-                        'date': weight_date,
-                        'weight': weight_val,
-                        'notes': notes
-                    })
-                    st.success(f"✅ Poids de {weight_val} kg enregistré pour le {weight_date}")
-                    st.balloons()
+                    # Une pesée par date (comme dans le stockage): une nouvelle mesure remplace l'ancienne
+                    intake = st.session_state.nutritional_needs['target_calories']
+                    replaced = next(
+                        (e for e in st.session_state.weight_history if e['date'] == weight_date), None
+                    )
+                    st.session_state.weight_history = sorted(
+                        [e for e in st.session_state.weight_history if e['date'] != weight_date] + [{
+                            'date': weight_date,
+                            'weight': weight_val,
+                            'notes': notes,
+                            'intake': intake
+                        }],
+                        key=lambda e: e['date']
+                    )
+                    weigh_in_saved = get_store().add_weigh_in(
+                        st.session_state.user_id, weight_date, weight_val, notes, intake
+                    )
+                    
+                    # Mise à jour O(1) de la dépense estimée (apport = calories cibles suivies):
+                    # une pesée remplacée est retirée des sommes, pas comptée deux fois
+                    profile = st.session_state.profile
+                    estimator = st.session_state.tdee_estimator
+                    if replaced is not None and replaced.get('intake') is not None:
+                        estimator.replace_weigh_in(weight_date, replaced['weight'], replaced['intake'],
+                                                   weight_val, intake)
+                    else:
+                        estimator.add_weigh_in(weight_date, weight_val, intake)
+                    st.session_state.nutritional_needs = NutritionalCalculator.calculate_complete_needs(
+                        UserProfile(
+                            weight=profile['weight'],
+                            height=profile['height'],
+                            age=profile['age'],
+                            sex=profile['sex'],
+                            activity_level=profile['activity_level'],
+                            goal=profile['goal'],
+                            target_weight=profile['target_weight']
+                        ),
+                        st.session_state.tdee_estimator
+                    )
+                    st.session_state.conversation.nutritional_needs = st.session_state.nutritional_needs
+                    if confirm_saved(
+                        weigh_in_saved,
+                        get_store().save_profile(st.session_state.user_id, profile, st.session_state.nutritional_needs)
+                    ):
+                        st.success(f"✅ Poids de {weight_val} kg enregistré pour le {weight_date}")
+                        st.balloons()
         
         with col2:
             if st.session_state.weight_history:
@@ -1068,6 +1529,15 @@ elif page == "📈 Suivi":
                 
                 remaining = abs(target - latest)
                 st.metric("Reste à atteindre", f"{remaining:.1f} kg")
+                
+                estimator = st.session_state.tdee_estimator
+                confidence = estimator.confidence()
+                if confidence > 0:
+                    st.metric("⚡ Dépense estimée (adaptative)",
+                             f"{st.session_state.nutritional_needs['tdee']:.0f} kcal",
+                             help="Calculée à partir de l'évolution de votre poids et de vos calories cibles")
+                    st.caption(f"Confiance de la mesure: **{confidence:.0%}** "
+                               f"({estimator.n} pesées sur {estimator.span_days:.0f} jours)")
             else:
                 st.info("📊 Aucun enregistrement.\nCommencez à suivre votre progression!")
         
@@ -1139,151 +1609,7 @@ elif page == "📚 Base Aliments":
     
     st.markdown(f"### 🔍 Explorez {len(food_data)} aliments avec données nutritionnelles complètes")
     
-    # Filtres
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        search = st.text_input("🔎 Rechercher", placeholder="Nom d'aliment...")
-    with col2:
-        sort_by = st.selectbox("Trier par", 
-                               ["Nutrition Density", "Caloric Value", "Protein", 
-                                "Carbohydrates", "Fat", "Dietary Fiber"])
-    with col3:
-        min_protein = st.slider("Protéines min (g)", 0, 50, 0)
-    with col4:
-        max_calories = st.slider("Calories max", 0, 1000, 1000)
-    
-    # Filtrage
-    filtered = food_data.copy()
-    
-    if search:
-        filtered = filtered[filtered['food'].str.contains(search, case=False, na=False)]
-    
-    filtered = filtered[
-        (filtered['Protein'] >= min_protein) &
-        (filtered['Caloric Value'] <= max_calories)
-    ]
-    
-    filtered = filtered.sort_values(sort_by, ascending=False)
-    
-    st.markdown(f"### 📊 {len(filtered)} aliments trouvés")
-    
-    # Statistiques globales
-    if not filtered.empty:
-        col1, col2, col3, col4 = st.columns(4)
-        with col1:
-            st.metric("Calories moyenne", f"{filtered['Caloric Value'].mean():.0f} kcal")
-        with col2:
-            st.metric("Protéines moyenne", f"{filtered['Protein'].mean():.1f}g")
-        with col3:
-            st.metric("Glucides moyenne", f"{filtered['Carbohydrates'].mean():.1f}g")
-        with col4:
-            st.metric("Lipides moyenne", f"{filtered['Fat'].mean():.1f}g")
-    
-    st.markdown("---")
-    
-    # Affichage paginé
-    items_per_page = 10
-    total_pages = max(1, (len(filtered) - 1) // items_per_page + 1)
-    
-    if total_pages > 0:
-        page_num = st.number_input("Page", 1, total_pages, 1, label_visibility="collapsed")
-        st.caption(f"Page {page_num} sur {total_pages}")
-        
-        start_idx = (page_num - 1) * items_per_page
-        end_idx = min(start_idx + items_per_page, len(filtered))
-        
-        page_data = filtered.iloc[start_idx:end_idx]
-        
-        for idx, (_, row) in enumerate(page_data.iterrows()):
-            with st.expander(f"🍽️ {row['food']} - {row['Caloric Value']:.0f} kcal/100g", expanded=False):
-                col1, col2, col3 = st.columns(3)
-                
-                with col1:
-                    st.markdown("#### 📊 Macronutriments")
-                    st.markdown(f"""
-                    - 🔥 **Calories:** {row['Caloric Value']:.0f} kcal
-                    - 🥩 **Protéines:** {row['Protein']:.1f}g
-                    - 🌾 **Glucides:** {row['Carbohydrates']:.1f}g
-                    - 🥑 **Lipides:** {row['Fat']:.1f}g
-                    - 🌿 **Fibres:** {row['Dietary Fiber']:.1f}g
-                    - 🍬 **Sucres:** {row['Sugars']:.1f}g
-                    """)
-                
-                with col2:
-                    st.markdown("#### 💊 Vitamines")
-                    st.markdown(f"""
-                    - 🅰️ **Vitamine A:** {row['Vitamin A']:.1f}µg
-                    - 🅱️ **Vitamine B12:** {row['Vitamin B12']:.2f}µg
-                    - 🍊 **Vitamine C:** {row['Vitamin C']:.1f}mg
-                    - ☀️ **Vitamine D:** {row['Vitamin D']:.1f}µg
-                    """)
-                    
-                    st.markdown("#### ⚗️ Minéraux")
-                    st.markdown(f"""
-                    - 🦴 **Calcium:** {row['Calcium']:.0f}mg
-                    - 🩸 **Fer:** {row['Iron']:.1f}mg
-                    - 💪 **Magnésium:** {row['Magnesium']:.0f}mg
-                    """)
-                
-                with col3:
-                    st.markdown("#### 🧂 Autres")
-                    st.markdown(f"""
-                    - 🧂 **Sodium:** {row['Sodium']:.0f}mg
-                    - 💧 **Eau:** {row['Water']:.0f}%
-                    - ⚡ **Potassium:** {row['Potassium']:.0f}mg
-                    """)
-                    
-                    # Score nutritionnel
-                    st.markdown("#### ⭐ Score Nutritionnel")
-                    if pd.notna(row['Nutrition Density']):
-                        density_score = float(row['Nutrition Density'])
-                        progress_value = min(max(density_score / 10, 0.0), 1.0)
-                        st.progress(progress_value)
-                        st.caption(f"**{density_score:.1f}/10**")
-                    
-                    # Tags nutritionnels
-                    st.markdown("#### 🏷️ Caractéristiques")
-                    tags = []
-                    if row['Protein'] > 20:
-                        tags.append("💪 Très riche en protéines")
-                    elif row['Protein'] > 10:
-                        tags.append("🥩 Riche en protéines")
-                    
-                    if row['Dietary Fiber'] > 5:
-                        tags.append("🌿 Riche en fibres")
-                    
-                    if row['Caloric Value'] < 100:
-                        tags.append("🔥 Faible en calories")
-                    elif row['Caloric Value'] > 400:
-                        tags.append("⚡ Haute densité calorique")
-                    
-                    if row['Vitamin C'] > 50:
-                        tags.append("🍊 Riche en vitamine C")
-                    
-                    for tag in tags:
-                        st.success(tag)
-                
-                # Actions
-                col_a, col_b, col_c = st.columns(3)
-                with col_a:
-                    if st.button(f"⭐ Favoris", key=f"fav_db_{start_idx + idx}"):
-                        if row['food'] not in st.session_state.favorite_foods:
-                            st.session_state.favorite_foods.append(row['food'])
-                            st.success(f"✅ {row['food']} ajouté aux favoris!")
-                
-                with col_b:
-                    if st.button(f"🔄 Alternatives", key=f"alt_db_{start_idx + idx}"):
-                        if recommender:
-                            alternatives = recommender.find_alternatives(row['food'], n_alternatives=3)
-                            if not alternatives.empty:
-                                st.write("**Alternatives similaires:**")
-                                for _, alt in alternatives.iterrows():
-                                    st.text(f"• {alt['food']}")
-                
-                with col_c:
-                    if st.button(f"➕ Ajouter au plan", key=f"add_db_{start_idx + idx}"):
-                        st.info(f"📝 {row['food']} sera ajouté lors de la prochaine génération de plan")
+    render_food_browser(food_data)
 
 # Footer
 st.markdown("---")
@@ -1305,4 +1631,11 @@ st.markdown("""
         📊 Calculateur Nutritionnel | 🎯 Recommandeur ML | 🍽️ Planificateur | 💬 Assistant NLP
     </p>
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+# Rapport des imports (premiers chargements de ce processus)
+report = import_report()
+if report:
+    with st.sidebar.expander("⏱️ Temps d'import"):
+        for entry in report:
+            st.caption(f"{entry['label']}: {entry['seconds'] * 1000:.0f} ms ({entry['modules']} modules)")
@@ -0,0 +1,224 @@
+"""
+FitLife Nutrition AI - Test de charge du serveur d'API
+Envoie des requêtes concurrentes (connexions persistantes) et rapporte le
+débit (requêtes/s) et les percentiles de latence p50/p95/p99 par point d'entrée
+
+Usage:
+    python load_test.py --spawn --workers 4 --threads 8 --concurrency 32 --duration 15
+    python load_test.py --port 8000 --endpoint chat --requests 2000
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+PROFILE = {
+    'weight': 78, 'height': 178, 'age': 31, 'sex': 'Homme',
+    'activity_level': 'Modérément actif', 'goal': 'Perte de poids', 'target_weight': 72
+}
+
+# Requêtes représentatives de chaque point d'entrée (parcourues en boucle)
+SCENARIOS = {
+    'needs': [{'profile': {**PROFILE, 'weight': w}} for w in (60, 70, 78, 90)],
+    'recommendations': [
+        {'profile': PROFILE, 'n': 10},
+        {'profile': {**PROFILE, 'goal': 'Prise de masse'}, 'n': 6, 'min_protein': 15}
+    ],
+    'alternatives': [{'food': food, 'n': 5} for food in ('salmon', 'chicken', 'rice', 'broccoli')],
+    'plan': [{'profile': PROFILE, 'preferences': {'days': 7}}],
+    'chat': [
+        {'query': query, 'profile': PROFILE}
+        for query in ("Combien d'eau dois-je boire par jour?",
+                      "Que dois-je manger après mon entraînement?",
+                      "Quels sont les bienfaits du saumon pour moi?",
+                      "Suggère-moi un petit-déjeuner protéiné")
+    ]
+}
+
+# Mélange par défaut: trafic d'application mobile (peu de générations de plan)
+MIX_WEIGHTS = {'needs': 3, 'recommendations': 3, 'alternatives': 2, 'chat': 4, 'plan': 0}
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Percentile par rang le plus proche (valeurs déjà triées)"""
+    if not sorted_values:
+        return float('nan')
+    rank = max(0, min(len(sorted_values) - 1, int(round(q / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def request_plan(endpoints: List[str]):
+    """Suite infinie (point d'entrée, corps) selon les poids du mélange"""
+    weighted = [name for name in endpoints for _ in range(max(MIX_WEIGHTS.get(name, 1), 1))]
+    bodies = {name: itertools.cycle(SCENARIOS[name]) for name in endpoints}
+    for name in itertools.cycle(weighted):
+        yield name, json.dumps(next(bodies[name])).encode('utf-8')
+
+
+class LoadTest:
+    """Clients concurrents: chacun garde sa connexion et enchaîne les requêtes"""
+
+    def __init__(self, host: str, port: int, endpoints: List[str], concurrency: int,
+                 total_requests: Optional[int], duration: Optional[float], timeout: float):
+        self.host = host
+        self.port = port
+        self.concurrency = concurrency
+        self.total_requests = total_requests
+        self.duration = duration
+        self.timeout = timeout
+        self._plan = request_plan(endpoints)
+        self._lock = threading.Lock()
+        self._sent = 0
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.status_counts: Dict[int, int] = defaultdict(int)
+
+    def _next_request(self, deadline: Optional[float]):
+        with self._lock:
+            if self.total_requests is not None and self._sent >= self.total_requests:
+                return None
+            if deadline is not None and time.perf_counter() >= deadline:
+                return None
+            self._sent += 1
+            return next(self._plan)
+
+    def _client(self, deadline: Optional[float]):
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        headers = {'Content-Type': 'application/json'}
+        while True:
+            item = self._next_request(deadline)
+            if item is None:
+                break
+            name, body = item
+            start = time.perf_counter()
+            try:
+                conn.request('POST', f'/{name}', body, headers)
+                response = conn.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                status = 0
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.status_counts[status] += 1
+                if status == 200:
+                    self.latencies[name].append(elapsed)
+                else:
+                    self.errors[name] += 1
+        conn.close()
+
+    def run(self) -> float:
+        """Lance les clients et retourne la durée totale (secondes)"""
+        start = time.perf_counter()
+        deadline = start + self.duration if self.duration else None
+        threads = [threading.Thread(target=self._client, args=(deadline,)) for _ in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - start
+
+    def report(self, elapsed: float) -> Dict:
+        rows = {}
+        for name in sorted(set(self.latencies) | set(self.errors)):
+            values = sorted(self.latencies[name])
+            rows[name] = {
+                'ok': len(values),
+                'errors': self.errors[name],
+                'p50_ms': percentile(values, 50) * 1000,
+                'p95_ms': percentile(values, 95) * 1000,
+                'p99_ms': percentile(values, 99) * 1000
+            }
+        all_values = sorted(v for values in self.latencies.values() for v in values)
+        n_ok = len(all_values)
+        n_errors = sum(self.errors.values())
+        rows['total'] = {
+            'ok': n_ok,
+            'errors': n_errors,
+            'p50_ms': percentile(all_values, 50) * 1000,
+            'p95_ms': percentile(all_values, 95) * 1000,
+            'p99_ms': percentile(all_values, 99) * 1000
+        }
+        return {'elapsed_s': elapsed, 'rps': n_ok / elapsed if elapsed else 0.0,
+                'status_counts': dict(self.status_counts), 'endpoints': rows}
+
+
+def print_report(report: Dict):
+    print(f"\nDurée: {report['elapsed_s']:.1f}s  |  Débit: {report['rps']:,.0f} requêtes/s  |  "
+          f"Statuts: {report['status_counts']}")
+    print(f"{'Point d’entrée':18} {'OK':>8} {'Erreurs':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, row in report['endpoints'].items():
+        print(f"{name:18} {row['ok']:>8} {row['errors']:>8} "
+              f"{row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f}")
+
+
+def wait_until_ready(host: str, port: int, timeout: float = 120.0):
+    """Attend que /health réponde (chargement des modèles au démarrage)"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=2)
+            conn.request('GET', '/health')
+            response = conn.getresponse()
+            response.read()
+            conn.close()
+            if response.status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Serveur indisponible sur {host}:{port} après {timeout:.0f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Test de charge du serveur d'API FitLife")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--endpoint', default='mix', choices=['mix', *SCENARIOS],
+                        help="Point d'entrée testé (mix = trafic mélangé)")
+    parser.add_argument('--concurrency', type=int, default=16, help="Clients simultanés")
+    parser.add_argument('--requests', type=int, default=None, help="Nombre total de requêtes")
+    parser.add_argument('--duration', type=float, default=10.0, help="Durée (s) si --requests absent")
+    parser.add_argument('--timeout', type=float, default=30.0, help="Délai client par requête (s)")
+    parser.add_argument('--spawn', action='store_true', help="Lance un serveur local pour le test")
+    parser.add_argument('--workers', type=int, default=1, help="Processus du serveur lancé (--spawn)")
+    parser.add_argument('--threads', type=int, default=8, help="Threads du serveur lancé (--spawn)")
+    parser.add_argument('--json', action='store_true', help="Rapport au format JSON")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.spawn:
+        server = subprocess.Popen([
+            sys.executable, 'api_server.py', '--host', args.host, '--port', str(args.port),
+            '--workers', str(args.workers), '--threads', str(args.threads)
+        ])
+    try:
+        wait_until_ready(args.host, args.port)
+        endpoints = [name for name, weight in MIX_WEIGHTS.items() if weight] if args.endpoint == 'mix' \
+            else [args.endpoint]
+        test = LoadTest(args.host, args.port, endpoints, args.concurrency,
+                        args.requests, None if args.requests else args.duration, args.timeout)
+        print(f"Test: {', '.join(endpoints)} | {args.concurrency} clients | "
+              + (f"{args.requests} requêtes" if args.requests else f"{args.duration:g}s"))
+        report = test.report(test.run())
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print_report(report)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,44 @@
 """
 Package modules pour FitLife Nutrition AI
 Tous les modules IA développés localement
+Les sous-modules sont importés au premier accès à leurs classes (PEP 562):
+`import modules` ne charge ni pandas ni scikit-learn
 """
 
-from .nutrition_calculator import NutritionalCalculator, UserProfile
-from .food_recommender import FoodRecommendationEngine, NutritionalTarget
-from .meal_plan_generator import MealPlanGenerator, MealPlanPreferences
-from .nutrition_assistant import NutritionAssistant, ConversationContext
+import importlib
 
 __version__ = '1.0.0'
 __author__ = 'Asma Bélkahla & Monia Selleoui'
 
-__all__ = [
-    'NutritionalCalculator',
-    'UserProfile',
-    'FoodRecommendationEngine',
-    'NutritionalTarget',
-    'MealPlanGenerator',
-    'MealPlanPreferences',
-    'NutritionAssistant',
-    'ConversationContext'
-]
\ No newline at end of file
+# Classe publique -> sous-module qui la définit
+_EXPORTS = {
+    'NutritionalCalculator': 'nutrition_calculator',
+    'UserProfile': 'nutrition_calculator',
+    'AdaptiveTDEEEstimator': 'nutrition_calculator',
+    'FoodRecommendationEngine': 'food_recommender',
+    'NutritionalTarget': 'food_recommender',
+    'MealPlanGenerator': 'meal_plan_generator',
+    'MealPlanPreferences': 'meal_plan_generator',
+    'NutritionAssistant': 'nutrition_assistant',
+    'ConversationContext': 'nutrition_assistant',
+    'PlanRollup': 'plan_rollup',
+    'GoalSimulator': 'goal_simulator',
+    'ChatHistory': 'chat_history',
+    'FoodQueryIndex': 'food_catalog',
+    'LocalStore': 'storage'
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    submodule = _EXPORTS.get(name)
+    if submodule is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{submodule}', __name__), name)
+    globals()[name] = value  # Accès suivants sans passer par __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
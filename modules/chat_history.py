@@ -0,0 +1,128 @@
+"""
+Module utilitaire: Historique de conversation borné et persistant
+Fenêtre visible en mémoire (tampon circulaire), messages plus anciens dans
+le stockage local (modules/storage.py)
+Auteurs: Asma Bélkahla & Monia Selleoui
+"""
+
+import threading
+from collections import deque
+from typing import Dict, List, Union
+
+try:
+    from .storage import DEFAULT_DB_PATH, LocalStore
+except ImportError:
+    from storage import DEFAULT_DB_PATH, LocalStore
+
+
+class ChatHistory:
+    """
+    Historique d'un utilisateur: ajout en O(1), mémoire constante par session
+    Chaque message est écrit dans le stockage local (écritures regroupées);
+    seuls les `window` derniers restent en mémoire pour l'affichage, le reste
+    se lit par pages
+    Messages au format de l'application: {'role': ..., 'content': ...}
+    store: LocalStore partagé entre les sessions, ou chemin d'une base SQLite
+    """
+
+    def __init__(self, user_id: str, store: Union[LocalStore, str] = DEFAULT_DB_PATH, window: int = 10):
+        self.user_id = user_id
+        self.window = window
+        self._owns_store = not isinstance(store, LocalStore)
+        self.store = LocalStore(store) if self._owns_store else store
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """Recharge la fenêtre visible et le nombre total de messages (requêtes indexées)"""
+        self._recent.extend(self.store.messages(self.user_id, self.window))
+        self._count = self.store.count_messages(self.user_id)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, role: str, content: str):
+        """Ajoute un message (écrit sur disque par le thread d'écriture du stockage)"""
+        with self._lock:
+            self.store.append_message(self.user_id, role, content)
+            self._recent.append({'role': role, 'content': content})
+            self._count += 1
+
+    def recent(self) -> List[Dict[str, str]]:
+        """Derniers messages (fenêtre affichée), du plus ancien au plus récent"""
+        return list(self._recent)
+
+    def n_pages(self, page_size: int = 20) -> int:
+        """Nombre de pages de l'historique complet"""
+        return -(-self._count // page_size)
+
+    def page(self, number: int, page_size: int = 20) -> List[Dict[str, str]]:
+        """
+        Page de l'historique complet (0 = messages les plus récents),
+        messages du plus ancien au plus récent dans la page
+        """
+        return self.store.messages(self.user_id, page_size, number * page_size)
+
+    def clear(self):
+        """Efface l'historique de l'utilisateur (mémoire et disque)"""
+        with self._lock:
+            self.store.clear_messages(self.user_id)
+            self._recent.clear()
+            self._count = 0
+
+    def close(self):
+        """Ferme le stockage s'il a été ouvert par cet historique"""
+        if self._owns_store:
+            self.store.close()
+
+
+# ===== TESTS =====
+def test_chat_history():
+    """Tests de l'historique de conversation"""
+    print("=== TESTS DE L'HISTORIQUE DE CONVERSATION ===\n")
+
+    import os
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'chat.sqlite3')
+        history = ChatHistory('alice', path, window=10)
+        shared = LocalStore(path)  # Stockage partagé, comme dans l'application
+        other = ChatHistory('bob', shared, window=10)
+
+        # Test 1: Fenêtre bornée en mémoire, tout est sur disque
+        for i in range(1000):
+            history.append('user' if i % 2 == 0 else 'assistant', f"message {i}")
+        other.append('user', "bonjour")
+        print(f"Messages: {len(history)}, en mémoire: {len(history.recent())}")
+        assert len(history) == 1000 and len(history.recent()) == 10
+        assert history.recent()[-1] == {'role': 'assistant', 'content': 'message 999'}
+        assert len(other) == 1, "Historiques séparés par utilisateur"
+
+        # Test 2: Pages
+        print(f"Pages de 20: {history.n_pages()}")
+        assert history.n_pages() == 50
+        assert [m['content'] for m in history.page(0)][-1] == 'message 999'
+        assert [m['content'] for m in history.page(49)][0] == 'message 0'
+        assert history.page(50) == []
+
+        # Test 3: Reprise de session
+        history.close()
+        reloaded = ChatHistory('alice', path, window=10)
+        assert len(reloaded) == 1000
+        assert reloaded.recent()[0]['content'] == 'message 990', "Fenêtre rechargée depuis le disque"
+
+        reloaded.clear()
+        assert len(reloaded) == 0 and not reloaded.recent()
+        assert len(other) == 1
+        reloaded.close()
+        other.close()
+        shared.close()
+    print()
+
+    print("✅ Tous les tests passés!\n")
+
+
+if __name__ == "__main__":
+    test_chat_history()
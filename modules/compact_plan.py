@@ -0,0 +1,287 @@
+"""
+Module utilitaire: Représentation compacte des plans alimentaires
+Tableau structuré NumPy (jour, repas, slot, aliment, grammes + macros)
+Auteurs: Asma Bélkahla & Monia Selleoui
+"""
+
+import struct
+import numpy as np
+from datetime import date, timedelta
+from typing import Dict, Sequence
+
+# Une ligne = un aliment servi dans un slot d'un repas (28 octets)
+PLAN_DTYPE = np.dtype([
+    ('day', '<u2'),
+    ('meal', 'u1'),
+    ('slot', 'u1'),
+    ('food_id', '<i4'),
+    ('grams', '<f4'),
+    ('calories', '<f4'),
+    ('proteins', '<f4'),
+    ('carbs', '<f4'),
+    ('fats', '<f4')
+])
+
+MACRO_FIELDS = ['calories', 'proteins', 'carbs', 'fats']
+
+# En-tête binaire: magic, version, date de début (ordinal), nb jours, nb lignes, taille catalogue
+_HEADER = struct.Struct('<4sBIHII')
+_MAGIC = b'FLMP'
+_VERSION = 1
+
+
+class CompactMealPlan:
+    """
+    Plan alimentaire stocké comme un tableau structuré trié par jour
+    Les vues par jour sont des tranches du tableau (sans copie)
+    """
+
+    __slots__ = ('start_date', 'catalog_size', '_buf', '_n_rows', '_n_days')
+
+    def __init__(self, start_date: date, catalog_size: int, capacity: int = 64):
+        self.start_date = start_date
+        self.catalog_size = catalog_size
+        self._buf = np.zeros(capacity, dtype=PLAN_DTYPE)
+        self._n_rows = 0
+        self._n_days = 0
+
+    # ----- Construction -----
+
+    def _reserve(self, extra: int):
+        """Agrandit le tampon (doublement) si nécessaire"""
+        needed = self._n_rows + extra
+        if needed <= len(self._buf) and self._buf.flags.writeable:
+            return
+        new_buf = np.zeros(max(needed, 2 * len(self._buf), 16), dtype=PLAN_DTYPE)
+        new_buf[:self._n_rows] = self._buf[:self._n_rows]
+        self._buf = new_buf
+
+    def append_day(
+        self,
+        day_meals: Dict[str, Dict],
+        meal_names: Sequence[str],
+        macro_matrix: np.ndarray
+    ) -> int:
+        """
+        Ajoute une journée produite par MealPlanGenerator
+        macro_matrix: (n_aliments, 4) calories/protéines/glucides/lipides pour 100g
+        Retourne l'indice du jour ajouté
+        """
+        day = self._n_days
+        rows = []
+        for meal_name, meal in day_meals.items():
+            meal_idx = meal_names.index(meal_name)
+            # Slots du template si fournis (un slot sans aliment est sauté), sinon rang de l'aliment
+            slots = meal.get('slots') or range(len(meal['food_ids']))
+            for slot, food_id, grams in zip(slots, meal['food_ids'], meal['portions']):
+                rows.append((day, meal_idx, slot, food_id, grams))
+
+        self._reserve(len(rows))
+        if rows:
+            new = self._buf[self._n_rows:self._n_rows + len(rows)]
+            new['day'], new['meal'], new['slot'], new['food_id'], new['grams'] = zip(*rows)
+
+            macros = macro_matrix[new['food_id']] * (new['grams'][:, None] / 100)
+            for i, field_name in enumerate(MACRO_FIELDS):
+                new[field_name] = macros[:, i]
+
+        self._n_rows += len(rows)
+        self._n_days += 1
+        return day
+
+    def update_rows(
+        self,
+        food_ids: np.ndarray,
+        grams: np.ndarray,
+        macro_matrix: np.ndarray
+    ):
+        """
+        Remplace aliments et portions de toutes les lignes (même ordre)
+        et recalcule les colonnes de macros
+        """
+        self._reserve(0)
+        rec = self.records
+        rec['food_id'] = food_ids
+        rec['grams'] = grams
+
+        macros = macro_matrix[rec['food_id']] * (rec['grams'][:, None] / 100)
+        for i, field_name in enumerate(MACRO_FIELDS):
+            rec[field_name] = macros[:, i]
+
+    def trim(self):
+        """Libère la capacité inutilisée une fois le plan terminé"""
+        if len(self._buf) > self._n_rows and self._buf.flags.writeable:
+            self._buf = self._buf[:self._n_rows].copy()
+
+    # ----- Vues -----
+
+    @property
+    def records(self) -> np.ndarray:
+        """Toutes les lignes du plan (vue)"""
+        return self._buf[:self._n_rows]
+
+    @property
+    def n_days(self) -> int:
+        return self._n_days
+
+    @property
+    def nbytes(self) -> int:
+        """Mémoire occupée par les lignes du plan"""
+        return self.records.nbytes
+
+    def day_date(self, day: int) -> date:
+        return self.start_date + timedelta(days=day)
+
+    def day_slice(self, day: int) -> np.ndarray:
+        """Lignes d'une journée (vue, sans copie)"""
+        days = self.records['day']
+        start, end = np.searchsorted(days, [day, day + 1])
+        return self.records[start:end]
+
+    def daily_totals(self) -> np.ndarray:
+        """Totaux (n_jours, 4) calories/protéines/glucides/lipides"""
+        rec = self.records
+        return np.stack([
+            np.bincount(rec['day'], weights=rec[f], minlength=self._n_days)
+            for f in MACRO_FIELDS
+        ], axis=1)
+
+    def stats(self) -> Dict:
+        """Statistiques du plan (mêmes clés que MealPlanGenerator.calculate_plan_stats)"""
+        num_days = max(self._n_days, 1)
+        totals = self.daily_totals().sum(axis=0) if self._n_days else np.zeros(4)
+        unique_foods = len(np.unique(self.records['food_id']))
+
+        return {
+            'days_generated': self._n_days,
+            'avg_daily_calories': totals[0] / num_days,
+            'avg_daily_proteins': totals[1] / num_days,
+            'avg_daily_carbs': totals[2] / num_days,
+            'avg_daily_fats': totals[3] / num_days,
+            'unique_foods_count': unique_foods,
+            'variety_score': unique_foods / (num_days * 4) * 100
+        }
+
+    def day_for_display(
+        self,
+        day: int,
+        food_names: Sequence[str],
+        meal_names: Sequence[str]
+    ) -> Dict[str, Dict]:
+        """
+        Reconstruit l'affichage d'une seule journée
+        (même format que MealPlanGenerator.format_day_for_display)
+        """
+        rows = self.day_slice(day)
+        display = {}
+
+        for meal_idx in np.unique(rows['meal']):
+            meal_rows = rows[rows['meal'] == meal_idx]
+            display[meal_names[meal_idx]] = {
+                'aliments': [
+                    f"{food_names[food_id]} ({grams:.0f}g)"
+                    for food_id, grams in zip(meal_rows['food_id'], meal_rows['grams'])
+                ],
+                'calories': int(meal_rows['calories'].sum()),
+                'proteines': int(meal_rows['proteins'].sum()),
+                'glucides': int(meal_rows['carbs'].sum()),
+                'lipides': int(meal_rows['fats'].sum())
+            }
+
+        return display
+
+    # ----- Sérialisation -----
+
+    def to_bytes(self) -> bytes:
+        """Sérialisation binaire (en-tête + lignes brutes)"""
+        header = _HEADER.pack(
+            _MAGIC, _VERSION, self.start_date.toordinal(),
+            self._n_days, self._n_rows, self.catalog_size
+        )
+        return header + self.records.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes, catalog_size: int = None) -> 'CompactMealPlan':
+        """
+        Désérialise un plan; les lignes pointent directement dans `data`
+        (lecture seule, copiées seulement si on ajoute des jours)
+        """
+        magic, version, start_ordinal, n_days, n_rows, stored_catalog = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("Format de plan inconnu")
+        if catalog_size is not None and catalog_size != stored_catalog:
+            raise ValueError(
+                f"Plan créé pour un catalogue de {stored_catalog} aliments "
+                f"(catalogue actuel: {catalog_size})"
+            )
+
+        plan = cls.__new__(cls)
+        plan.start_date = date.fromordinal(start_ordinal)
+        plan.catalog_size = stored_catalog
+        plan._buf = np.frombuffer(data, dtype=PLAN_DTYPE, count=n_rows, offset=_HEADER.size)
+        plan._n_rows = n_rows
+        plan._n_days = n_days
+        return plan
+
+
+# ===== TESTS =====
+def test_compact_plan():
+    """Tests du plan compact"""
+    print("=== TESTS DU PLAN COMPACT ===\n")
+
+    meal_names = ['Petit-déjeuner', 'Déjeuner', 'Dîner']
+    food_names = ['Poulet grillé', 'Riz complet', 'Brocoli', 'Saumon']
+    macro_matrix = np.array([
+        [165, 31, 0, 3.6],
+        [370, 7.9, 77, 2.9],
+        [34, 2.8, 6.6, 0.4],
+        [208, 20, 0, 13]
+    ], dtype=np.float32)
+
+    day1 = {
+        'Petit-déjeuner': {'food_ids': [1], 'portions': [50.0]},
+        'Déjeuner': {'food_ids': [0, 2], 'portions': [150.0, 200.0]}
+    }
+    day2 = {
+        'Déjeuner': {'food_ids': [3], 'portions': [120.0]},
+        'Dîner': {'food_ids': [0, 1], 'portions': [100.0, 80.0]}
+    }
+
+    plan = CompactMealPlan(date(2024, 1, 1), catalog_size=len(food_names))
+    plan.append_day(day1, meal_names, macro_matrix)
+    plan.append_day(day2, meal_names, macro_matrix)
+
+    # Test 1: Vues et totaux
+    print("Test 1: Vues par jour et totaux")
+    view = plan.day_slice(1)
+    assert view.base is not None, "La vue doit partager la mémoire"
+    assert len(view) == 3, "Nombre de lignes du jour 2 incorrect"
+
+    totals = plan.daily_totals()
+    expected_day1 = 370 * 0.5 + 165 * 1.5 + 34 * 2
+    print(f"Jour 1: {totals[0, 0]:.0f} kcal (attendu {expected_day1:.0f})")
+    assert abs(totals[0, 0] - expected_day1) < 0.5, "Total calorique incorrect"
+
+    display = plan.day_for_display(1, food_names, meal_names)
+    print(f"Affichage jour 2: {display['Dîner']['aliments']}")
+    assert display['Dîner']['aliments'] == ['Poulet grillé (100g)', 'Riz complet (80g)']
+    print()
+
+    # Test 2: Sérialisation
+    print("Test 2: Sérialisation binaire")
+    data = plan.to_bytes()
+    restored = CompactMealPlan.from_bytes(data, catalog_size=len(food_names))
+    print(f"Taille sérialisée: {len(data)} octets pour {len(plan.records)} lignes")
+    assert restored.n_days == 2 and restored.start_date == date(2024, 1, 1)
+    assert np.array_equal(restored.records, plan.records), "Lignes différentes après relecture"
+
+    # Ajout après relecture (copie du tampon en lecture seule)
+    restored.append_day(day1, meal_names, macro_matrix)
+    assert restored.n_days == 3 and restored.stats()['unique_foods_count'] == 4
+    print()
+
+    print("✅ Tous les tests passés!\n")
+
+
+if __name__ == "__main__":
+    test_compact_plan()
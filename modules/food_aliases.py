@@ -0,0 +1,186 @@
+"""
+Module utilitaire: Dictionnaire d'alias français/anglais des aliments
+Index de hachage (alias normalisé -> ligne du catalogue) construit au démarrage
+Auteurs: Asma Bélkahla & Monia Selleoui
+"""
+
+import os
+import re
+import unicodedata
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from .food_matcher import FoodMention
+except ImportError:
+    from food_matcher import FoodMention
+
+
+DEFAULT_ALIAS_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'nutrition', 'food_aliases.csv'
+)
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+_LIGATURES = str.maketrans({'œ': 'oe', 'æ': 'ae', 'ß': 'ss'})
+
+
+def _strip_accents(text: str) -> str:
+    return ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+
+
+def normalize_token(token: str) -> str:
+    """
+    Forme canonique d'un mot: minuscules, ligatures, singulier, sans accents
+    sauf un é final, qui distingue des mots courants (pâté/pâtes, thé/the)
+    """
+    token = unicodedata.normalize('NFC', token.lower()).translate(_LIGATURES)
+    # Pluriels réguliers (œufs, choux, tomatoes -> tomatoe: même forme des deux côtés)
+    if len(token) > 3 and token[-1] in 'sx' and not token.endswith('ss'):
+        token = token[:-1]
+    if token.endswith('é'):
+        return _strip_accents(token[:-1]) + 'é'
+    return _strip_accents(token)
+
+
+def tokenize(text: str) -> List[Tuple[str, int, int]]:
+    """Mots normalisés avec leurs positions dans le texte d'origine"""
+    return [(normalize_token(m.group()), m.start(), m.end()) for m in _TOKEN_RE.finditer(text)]
+
+
+def normalize_text(text: str) -> str:
+    """Clé d'index d'une expression (mots normalisés séparés par un espace)"""
+    return ' '.join(token for token, _, _ in tokenize(text))
+
+
+class FoodAliasIndex:
+    """
+    Résolution des alias en O(1) par mot: table de hachage sur les expressions
+    normalisées, recherche des n-grammes les plus longs d'abord
+    Alias de plusieurs mots aussi retrouvés sans l'accent du é final (steak hache),
+    jamais un mot seul (the, cafe: trop ambigus)
+    """
+
+    def __init__(self, aliases: Optional[Dict[str, int]] = None):
+        self._index: Dict[str, int] = {}
+        self._unaccented: Dict[str, int] = {}
+        self.max_words = 0
+        self.unresolved: List[str] = []
+        for alias, food_id in (aliases or {}).items():
+            self.add(alias, food_id)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def add(self, alias: str, food_id: int):
+        """Ajoute un alias (le premier enregistré pour une clé est conservé)"""
+        key = normalize_text(alias)
+        if key:
+            self._index.setdefault(key, int(food_id))
+            self.max_words = max(self.max_words, key.count(' ') + 1)
+            if ' ' in key and 'é' in key:
+                self._unaccented.setdefault(key.replace('é', 'e'), int(food_id))
+
+    def _lookup(self, key: str) -> Optional[int]:
+        food_id = self._index.get(key)
+        return self._unaccented.get(key) if food_id is None else food_id
+
+    @classmethod
+    def from_csv(cls, food_df: pd.DataFrame, path: str = DEFAULT_ALIAS_PATH) -> 'FoodAliasIndex':
+        """
+        Charge le fichier d'alias (colonnes alias, food) et le rattache au catalogue
+        Nom canonique absent du catalogue: premier aliment dont le nom contient l'alias
+        """
+        index = cls()
+        if not os.path.exists(path):
+            return index
+
+        names = food_df['food'].astype(str)
+        rows_by_name = {}
+        for food_id, name in enumerate(names.str.strip().str.lower()):
+            rows_by_name.setdefault(name, food_id)
+        normalized_names = [f" {normalize_text(name)} " for name in names]
+
+        aliases = pd.read_csv(path, dtype=str).dropna()
+        for alias, canonical in zip(aliases['alias'], aliases['food']):
+            food_id = rows_by_name.get(canonical.strip().lower())
+            if food_id is None:
+                key = f" {normalize_text(alias)} "
+                food_id = next((i for i, name in enumerate(normalized_names) if key in name), None)
+            if food_id is None:
+                index.unresolved.append(alias)
+            else:
+                index.add(alias, food_id)
+        return index
+
+    def resolve(self, text: str) -> Optional[int]:
+        """Ligne du catalogue d'une expression complète, None si inconnue"""
+        return self._lookup(normalize_text(text))
+
+    def find(self, query: str) -> List[FoodMention]:
+        """Alias cités dans la requête (plus longue expression d'abord, sans chevauchement)"""
+        tokens = tokenize(query)
+        mentions = []
+        i = 0
+        while i < len(tokens):
+            for n in range(min(self.max_words, len(tokens) - i), 0, -1):
+                key = ' '.join(token for token, _, _ in tokens[i:i + n])
+                food_id = self._lookup(key)
+                if food_id is not None:
+                    start, end = tokens[i][1], tokens[i + n - 1][2]
+                    mentions.append(FoodMention(food_id, start, end, query[start:end]))
+                    i += n
+                    break
+            else:
+                i += 1
+        return mentions
+
+
+# ===== TESTS =====
+def test_food_aliases():
+    """Tests du dictionnaire d'alias"""
+    print("=== TESTS DU DICTIONNAIRE D'ALIAS ===\n")
+
+    # Test 1: Normalisation
+    assert normalize_text("Œufs brouillés") == normalize_text("oeuf brouillé")
+    assert normalize_text("Épinards") == "epinard"
+    assert normalize_text("pâté") != normalize_text("pâtes") and normalize_text("thé") != "the"
+    assert normalize_token("choux") == normalize_token("chou")
+    print("Normalisation: 'Œufs brouillés' ->", normalize_text("Œufs brouillés"))
+
+    # Test 2: Rattachement au catalogue
+    food_df = pd.DataFrame({'food': ['chicken breast cooked', 'brown rice cooked',
+                                     'white rice cooked', 'scrambled eggs', 'Saumon fumé']})
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '_test_aliases.csv')
+    pd.DataFrame({
+        'alias': ['poulet', 'riz', 'riz complet', 'œufs brouillés', 'saumon', 'mangue'],
+        'food': ['chicken breast cooked', 'white rice cooked', 'brown rice cooked',
+                 'scrambled eggs', 'salmon cooked', 'mango']
+    }).to_csv(path, index=False)
+    try:
+        index = FoodAliasIndex.from_csv(food_df, path)
+    finally:
+        os.remove(path)
+
+    print(f"Alias indexés: {len(index)}, non résolus: {index.unresolved}")
+    assert index.unresolved == ['mangue'], "Alias sans aliment correspondant"
+    assert index.resolve("Saumons") == 4, "Repli sur le nom contenant l'alias"
+
+    # Test 3: Résolution dans une requête
+    mentions = index.find("Je mange du RIZ COMPLET avec des oeufs brouilles et du poulet")
+    print("Mentions:", [(m.text, food_df['food'][m.food_id]) for m in mentions])
+    assert [m.food_id for m in mentions] == [1, 3, 0]
+    assert mentions[0].text == "RIZ COMPLET", "Positions dans le texte d'origine"
+
+    # Test 4: É final significatif (pâté n'est pas des pâtes, the n'est pas du thé)
+    words = FoodAliasIndex({'pâtes': 0, 'thé': 1, 'steak haché': 2})
+    assert [m.food_id for m in words.find("Analyse les pâtes")] == [0]
+    assert words.find("Analyse le pâté") == [], "pâté ne doit pas devenir pâtes"
+    assert words.find("Analyse the chicken") == [], "the anglais ne doit pas devenir thé"
+    assert [m.food_id for m in words.find("un thé et un steak hache")] == [1, 2]
+    print()
+
+    print("✅ Tous les tests passés!\n")
+
+
+if __name__ == "__main__":
+    test_food_aliases()
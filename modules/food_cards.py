@@ -0,0 +1,205 @@
+"""
+Module utilitaire: Fiches d'analyse précalculées des aliments
+Table indexée (aliment × objectif) des évaluations, textes et alternatives
+Auteurs: Asma Bélkahla & Monia Selleoui
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, List
+
+GOALS = ['Perte de poids', 'Maintien', 'Prise de masse']
+
+
+class FoodAnalysisCards:
+    """
+    Fiches d'analyse construites une fois au démarrage
+    Les textes (évaluations, analyse par objectif, conseil de timing) sont
+    dédupliqués: chaque aliment ne stocke que des indices vers ces textes
+    Répondre = une consultation + un format du template
+    """
+
+    VALUE_COLUMNS = ['Caloric Value', 'Protein', 'Carbohydrates', 'Fat', 'Dietary Fiber']
+    # Libellés précalculés par le catalogue (modules/food_catalog.py), si présents
+    LABEL_COLUMNS = ['protein_rating', 'fiber_rating', 'timing_advice']
+
+    def __init__(
+        self,
+        food_df: pd.DataFrame,
+        features: np.ndarray,
+        template: str,
+        rate_nutrient: Callable[[float, str], str],
+        analyze_for_goal: Callable[[Dict, str], str],
+        n_alternatives: int = 3,
+        chunk_size: int = 512
+    ):
+        self.template = template
+        self.food_names = food_df['food'].astype(str).to_numpy()
+        self.values = food_df[self.VALUE_COLUMNS].to_numpy(dtype=np.float64)
+        self.texts: List[str] = []
+        self._text_ids: Dict[str, int] = {}
+
+        rows = food_df.to_dict('records')
+        if all(col in food_df.columns for col in self.LABEL_COLUMNS):
+            self.protein_rating, self.fiber_rating, self.timing = (
+                self._intern_categorical(food_df[col]) for col in self.LABEL_COLUMNS
+            )
+        else:
+            self.protein_rating = self._intern_all(rate_nutrient(r['Protein'], 'protein') for r in rows)
+            self.fiber_rating = self._intern_all(rate_nutrient(r['Dietary Fiber'], 'fiber') for r in rows)
+            self.timing = self._intern_all(
+                "Idéal post-entraînement" if r['Protein'] > 20 else "Tout moment de la journée"
+                for r in rows
+            )
+        self.goal_analysis = np.stack([
+            self._intern_all(analyze_for_goal(r, goal) for r in rows) for goal in GOALS
+        ])
+        self.alternatives = self._top_similar(features, n_alternatives, chunk_size)
+
+    def _intern_all(self, texts) -> np.ndarray:
+        """Indices des textes dans la table partagée (un seul exemplaire par texte)"""
+        ids = []
+        for text in texts:
+            text_id = self._text_ids.get(text)
+            if text_id is None:
+                text_id = self._text_ids[text] = len(self.texts)
+                self.texts.append(text)
+            ids.append(text_id)
+        return np.array(ids, dtype=np.int32)
+
+    def _intern_categorical(self, column: pd.Series) -> np.ndarray:
+        """Indices des textes d'une colonne catégorielle (un texte par catégorie, pas par ligne)"""
+        column = column.astype('category')
+        # Code -1 (valeur manquante) -> dernier élément: texte vide
+        ids = self._intern_all([*map(str, column.cat.categories), ''])
+        return ids[column.cat.codes.to_numpy()]
+
+    @staticmethod
+    def _top_similar(features: np.ndarray, k: int, chunk_size: int) -> np.ndarray:
+        """
+        k aliments les plus proches (similarité cosinus) pour chaque aliment
+        Calcul par blocs de lignes pour borner la mémoire
+        """
+        n = len(features)
+        k = min(k, n - 1)
+        norms = np.linalg.norm(features, axis=1, keepdims=True)
+        unit = features / np.where(norms == 0, 1, norms)
+        top = np.empty((n, max(k, 0)), dtype=np.int32)
+        if k <= 0:
+            return top
+
+        for start in range(0, n, chunk_size):
+            stop = min(start + chunk_size, n)
+            sims = unit[start:stop] @ unit.T
+            sims[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+            candidates = np.argpartition(sims, -k, axis=1)[:, -k:]
+            order = np.argsort(-np.take_along_axis(sims, candidates, axis=1), axis=1, kind='stable')
+            top[start:stop] = np.take_along_axis(candidates, order, axis=1)
+        return top
+
+    @property
+    def nbytes(self) -> int:
+        """Mémoire des tables indexées (hors textes partagés)"""
+        arrays = [self.values, self.protein_rating, self.fiber_rating,
+                  self.timing, self.goal_analysis, self.alternatives]
+        return sum(a.nbytes for a in arrays)
+
+    def card(self, food_id: int, goal: str) -> Dict:
+        """Champs du template pour un aliment et un objectif"""
+        goal_idx = GOALS.index(goal) if goal in GOALS else GOALS.index('Maintien')
+        calories, proteins, carbs, fats, fiber = self.values[food_id]
+        alternatives = [self.food_names[i] for i in self.alternatives[food_id]]
+
+        return {
+            'food_name': self.food_names[food_id],
+            'calories': calories,
+            'proteins': proteins,
+            'protein_rating': self.texts[self.protein_rating[food_id]],
+            'carbs': carbs,
+            'fats': fats,
+            'fiber': fiber,
+            'fiber_rating': self.texts[self.fiber_rating[food_id]],
+            'goal': goal,
+            'goal_analysis': self.texts[self.goal_analysis[goal_idx, food_id]],
+            'timing_advice': self.texts[self.timing[food_id]],
+            'alternatives': ', '.join(alternatives) if alternatives else 'N/A'
+        }
+
+    def render(self, food_id: int, goal: str) -> str:
+        """Réponse complète d'analyse d'un aliment"""
+        return self.template.format(**self.card(food_id, goal))
+
+
+# ===== TESTS =====
+def test_food_cards():
+    """Tests des fiches d'analyse"""
+    print("=== TESTS DES FICHES D'ANALYSE ===\n")
+
+    import time
+
+    food_df = pd.DataFrame({
+        'food': ['Poulet grillé', 'Saumon', 'Riz complet', 'Brocoli', 'Lentilles'],
+        'Caloric Value': [165, 208, 370, 34, 116],
+        'Protein': [31, 20, 7.9, 2.8, 9],
+        'Carbohydrates': [0, 0, 77, 6.6, 20],
+        'Fat': [3.6, 13, 2.9, 0.4, 0.4],
+        'Dietary Fiber': [0, 0, 3.5, 2.6, 7.9]
+    })
+    features = food_df[FoodAnalysisCards.VALUE_COLUMNS].to_numpy(dtype=float)
+    features = (features - features.mean(axis=0)) / features.std(axis=0)
+
+    def rate(value, kind):
+        return 'élevé' if value >= (20 if kind == 'protein' else 5) else 'modéré'
+
+    def analyze(food, goal):
+        return f"{goal}: {'faible' if food['Caloric Value'] < 150 else 'élevée'} densité"
+
+    template = "{food_name} | {protein_rating} | {goal_analysis} | {timing_advice} | {alternatives}"
+    cards = FoodAnalysisCards(food_df, features, template, rate, analyze)
+
+    # Test 1: Textes dédupliqués
+    print(f"Textes partagés: {len(cards.texts)} pour {len(food_df)} aliments × {len(GOALS)} objectifs")
+    # 2 évaluations (communes protéines/fibres) + 2 timings + 3 objectifs × 2 densités
+    assert len(cards.texts) == 2 + 2 + 6, "Chaque texte distinct doit être stocké une fois"
+
+    answer = cards.render(3, 'Perte de poids')
+    print(f"Réponse: {answer}")
+    assert answer.startswith("Brocoli | modéré | Perte de poids: faible densité | Tout moment")
+
+    # Test 2: Libellés précalculés du catalogue (colonnes catégorielles) -> mêmes réponses
+    try:
+        from .food_catalog import with_display_fields
+    except ImportError:
+        from food_catalog import with_display_fields
+
+    def rate_like_catalog(value, kind):
+        thresholds = {'protein': (20, 10), 'fiber': (5, 2)}[kind]
+        labels = {'protein': ('💪 Excellent source', '✅ Bonne source', 'ℹ️ Source modérée'),
+                  'fiber': ('🌾 Riche en fibres', '✅ Contient des fibres', 'ℹ️ Faible en fibres')}[kind]
+        return labels[0] if value >= thresholds[0] else labels[1] if value >= thresholds[1] else labels[2]
+
+    direct = FoodAnalysisCards(food_df, features, template, rate_like_catalog, analyze)
+    precomputed = FoodAnalysisCards(with_display_fields(food_df), features, template,
+                                    rate_like_catalog, analyze)
+    for food_id in range(len(food_df)):
+        assert precomputed.render(food_id, 'Maintien') == direct.render(food_id, 'Maintien')
+
+    # Test 3: Alternatives identiques à un calcul direct
+    unit = features / np.linalg.norm(features, axis=1, keepdims=True)
+    sims = unit @ unit.T
+    np.fill_diagonal(sims, -np.inf)
+    expected = np.argsort(-sims, axis=1, kind='stable')[:, :3]
+    assert np.array_equal(cards.alternatives, expected), "Alternatives incorrectes"
+
+    # Test 4: Temps de réponse
+    start = time.perf_counter()
+    for _ in range(10000):
+        cards.render(0, 'Prise de masse')
+    print(f"Temps par réponse: {(time.perf_counter() - start) / 10000 * 1e6:.1f} µs")
+    print()
+
+    print("✅ Tous les tests passés!\n")
+
+
+if __name__ == "__main__":
+    test_food_cards()
@@ -0,0 +1,377 @@
+"""
+Module utilitaire: Catalogue alimentaire (chargement, champs d'affichage et index de requêtes)
+Table chargée depuis data/nutrition, partagée par l'application et le serveur d'API
+Étiquettes, verdicts par objectif et score de densité calculés une fois en
+colonnes catégorielles; ordres de tri précalculés, plages triées pour les
+filtres numériques, résultats mis en cache et pagination sans copie
+Auteurs: Asma Bélkahla & Monia Selleoui
+"""
+
+import os
+import operator
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'nutrition')
+N_FOOD_GROUPS = 5
+
+SORT_COLUMNS = ['Nutrition Density', 'Caloric Value', 'Protein',
+                'Carbohydrates', 'Fat', 'Dietary Fiber']
+STAT_COLUMNS = ['Caloric Value', 'Protein', 'Carbohydrates', 'Fat']
+
+LOW_CALORIE_TAG = "🔥 Faible en calories"
+
+# (colonne créée, colonne source, [(comparaison, seuil, libellé)], libellé par défaut)
+# Première règle vérifiée retenue, comme une suite de if/elif
+LABEL_RULES: List[Tuple[str, str, List[Tuple[str, float, str]], Optional[str]]] = [
+    # Caractéristiques (page Base Aliments)
+    ('protein_tag', 'Protein', [('>', 20, "💪 Très riche en protéines"),
+                                ('>', 10, "🥩 Riche en protéines")], None),
+    ('fiber_tag', 'Dietary Fiber', [('>', 5, "🌿 Riche en fibres")], None),
+    ('calorie_tag', 'Caloric Value', [('<', 100, LOW_CALORIE_TAG),
+                                      ('>', 400, "⚡ Haute densité calorique")], None),
+    ('vitamin_c_tag', 'Vitamin C', [('>', 50, "🍊 Riche en vitamine C")], None),
+    # Indicateur des résultats de recommandation
+    ('protein_highlight', 'Protein', [('>', 15, "💪 Riche en protéines")], None),
+    # Évaluations et conseil de timing des fiches de l'assistant
+    ('protein_rating', 'Protein', [('>=', 20, '💪 Excellent source'),
+                                   ('>=', 10, '✅ Bonne source'),
+                                   ('>=', 0, 'ℹ️ Source modérée')], ''),
+    ('fiber_rating', 'Dietary Fiber', [('>=', 5, '🌾 Riche en fibres'),
+                                       ('>=', 2, '✅ Contient des fibres'),
+                                       ('>=', 0, 'ℹ️ Faible en fibres')], ''),
+    ('timing_advice', 'Protein', [('>', 20, "Idéal post-entraînement")], "Tout moment de la journée")
+]
+
+TAG_COLUMNS = ['protein_tag', 'fiber_tag', 'calorie_tag', 'vitamin_c_tag']
+
+# Verdict par objectif (page Recommandations) et style d'alerte associé
+VERDICT_COLUMNS = {
+    'Perte de poids': 'verdict_weight_loss',
+    'Maintien': 'verdict_maintenance',
+    'Prise de masse': 'verdict_mass_gain'
+}
+VERDICT_STYLES = {
+    "✅ EXCELLENT CHOIX": 'success',
+    "⚠️ BON AVEC MODÉRATION": 'warning',
+    "❌ À LIMITER": 'error',
+    "ℹ️ BON ALIMENT": 'info',
+    "✅ COMPATIBLE": 'success'
+}
+
+DISPLAY_COLUMNS = ([name for name, *_ in LABEL_RULES] + list(VERDICT_COLUMNS.values())
+                   + ['density_progress'])
+
+_OPERATORS = {'>': operator.gt, '>=': operator.ge, '<': operator.lt}
+
+
+def _categorical(conditions: List[np.ndarray], labels: List[str], default: Optional[str]) -> pd.Categorical:
+    """Premier libellé dont la condition est vraie (catégories = libellés possibles)"""
+    values = np.select(conditions, labels, default=default)
+    categories = list(dict.fromkeys(labels + ([default] if default is not None else [])))
+    return pd.Categorical(values, categories=categories)
+
+
+def _goal_verdicts(calories: np.ndarray, proteins: np.ndarray) -> Dict[str, pd.Categorical]:
+    """Verdict de chaque aliment pour chaque objectif"""
+    n = len(calories)
+    return {
+        'Perte de poids': _categorical(
+            [(calories < 150) & (proteins > 10), calories < 300],
+            ["✅ EXCELLENT CHOIX", "⚠️ BON AVEC MODÉRATION"], "❌ À LIMITER"
+        ),
+        'Prise de masse': _categorical(
+            [(calories > 200) & (proteins > 15)], ["✅ EXCELLENT CHOIX"], "ℹ️ BON ALIMENT"
+        ),
+        'Maintien': pd.Categorical(np.full(n, "✅ COMPATIBLE"))
+    }
+
+
+def with_display_fields(food_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Copie de la table avec les champs d'affichage précalculés (vectorisés)
+    Colonnes catégorielles: un code par aliment, chaque libellé stocké une fois
+    Sans effet si les champs sont déjà présents
+    """
+    if all(col in food_df.columns for col in DISPLAY_COLUMNS):
+        return food_df
+    food_df = food_df.copy()
+
+    def numeric(col):
+        if col not in food_df.columns:
+            return np.full(len(food_df), np.nan)
+        return pd.to_numeric(food_df[col], errors='coerce').to_numpy(dtype=np.float64)
+
+    for name, source, rules, default in LABEL_RULES:
+        values = numeric(source)
+        conditions = [_OPERATORS[op](values, threshold) for op, threshold, _ in rules]
+        food_df[name] = _categorical(conditions, [label for *_, label in rules], default)
+
+    verdicts = _goal_verdicts(numeric('Caloric Value'), numeric('Protein'))
+    for goal, col in VERDICT_COLUMNS.items():
+        food_df[col] = verdicts[goal]
+
+    food_df['density_progress'] = np.clip(numeric('Nutrition Density') / 10, 0.0, 1.0)
+    return food_df
+
+
+def load_food_table(data_dir: str = DEFAULT_DATA_DIR) -> Optional[pd.DataFrame]:
+    """
+    Concatène les fichiers FOOD-DATA-GROUP1..5.csv présents dans `data_dir`
+    (aliments sans nom retirés, valeurs manquantes à 0, champs d'affichage ajoutés)
+    None si aucun fichier n'est trouvé
+    """
+    dfs = []
+    for i in range(1, N_FOOD_GROUPS + 1):
+        file_path = os.path.join(data_dir, f"FOOD-DATA-GROUP{i}.csv")
+        if os.path.exists(file_path):
+            dfs.append(pd.read_csv(file_path))
+    if not dfs:
+        return None
+
+    combined_df = pd.concat(dfs, ignore_index=True)
+    combined_df = combined_df.dropna(subset=['food'])
+    combined_df = combined_df.fillna(0)
+    return with_display_fields(combined_df)
+
+
+def row_tags(row, columns: Sequence[str] = TAG_COLUMNS) -> List[str]:
+    """Étiquettes présentes sur une ligne (lecture des champs précalculés)"""
+    return [row[col] for col in columns if isinstance(row[col], str)]
+
+
+def goal_verdict(row, goal: str) -> str:
+    """Verdict précalculé d'une ligne pour un objectif (Maintien par défaut)"""
+    return row[VERDICT_COLUMNS.get(goal, VERDICT_COLUMNS['Maintien'])]
+
+
+@dataclass(frozen=True)
+class FoodQueryResult:
+    """Positions (lignes de la table) des aliments retenus, dans l'ordre du tri"""
+    positions: np.ndarray
+    means: Dict[str, float] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.positions) == 0
+
+
+class FoodQueryIndex:
+    """
+    Index construit une fois au chargement des données
+    - un ordre décroissant (argsort) par colonne de tri
+    - un ordre croissant et les valeurs triées des protéines et des calories:
+      un filtre de seuil = une recherche dichotomique (searchsorted)
+    Une requête combine ces masques puis filtre l'ordre de tri: O(n) au
+    premier appel, ensuite servie par le cache; une page = O(taille de page)
+    """
+
+    QUERY_CACHE_SIZE = 256
+
+    def __init__(self, food_df: pd.DataFrame, sort_columns: Sequence[str] = SORT_COLUMNS,
+                 stat_columns: Sequence[str] = STAT_COLUMNS):
+        self.food_df = food_df
+        self.n_foods = len(food_df)
+        self._names = food_df['food'].astype(str).str.lower().reset_index(drop=True)
+
+        # Ordres décroissants (tri stable: mêmes ex aequo que sort_values)
+        self._sort_orders: Dict[str, np.ndarray] = {}
+        for col in sort_columns:
+            if col in food_df.columns:
+                values = food_df[col].to_numpy(dtype=np.float64)
+                self._sort_orders[col] = np.argsort(-values, kind='stable')
+
+        self._protein_order, self._protein_sorted = self._range_index(food_df['Protein'])
+        self._calorie_order, self._calorie_sorted = self._range_index(food_df['Caloric Value'])
+        self._stats = {
+            col: food_df[col].to_numpy(dtype=np.float64)
+            for col in stat_columns if col in food_df.columns
+        }
+
+        self._cached_query = lru_cache(maxsize=self.QUERY_CACHE_SIZE)(self._query)
+        self._cached_search = lru_cache(maxsize=self.QUERY_CACHE_SIZE)(self._search_mask)
+
+    @staticmethod
+    def _range_index(column: pd.Series):
+        """Ordre croissant et valeurs triées (valeurs manquantes exclues)"""
+        values = column.to_numpy(dtype=np.float64)
+        order = np.argsort(values, kind='stable')
+        n_valid = int(np.count_nonzero(~np.isnan(values)))
+        order = order[:n_valid]
+        return order, values[order]
+
+    @property
+    def sort_columns(self) -> List[str]:
+        return list(self._sort_orders)
+
+    def _search_mask(self, search: str) -> np.ndarray:
+        """Aliments dont le nom contient le texte (insensible à la casse, sans regex)"""
+        mask = self._names.str.contains(search.lower(), regex=False).to_numpy(dtype=bool)
+        mask.setflags(write=False)
+        return mask
+
+    def _query(self, search: str, sort_by: str, min_protein: float, max_calories: float) -> FoodQueryResult:
+        if sort_by not in self._sort_orders:
+            raise ValueError(f"Colonne de tri inconnue: {sort_by}")
+
+        # Protéines >= min: suffixe de l'ordre croissant
+        start = np.searchsorted(self._protein_sorted, min_protein, side='left')
+        mask = np.zeros(self.n_foods, dtype=bool)
+        mask[self._protein_order[start:]] = True
+
+        # Calories <= max: préfixe de l'ordre croissant
+        stop = np.searchsorted(self._calorie_sorted, max_calories, side='right')
+        calorie_mask = np.zeros(self.n_foods, dtype=bool)
+        calorie_mask[self._calorie_order[:stop]] = True
+        mask &= calorie_mask
+
+        if search:
+            mask &= self._cached_search(search)
+
+        order = self._sort_orders[sort_by]
+        positions = order[mask[order]]
+        positions.setflags(write=False)
+
+        means = {}
+        if len(positions):
+            means = {col: float(np.nanmean(values[positions])) for col, values in self._stats.items()}
+        return FoodQueryResult(positions, means)
+
+    def query(self, search: str = '', sort_by: str = 'Nutrition Density',
+              min_protein: float = 0, max_calories: float = float('inf')) -> FoodQueryResult:
+        """Aliments filtrés et triés (résultat partagé en cache, ne pas modifier)"""
+        return self._cached_query(search.strip(), sort_by, float(min_protein), float(max_calories))
+
+    def query_cache_info(self):
+        """Statistiques du cache des requêtes"""
+        return self._cached_query.cache_info()
+
+    def clear_query_cache(self):
+        self._cached_query.cache_clear()
+        self._cached_search.cache_clear()
+
+    @staticmethod
+    def n_pages(result: FoodQueryResult, page_size: int = 10) -> int:
+        """Nombre de pages (au moins une)"""
+        return max(1, -(-len(result) // page_size))
+
+    def page(self, result: FoodQueryResult, number: int, page_size: int = 10) -> pd.DataFrame:
+        """Lignes de la page `number` (1 = première), seules ces lignes sont extraites"""
+        start = (number - 1) * page_size
+        return self.food_df.iloc[result.positions[start:start + page_size]]
+
+
+# ===== TESTS =====
+def test_food_catalog():
+    """Tests du catalogue alimentaire"""
+    print("=== TESTS DU CATALOGUE ALIMENTAIRE ===\n")
+
+    import time
+
+    rng = np.random.default_rng(0)
+    n = 20000
+    food_df = pd.DataFrame({
+        'food': [f"aliment {i} {'poulet' if i % 7 == 0 else 'riz'}" for i in range(n)],
+        'Caloric Value': rng.integers(0, 900, n).astype(float),
+        'Protein': rng.integers(0, 60, n).astype(float),
+        'Carbohydrates': rng.uniform(0, 80, n),
+        'Fat': rng.uniform(0, 50, n),
+        'Dietary Fiber': rng.uniform(0, 15, n),
+        'Nutrition Density': rng.integers(0, 10, n).astype(float)
+    })
+    index = FoodQueryIndex(food_df)
+
+    def reference(search, sort_by, min_protein, max_calories):
+        filtered = food_df.copy()
+        if search:
+            filtered = filtered[filtered['food'].str.contains(search, case=False, na=False)]
+        filtered = filtered[(filtered['Protein'] >= min_protein) &
+                            (filtered['Caloric Value'] <= max_calories)]
+        return filtered.sort_values(sort_by, ascending=False, kind='stable')
+
+    # Test 1: Mêmes résultats que le filtrage pandas
+    cases = [('', 'Nutrition Density', 0, 1000), ('POULET', 'Protein', 20, 400),
+             ('riz', 'Caloric Value', 59, 0), ('introuvable', 'Fat', 0, 1000)]
+    for case in cases:
+        result = index.query(*case)
+        expected = reference(*case)
+        assert np.array_equal(food_df.index[result.positions], expected.index), f"Écart pour {case}"
+        if len(expected):
+            assert np.isclose(result.means['Protein'], expected['Protein'].mean())
+        print(f"  {case} -> {len(result)} aliments")
+
+    # Test 2: Pagination
+    result = index.query('poulet', 'Protein', 10, 500)
+    expected = reference('poulet', 'Protein', 10, 500)
+    last = index.n_pages(result)
+    assert index.page(result, 2).equals(expected.iloc[10:20])
+    assert len(index.page(result, last)) == len(result) - (last - 1) * 10
+
+    # Test 3: Cache et coût d'une page
+    start = time.perf_counter()
+    reference('poulet', 'Protein', 10, 500)
+    pandas_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for number in range(1, 101):
+        index.page(index.query('poulet', 'Protein', 10, 500), number)
+    page_time = (time.perf_counter() - start) / 100
+    info = index.query_cache_info()
+    print(f"\nFiltrage pandas: {pandas_time * 1000:.1f} ms, page en cache: {page_time * 1000:.2f} ms")
+    print(f"Cache: {info.hits} succès, {info.misses} calculs")
+    assert info.hits >= 100
+
+    # Test 4: Champs d'affichage identiques aux conditions ligne par ligne
+    food_df['Vitamin C'] = rng.uniform(0, 100, n)
+    food_df.loc[::50, 'Protein'] = np.nan
+    fields = with_display_fields(food_df)
+    assert with_display_fields(fields) is fields, "Champs recalculés"
+    assert 'protein_tag' not in food_df.columns, "Table d'origine modifiée"
+
+    def reference_tags(row):
+        tags = []
+        if row['Protein'] > 20:
+            tags.append("💪 Très riche en protéines")
+        elif row['Protein'] > 10:
+            tags.append("🥩 Riche en protéines")
+        if row['Dietary Fiber'] > 5:
+            tags.append("🌿 Riche en fibres")
+        if row['Caloric Value'] < 100:
+            tags.append(LOW_CALORIE_TAG)
+        elif row['Caloric Value'] > 400:
+            tags.append("⚡ Haute densité calorique")
+        if row['Vitamin C'] > 50:
+            tags.append("🍊 Riche en vitamine C")
+        return tags
+
+    def reference_verdict(row, goal):
+        if goal == 'Perte de poids':
+            if row['Caloric Value'] < 150 and row['Protein'] > 10:
+                return "✅ EXCELLENT CHOIX"
+            return "⚠️ BON AVEC MODÉRATION" if row['Caloric Value'] < 300 else "❌ À LIMITER"
+        if goal == 'Prise de masse':
+            if row['Caloric Value'] > 200 and row['Protein'] > 15:
+                return "✅ EXCELLENT CHOIX"
+            return "ℹ️ BON ALIMENT"
+        return "✅ COMPATIBLE"
+
+    for (_, row), (_, field_row) in zip(food_df.head(2000).iterrows(), fields.head(2000).iterrows()):
+        assert row_tags(field_row) == reference_tags(row)
+        for goal in VERDICT_COLUMNS:
+            assert goal_verdict(field_row, goal) == reference_verdict(row, goal)
+            assert goal_verdict(field_row, goal) in VERDICT_STYLES
+    assert fields['density_progress'].between(0, 1).all()
+    extra = fields[DISPLAY_COLUMNS].memory_usage(deep=True).sum() / 1e6
+    print(f"Champs d'affichage: {len(DISPLAY_COLUMNS)} colonnes, {extra:.1f} Mo pour {n} aliments")
+    print()
+
+    print("✅ Tous les tests passés!\n")
+
+
+if __name__ == "__main__":
+    test_food_catalog()
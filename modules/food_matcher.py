@@ -0,0 +1,192 @@
+"""
+Module utilitaire: Détection des aliments cités dans une requête
+Automate d'Aho-Corasick construit une fois sur les noms du catalogue et leurs alias
+Auteurs: Asma Bélkahla & Monia Selleoui
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class FoodMention:
+    food_id: int   # ligne du catalogue
+    start: int     # positions dans la requête
+    end: int
+    text: str
+
+
+class FoodNameMatcher:
+    """
+    Recherche de tous les noms d'aliments en un seul parcours de la requête
+    Coût proportionnel à la longueur de la requête (+ nombre de correspondances),
+    indépendant de la taille du catalogue
+    Seules les correspondances sur des mots entiers sont retenues;
+    en cas de chevauchement, la plus longue l'emporte
+    """
+
+    def __init__(self):
+        # Noeud = indice; transitions, lien d'échec, sortie (longueur, id) et lien de sortie
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Optional[Tuple[int, int]]] = [None]
+        self._dict_link: List[int] = [0]
+        self._built = False
+        self.n_patterns = 0
+
+    @classmethod
+    def from_catalog(
+        cls,
+        food_names: Iterable[str],
+        aliases: Optional[Dict[str, int]] = None
+    ) -> 'FoodNameMatcher':
+        """
+        Construit l'automate sur les noms (id = position) et des alias (texte -> id)
+        Un nom présent plusieurs fois pointe vers sa première ligne
+        """
+        matcher = cls()
+        for food_id, name in enumerate(food_names):
+            matcher.add(name, food_id)
+        for alias, food_id in (aliases or {}).items():
+            matcher.add(alias, food_id)
+        matcher.build()
+        return matcher
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Normalisation commune aux motifs et aux requêtes"""
+        return text.lower()
+
+    def add(self, pattern: str, food_id: int):
+        """Ajoute un motif (avant build)"""
+        if self._built:
+            raise RuntimeError("Automate déjà construit")
+        pattern = self.normalize(pattern).strip()
+        if not pattern:
+            return
+
+        node = 0
+        for char in pattern:
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+                self._dict_link.append(0)
+            node = nxt
+
+        if self._output[node] is None:
+            self._output[node] = (len(pattern), int(food_id))
+            self.n_patterns += 1
+
+    def build(self):
+        """Calcule les liens d'échec et de sortie (parcours en largeur)"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[child] = target if target != child else 0
+
+                # Plus proche suffixe qui est lui-même un motif complet
+                suffix = self._fail[child]
+                self._dict_link[child] = suffix if self._output[suffix] else self._dict_link[suffix]
+        self._built = True
+
+    def find_all(self, query: str) -> List[FoodMention]:
+        """Toutes les correspondances sur mots entiers (chevauchements inclus)"""
+        if not self._built:
+            self.build()
+
+        text = self.normalize(query)
+        goto, fail, output, dict_link = self._goto, self._fail, self._output, self._dict_link
+        mentions = []
+        node = 0
+
+        for end, char in enumerate(text, 1):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+
+            # Fin de mot requise après la correspondance
+            if end < len(text) and text[end].isalnum():
+                continue
+
+            match = node if output[node] else dict_link[node]
+            while match:
+                length, food_id = output[match]
+                start = end - length
+                if start == 0 or not text[start - 1].isalnum():
+                    mentions.append(FoodMention(food_id, start, end, text[start:end]))
+                match = dict_link[match]
+
+        return mentions
+
+    def find(self, query: str) -> List[FoodMention]:
+        """Correspondances sans chevauchement, les plus longues d'abord, triées par position"""
+        selected = []
+        taken = []
+        for mention in sorted(self.find_all(query), key=lambda m: (m.start - m.end, m.start)):
+            if all(mention.end <= s or mention.start >= e for s, e in taken):
+                selected.append(mention)
+                taken.append((mention.start, mention.end))
+        return sorted(selected, key=lambda m: m.start)
+
+    def best(self, query: str) -> Optional[FoodMention]:
+        """Aliment principal de la requête (mention la plus longue, puis la première)"""
+        mentions = self.find_all(query)
+        if not mentions:
+            return None
+        return min(mentions, key=lambda m: (m.start - m.end, m.start))
+
+
+# ===== TESTS =====
+def test_food_matcher():
+    """Tests de la détection d'aliments"""
+    print("=== TESTS DE LA DÉTECTION D'ALIMENTS ===\n")
+
+    import time
+
+    names = ['rice', 'brown rice', 'rice cake', 'chicken', 'chicken breast grilled',
+             'egg', 'eggplant', 'salmon cooked']
+    matcher = FoodNameMatcher.from_catalog(names, aliases={'poulet': 3, 'riz complet': 1})
+    print(f"Motifs: {matcher.n_patterns}, noeuds: {len(matcher._goto)}")
+
+    # Test 1: Plus longue correspondance et mots entiers
+    mentions = matcher.find("Brown rice or a rice cake with chicken breast grilled?")
+    print("Mentions:", [(names[m.food_id], m.start) for m in mentions])
+    assert [m.food_id for m in mentions] == [1, 2, 4], "Correspondances les plus longues attendues"
+
+    assert matcher.find("Eggplant price") == [FoodMention(6, 0, 8, 'eggplant')]
+    assert not matcher.find("the price of ricecakes"), "Les fragments de mots ne doivent pas correspondre"
+
+    # Test 2: Alias
+    best = matcher.best("Analyse le riz complet et le poulet")
+    print(f"Mention principale: {best.text} -> {names[best.food_id]}")
+    assert best.food_id == 1
+
+    # Test 3: Latence indépendante de la taille du catalogue
+    query = "Est-ce que le poulet grillé avec du riz complet est bon après le sport ?"
+    for size in (2_000, 20_000):
+        catalog = [f"food item {i} variant {i % 97}" for i in range(size)] + names
+        big = FoodNameMatcher.from_catalog(catalog)
+        start = time.perf_counter()
+        for _ in range(2000):
+            big.find_all(query)
+        elapsed = (time.perf_counter() - start) / 2000 * 1e6
+        print(f"Catalogue de {len(catalog)} noms: {elapsed:.1f} µs par requête")
+    print()
+
+    print("✅ Tous les tests passés!\n")
+
+
+if __name__ == "__main__":
+    test_food_matcher()
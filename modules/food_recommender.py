@@ -128,10 +128,12 @@ class FoodRecommendationEngine:
         n_recommendations: int = 10,
         exclude_foods: Optional[List[str]] = None,
         min_protein: float = 0,
-        max_calories: float = 1000
+        max_calories: float = 1000,
+        exclude_mask: Optional[np.ndarray] = None
     ) -> pd.DataFrame:
         """
         Recommande des aliments basés sur le profil cible
+        exclude_mask: masque booléen (une entrée par aliment) des lignes à exclure
         """
         # Créer profil cible
         target_profile = self._create_target_profile(target)
@@ -148,6 +150,9 @@ class FoodRecommendationEngine:
         if exclude_foods:
             mask &= ~self.food_df['food'].isin(exclude_foods)
         
+        if exclude_mask is not None:
+            mask &= ~exclude_mask
+        
         mask &= self.food_df['Protein'] >= min_protein
         mask &= self.food_df['Caloric Value'] <= max_calories
         
@@ -159,6 +164,7 @@ class FoodRecommendationEngine:
         
         # Préparer résultats
         results = self.food_df.iloc[top_indices].copy()
+        results['food_id'] = top_indices
         results['similarity_score'] = weighted_similarities[top_indices]
         results['match_percentage'] = (results['similarity_score'] / results['similarity_score'].max() * 100).round(1)
         
@@ -0,0 +1,205 @@
+"""
+Module utilitaire: Simulateur de trajectoires vers l'objectif de poids
+Projection semaine par semaine (poids, BMR, TDEE) sur une grille de scénarios
+Auteurs: Asma Bélkahla & Monia Selleoui
+"""
+
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from typing import Dict, Sequence
+
+try:
+    from .nutrition_calculator import NutritionalCalculator
+except ImportError:
+    from nutrition_calculator import NutritionalCalculator
+
+
+# Sens de l'écart calorique selon l'objectif (+1 = déficit, -1 = surplus)
+GOAL_DIRECTIONS = {
+    'Perte de poids': 1.0,
+    'Maintien': 0.0,
+    'Prise de masse': -1.0
+}
+
+
+@dataclass
+class ScenarioGrid:
+    """
+    Résultat d'une simulation: tableaux de forme (objectifs, activités, écarts, semaines + 1)
+    """
+    goals: Sequence[str]
+    activity_levels: Sequence[str]
+    deficit_pcts: np.ndarray
+    weeks: np.ndarray
+    weight: np.ndarray
+    bmr: np.ndarray
+    tdee: np.ndarray
+    intake: np.ndarray
+    weeks_to_target: np.ndarray  # (objectifs, activités, écarts), inf si jamais atteint
+
+    def to_frame(self) -> pd.DataFrame:
+        """Format long (une ligne par scénario et par semaine) pour les graphiques"""
+        g, a, d, w = np.meshgrid(
+            np.arange(len(self.goals)), np.arange(len(self.activity_levels)),
+            np.arange(len(self.deficit_pcts)), self.weeks, indexing='ij'
+        )
+        return pd.DataFrame({
+            'goal': np.asarray(self.goals)[g.ravel()],
+            'activity_level': np.asarray(self.activity_levels)[a.ravel()],
+            'deficit_pct': self.deficit_pcts[d.ravel()],
+            'week': w.ravel(),
+            'weight': self.weight.ravel(),
+            'bmr': self.bmr.ravel(),
+            'tdee': self.tdee.ravel(),
+            'intake': self.intake.ravel()
+        })
+
+    def weeks_table(self, goal: str) -> pd.DataFrame:
+        """Semaines nécessaires pour un objectif (activités × écarts)"""
+        goal_idx = list(self.goals).index(goal)
+        return pd.DataFrame(
+            self.weeks_to_target[goal_idx],
+            index=pd.Index(self.activity_levels, name='activity_level'),
+            columns=pd.Index(self.deficit_pcts, name='deficit_pct')
+        )
+
+
+class GoalSimulator:
+    """
+    Trajectoire de poids quand les apports suivent la dépense recalculée chaque semaine
+    apport = TDEE × (1 - écart), TDEE = (10 × poids + C) × facteur d'activité
+    La récurrence est linéaire en poids: forme fermée, sans boucle par semaine
+    """
+
+    KCAL_PER_KG = 7700
+
+    def __init__(self, weight: float, height: float, age: int, sex: str, target_weight: float):
+        self.weight = weight
+        self.target_weight = target_weight
+        # Partie du BMR indépendante du poids (Mifflin-St Jeor)
+        self.bmr_offset = NutritionalCalculator.calculate_bmr(0, height, age, sex)
+
+    @classmethod
+    def from_profile(cls, profile: Dict) -> 'GoalSimulator':
+        """Construit le simulateur depuis le profil enregistré (dict ou UserProfile)"""
+        get = profile.get if isinstance(profile, dict) else lambda key: getattr(profile, key)
+        return cls(get('weight'), get('height'), get('age'), get('sex'), get('target_weight'))
+
+    def simulate(
+        self,
+        goals: Sequence[str],
+        activity_levels: Sequence[str],
+        deficit_pcts: Sequence[float],
+        n_weeks: int = 26
+    ) -> ScenarioGrid:
+        """
+        Simule toutes les combinaisons objectif × activité × écart calorique
+        deficit_pcts: écarts relatifs au TDEE (0.15 = 15%), signés selon l'objectif
+        Le poids reste au poids cible une fois celui-ci atteint (maintien)
+        """
+        direction = np.array([GOAL_DIRECTIONS.get(g, 0.0) for g in goals])[:, None, None]
+        factor = np.array([
+            NutritionalCalculator.ACTIVITY_FACTORS.get(a, 1.2) for a in activity_levels
+        ])[None, :, None]
+        deficits = np.asarray(deficit_pcts, dtype=float)
+        signed_deficit = direction * deficits[None, None, :]
+
+        # w(k+1) = w(k) - r × (10 × w(k) + C), r = écart × facteur × 7 / 7700
+        rate = signed_deficit * factor * 7 / self.KCAL_PER_KG
+        decay = 1 - 10 * rate
+        fixed_point = -self.bmr_offset / 10
+
+        weeks = np.arange(n_weeks + 1)
+        start_gap = self.weight - fixed_point
+        weight = fixed_point + start_gap * decay[..., None] ** weeks
+
+        # Objectif atteint: poids figé à la cible, apports au niveau du maintien
+        target = self.target_weight
+        reached = (weight - target) * (self.weight - target) <= 0
+        weight = np.where(reached, target, weight)
+
+        bmr = 10 * weight + self.bmr_offset
+        tdee = bmr * factor[..., None]
+        intake = tdee * (1 - np.where(reached, 0.0, signed_deficit[..., None]))
+
+        weeks_to_target = self._weeks_to_target(decay, start_gap, fixed_point)
+
+        return ScenarioGrid(
+            goals=list(goals),
+            activity_levels=list(activity_levels),
+            deficit_pcts=deficits,
+            weeks=weeks,
+            weight=weight,
+            bmr=bmr,
+            tdee=tdee,
+            intake=intake,
+            weeks_to_target=weeks_to_target
+        )
+
+    def _weeks_to_target(self, decay: np.ndarray, start_gap: float, fixed_point: float) -> np.ndarray:
+        """
+        Nombre de semaines (entier supérieur) pour atteindre la cible
+        Résout fixed_point + start_gap × decay^k = cible
+        """
+        target_gap = self.target_weight - fixed_point
+        if abs(self.weight - self.target_weight) < 0.5:
+            return np.zeros_like(decay)
+
+        ratio = target_gap / start_gap
+        with np.errstate(divide='ignore', invalid='ignore'):
+            k = np.log(ratio) / np.log(decay)
+        reachable = (ratio > 0) & (decay > 0) & (decay != 1) & np.isfinite(k) & (k >= 0)
+        return np.where(reachable, np.ceil(k), np.inf)
+
+
+# ===== TESTS =====
+def test_goal_simulator():
+    """Tests du simulateur de trajectoires"""
+    print("=== TESTS DU SIMULATEUR DE TRAJECTOIRES ===\n")
+
+    simulator = GoalSimulator(weight=85, height=178, age=30, sex='Homme', target_weight=78)
+    goals = ['Perte de poids', 'Maintien', 'Prise de masse']
+    activities = ['Sédentaire', 'Modérément actif', 'Très actif']
+    deficits = [0.10, 0.15, 0.20, 0.25]
+
+    grid = simulator.simulate(goals, activities, deficits, n_weeks=52)
+    print(f"Forme des trajectoires: {grid.weight.shape}")
+    assert grid.weight.shape == (3, 3, 4, 53)
+
+    # Test 1: Semaine 1 identique au calcul direct
+    bmr0 = NutritionalCalculator.calculate_bmr(85, 178, 30, 'Homme')
+    tdee0 = bmr0 * 1.55
+    expected_w1 = 85 - tdee0 * 0.15 * 7 / 7700
+    print(f"Semaine 1 (modéré, -15%): {grid.weight[0, 1, 1, 1]:.3f} kg (attendu {expected_w1:.3f})")
+    assert abs(grid.weight[0, 1, 1, 1] - expected_w1) < 1e-9
+    assert abs(grid.bmr[0, 1, 1, 0] - bmr0) < 1e-9
+
+    # Test 2: Cohérence avec une boucle semaine par semaine
+    w = 85.0
+    for _ in range(10):
+        w -= (10 * w + simulator.bmr_offset) * 1.725 * 0.20 * 7 / 7700
+    assert abs(grid.weight[0, 2, 2, 10] - max(w, 78)) < 1e-9, "Forme fermée incorrecte"
+
+    # Test 3: Cible atteinte puis maintenue
+    weeks = grid.weeks_table('Perte de poids')
+    print("Semaines pour atteindre 78 kg:")
+    print(weeks.to_string())
+    k = int(weeks.loc['Très actif', 0.25])
+    assert grid.weight[0, 2, 3, k] == 78 and grid.weight[0, 2, 3, k - 1] > 78
+    assert np.all(np.diff(grid.weight[0], axis=-1) <= 1e-12), "La perte doit être monotone"
+
+    # Maintien et prise de masse ne rejoignent jamais une cible inférieure
+    assert np.all(grid.weight[1] == 85) and np.all(np.isinf(grid.weeks_to_target[1:]))
+    assert np.all(grid.weight[2, :, :, -1] > 85)
+
+    frame = grid.to_frame()
+    print(f"\nFormat long: {len(frame)} lignes")
+    assert len(frame) == 3 * 3 * 4 * 53
+    print()
+
+    print("✅ Tous les tests passés!\n")
+
+
+if __name__ == "__main__":
+    test_goal_simulator()
@@ -0,0 +1,115 @@
+"""
+Module utilitaire: Rapport des temps d'import
+Chronomètre les imports différés de chaque page et mesure les imports à froid
+(sous-processus `python -X importtime`)
+Auteurs: Asma Bélkahla & Monia Selleoui
+"""
+
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Sequence
+
+_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+_IMPORTTIME_RE = re.compile(r"import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)")
+
+_records: Dict[str, Dict] = {}
+_lock = threading.Lock()
+
+
+@contextmanager
+def import_timer(label: str):
+    """
+    Chronomètre les imports du bloc
+    Seuls les chargements réels comptent: une fois les modules en mémoire
+    (sessions suivantes, réexécutions du script), le bloc n'ajoute rien au rapport
+    """
+    before = len(sys.modules)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        loaded = len(sys.modules) - before
+        if loaded > 0:
+            with _lock:
+                record = _records.setdefault(label, {'label': label, 'seconds': 0.0, 'modules': 0})
+                record['seconds'] += elapsed
+                record['modules'] += loaded
+
+
+def import_report() -> List[Dict]:
+    """Imports enregistrés par étiquette (page), du plus coûteux au moins coûteux"""
+    with _lock:
+        records = [dict(r) for r in _records.values()]
+    return sorted(records, key=lambda r: -r['seconds'])
+
+
+def measure_cold_imports(names: Sequence[str], python: str = sys.executable) -> Dict[str, Dict]:
+    """
+    Coût d'import à froid de chaque module, dans un interpréteur neuf (-X importtime)
+    Retourne {nom: {'seconds': cumul, 'modules': nombre de modules chargés}}
+    """
+    results = {}
+    for name in names:
+        completed = subprocess.run(
+            [python, '-X', 'importtime', '-c', f'import {name}'],
+            cwd=_ROOT, capture_output=True, text=True, check=True
+        )
+        cumulative = 0
+        n_modules = 0
+        for line in completed.stderr.splitlines():
+            match = _IMPORTTIME_RE.match(line)
+            if not match:
+                continue
+            n_modules += 1
+            if match.group(4) == name and len(match.group(3)) <= 1:
+                cumulative = int(match.group(2))
+        results[name] = {'seconds': cumulative / 1e6, 'modules': n_modules}
+    return results
+
+
+# ===== TESTS =====
+def test_import_profiler():
+    """Tests du rapport d'imports"""
+    print("=== TESTS DU RAPPORT D'IMPORTS ===\n")
+
+    # Test 1: Le paquet modules ne charge rien de lourd
+    script = (
+        "import sys, modules; "
+        "heavy = [m for m in ('pandas', 'sklearn', 'scipy', 'modules.food_recommender') if m in sys.modules]; "
+        "assert not heavy, heavy; "
+        "modules.NutritionalCalculator; "
+        "assert 'modules.nutrition_calculator' in sys.modules and 'sklearn' not in sys.modules; "
+        "assert 'NutritionAssistant' in dir(modules)"
+    )
+    subprocess.run([sys.executable, '-c', script], cwd=_ROOT, check=True)
+    print("Import du paquet: aucun sous-module chargé avant le premier usage")
+
+    # Test 2: Coûts à froid
+    cold = measure_cold_imports(['modules', 'modules.nutrition_calculator', 'modules.nutrition_assistant'])
+    for name, cost in cold.items():
+        print(f"  {name:32} {cost['seconds'] * 1000:7.1f} ms  ({cost['modules']} modules)")
+    assert cold['modules']['seconds'] < cold['modules.nutrition_assistant']['seconds']
+
+    # Test 3: Rapport par étiquette (premier chargement uniquement)
+    with import_timer('xml'):
+        import xml.dom.minidom
+    with import_timer('xml'):
+        import xml.dom.minidom
+    with import_timer('déjà chargé'):
+        import os as _os
+    report = import_report()
+    print(f"Rapport: {report}")
+    assert [r['label'] for r in report] == ['xml'] and report[0]['modules'] > 0
+    print()
+
+    print("✅ Tous les tests passés!\n")
+
+
+if __name__ == "__main__":
+    test_import_profiler()
@@ -0,0 +1,261 @@
+"""
+Module utilitaire: Classifieur d'intentions (TF-IDF de n-grammes de caractères + modèle linéaire)
+Entraîné sur le corpus de questions françaises de data/assistant, modèle persisté en .npz
+Entraînement hors ligne (avant le déploiement): python -m modules.intent_classifier --train
+Auteurs: Asma Bélkahla & Monia Selleoui
+"""
+
+import argparse
+import os
+import hashlib
+import tempfile
+import zipfile
+import numpy as np
+import pandas as pd
+from collections import Counter
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from typing import List, Optional, Sequence, Tuple
+
+_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'assistant')
+DEFAULT_CORPUS_PATH = os.path.join(_DATA_DIR, 'intent_corpus.csv')
+DEFAULT_MODEL_PATH = os.path.join(_DATA_DIR, 'intent_model.npz')
+
+
+def _file_hash(path: str) -> str:
+    """Empreinte du corpus (le modèle est réentraîné si le corpus change)"""
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+class IntentClassifier:
+    """
+    Classifieur linéaire sur TF-IDF de n-grammes de caractères
+    Seuls le vocabulaire, les poids IDF et les coefficients sont conservés:
+    un lot de requêtes = une matrice creuse × une matrice de poids
+    """
+
+    VECTORIZER_PARAMS = {
+        'analyzer': 'char_wb',
+        'ngram_range': (2, 4),
+        'lowercase': True,
+        'strip_accents': 'unicode'
+    }
+
+    def __init__(
+        self,
+        classes: Sequence[str],
+        features: Sequence[str],
+        idf: np.ndarray,
+        coef: np.ndarray,
+        intercept: np.ndarray,
+        corpus_hash: str = ''
+    ):
+        self.classes = np.asarray(classes, dtype=str)
+        self.features = np.asarray(features, dtype=str)
+        self.idf = np.asarray(idf, dtype=np.float64)
+        self.weights = np.ascontiguousarray(np.asarray(coef, dtype=np.float64).T)  # (n_features, n_classes)
+        self.intercept = np.asarray(intercept, dtype=np.float64)
+        self.corpus_hash = corpus_hash
+        self._vocabulary = {feature: i for i, feature in enumerate(self.features.tolist())}
+        self._analyzer = TfidfVectorizer(**self.VECTORIZER_PARAMS).build_analyzer()
+
+    @classmethod
+    def fit(cls, texts: Sequence[str], labels: Sequence[str], C: float = 10.0,
+            corpus_hash: str = '') -> 'IntentClassifier':
+        """Entraîne le vectoriseur (tf sous-linéaire, norme L2) et la régression logistique"""
+        vectorizer = TfidfVectorizer(sublinear_tf=True, **cls.VECTORIZER_PARAMS)
+        X = vectorizer.fit_transform(texts)
+        model = LogisticRegression(C=C, max_iter=3000).fit(X, labels)
+        return cls(model.classes_, vectorizer.get_feature_names_out(), vectorizer.idf_,
+                   model.coef_, model.intercept_, corpus_hash)
+
+    @classmethod
+    def from_csv(cls, path: str = DEFAULT_CORPUS_PATH) -> 'IntentClassifier':
+        """Entraîne sur un corpus (colonnes text, intent)"""
+        corpus = pd.read_csv(path, dtype=str).dropna()
+        return cls.fit(corpus['text'].tolist(), corpus['intent'].tolist(),
+                       corpus_hash=_file_hash(path))
+
+    def save(self, path: str = DEFAULT_MODEL_PATH):
+        """
+        Sauvegarde le modèle (tableaux numpy uniquement, sans pickle)
+        Écriture dans un fichier temporaire puis os.replace: un processus qui lit
+        en même temps voit l'ancien fichier ou le nouveau, jamais un fichier partiel
+        """
+        fd, tmp_path = tempfile.mkstemp(prefix='.intent_model-', suffix='.npz',
+                                        dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez_compressed(
+                    f, classes=self.classes, features=self.features, idf=self.idf,
+                    coef=self.weights.T, intercept=self.intercept, corpus_hash=np.array(self.corpus_hash)
+                )
+            os.chmod(tmp_path, 0o644)  # mkstemp crée en 0600
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_MODEL_PATH) -> 'IntentClassifier':
+        """Charge un modèle sauvegardé"""
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data['classes'], data['features'], data['idf'], data['coef'],
+                       data['intercept'], str(data['corpus_hash']))
+
+    @classmethod
+    def load_or_train(
+        cls,
+        corpus_path: str = DEFAULT_CORPUS_PATH,
+        model_path: str = DEFAULT_MODEL_PATH
+    ) -> Optional['IntentClassifier']:
+        """
+        Modèle sauvegardé s'il correspond au corpus, sinon entraînement puis sauvegarde
+        None si le corpus est absent
+        """
+        if not os.path.exists(corpus_path):
+            return None
+        corpus_hash = _file_hash(corpus_path)
+
+        if os.path.exists(model_path):
+            try:
+                classifier = cls.load(model_path)
+                if classifier.corpus_hash == corpus_hash:
+                    return classifier
+            except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+                pass  # Fichier illisible ou tronqué: réentraînement
+
+        classifier = cls.from_csv(corpus_path)
+        try:
+            classifier.save(model_path)
+        except OSError:
+            pass  # Dossier en lecture seule: modèle gardé en mémoire
+        return classifier
+
+    def transform(self, queries: Sequence[str]) -> sparse.csr_matrix:
+        """Matrice TF-IDF (une ligne par requête, normalisée L2)"""
+        indptr = [0]
+        indices = []
+        counts = []
+        for query in queries:
+            row = Counter(
+                j for j in map(self._vocabulary.get, self._analyzer(query)) if j is not None
+            )
+            indices.extend(row)
+            counts.extend(row.values())
+            indptr.append(len(indices))
+
+        indices = np.asarray(indices, dtype=np.int32)
+        data = (1 + np.log(np.asarray(counts, dtype=np.float64))) * self.idf[indices]
+        row_ids = np.repeat(np.arange(len(queries)), np.diff(indptr))
+        norms = np.sqrt(np.bincount(row_ids, data ** 2, minlength=len(queries)))
+        data /= norms[row_ids]
+
+        return sparse.csr_matrix(
+            (data, indices, np.asarray(indptr)), shape=(len(queries), len(self.features))
+        )
+
+    def predict_proba(self, queries: Sequence[str]) -> np.ndarray:
+        """Probabilités (requêtes × classes), softmax des scores linéaires"""
+        scores = self.transform(queries) @ self.weights + self.intercept
+        scores -= scores.max(axis=1, keepdims=True)
+        proba = np.exp(scores)
+        return proba / proba.sum(axis=1, keepdims=True)
+
+    def predict(self, queries: Sequence[str]) -> List[Tuple[str, float]]:
+        """(intention, probabilité) la plus probable pour chaque requête"""
+        if not len(queries):
+            return []
+        proba = self.predict_proba(queries)
+        best = proba.argmax(axis=1)
+        return [(str(self.classes[i]), float(p)) for i, p in zip(best, proba[np.arange(len(best)), best])]
+
+
+# ===== TESTS =====
+def test_intent_classifier():
+    """Tests du classifieur d'intentions"""
+    print("=== TESTS DU CLASSIFIEUR D'INTENTIONS ===\n")
+
+    import time
+    from sklearn.model_selection import train_test_split
+
+    corpus = pd.read_csv(DEFAULT_CORPUS_PATH)
+    print(f"Corpus: {len(corpus)} questions, {corpus['intent'].nunique()} intentions")
+
+    # Test 1: Vectorisation identique à scikit-learn
+    classifier = IntentClassifier.from_csv()
+    vectorizer = TfidfVectorizer(sublinear_tf=True, **IntentClassifier.VECTORIZER_PARAMS)
+    X = vectorizer.fit_transform(corpus['text'])
+    model = LogisticRegression(C=10.0, max_iter=3000).fit(X, corpus['intent'])
+    queries = ["Je veux sécher pour l'été", "Salut !", "Quelle dose de riz ?", "zzz"]
+    assert np.allclose(classifier.predict_proba(queries),
+                       model.predict_proba(vectorizer.transform(queries))), "Probabilités différentes"
+    for query, (intent, proba) in zip(queries, classifier.predict(queries)):
+        print(f"  {query!r:32} -> {intent} ({proba:.2f})")
+
+    # Test 2: Persistance
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '_test_intent_model.npz')
+    try:
+        classifier.save(path)
+        loaded = IntentClassifier.load(path)
+    finally:
+        os.remove(path)
+    assert loaded.corpus_hash == classifier.corpus_hash
+    assert np.array_equal(loaded.predict_proba(queries), classifier.predict_proba(queries))
+    assert not [name for name in os.listdir(os.path.dirname(path)) if name.startswith('.intent_model-')], \
+        "Fichier temporaire laissé après la sauvegarde"
+
+    # Fichier tronqué (écriture interrompue): réentraînement au lieu d'une exception
+    try:
+        with open(path, 'wb') as f:
+            f.write(b'PK\x03\x04' + b'\x00' * 10)
+        recovered = IntentClassifier.load_or_train(model_path=path)
+    finally:
+        os.remove(path)
+    assert recovered.corpus_hash == classifier.corpus_hash, "Modèle réentraîné sur le corpus"
+
+    # Test 3: Généralisation sur des questions non vues
+    train, test = train_test_split(corpus, test_size=0.25, stratify=corpus['intent'], random_state=0)
+    held_out = IntentClassifier.fit(train['text'].tolist(), train['intent'].tolist())
+    predicted = [intent for intent, _ in held_out.predict(test['text'].tolist())]
+    accuracy = np.mean(np.array(predicted) == test['intent'].to_numpy())
+    print(f"\nPrécision sur {len(test)} questions non vues: {accuracy:.0%}")
+    assert accuracy > 0.5
+
+    # Test 4: Latence par requête (affichée seulement: dépend de la charge de la machine)
+    latencies = []
+    for query in (test['text'].tolist() * 10)[:1000]:
+        start = time.perf_counter()
+        classifier.predict([query])
+        latencies.append(time.perf_counter() - start)
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1e6
+    start = time.perf_counter()
+    classifier.predict(corpus['text'].tolist())
+    batch = (time.perf_counter() - start) / len(corpus) * 1e6
+    print(f"Latence: p50 {p50:.0f} µs, p99 {p99:.0f} µs; par lot: {batch:.0f} µs/requête")
+    print()
+
+    print("✅ Tous les tests passés!\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Classifieur d'intentions de l'assistant")
+    parser.add_argument('--train', action='store_true',
+                        help="Entraîne sur le corpus et sauvegarde le modèle (sinon: tests)")
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS_PATH)
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH)
+    args = parser.parse_args(argv)
+
+    if not args.train:
+        test_intent_classifier()
+        return
+    classifier = IntentClassifier.from_csv(args.corpus)
+    classifier.save(args.model)
+    print(f"Modèle entraîné: {len(classifier.classes)} intentions, {len(classifier.features)} n-grammes "
+          f"-> {os.path.abspath(args.model)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,11 +6,20 @@ Auteurs: Asma Bélkahla & Monia Selleoui
 
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import random
 
+try:
+    from .variety_tracker import VarietyTracker
+    from .compact_plan import CompactMealPlan
+    from .plan_optimizer import PlanImprover
+except ImportError:
+    from variety_tracker import VarietyTracker
+    from compact_plan import CompactMealPlan
+    from plan_optimizer import PlanImprover
+
 @dataclass
 class MealPlanPreferences:
     """Préférences utilisateur pour la génération de plan"""
@@ -20,6 +29,47 @@ class MealPlanPreferences:
     prep_time: str = 'Moyen'  # 'Rapide', 'Moyen', 'Élaboré'
     diet_type: List[str] = field(default_factory=lambda: ['Omnivore'])
     exclude_foods: List[str] = field(default_factory=list)
+    horizon_days: int = 7  # Durée du programme (jours)
+    start_date: Optional[date] = None  # Par défaut: aujourd'hui
+    periodization: List[Dict[str, float]] = field(default_factory=list)  # Multiplicateurs par semaine (cycliques)
+    improve_ms: int = 0  # Budget d'amélioration locale après génération (0 = désactivé)
+
+class PlanStatsAccumulator:
+    """
+    Statistiques courantes d'un plan, mises à jour jour par jour
+    """
+    
+    def __init__(self):
+        self.num_days = 0
+        self.total_calories = 0
+        self.total_proteins = 0
+        self.total_carbs = 0
+        self.total_fats = 0
+        self.unique_foods = set()
+    
+    def add_day(self, day_meals: Dict[str, Dict]):
+        """Ajoute les repas d'une journée aux totaux"""
+        for meal in day_meals.values():
+            self.total_calories += meal['calories']
+            self.total_proteins += meal['proteines']
+            self.total_carbs += meal['glucides']
+            self.total_fats += meal['lipides']
+            self.unique_foods.update(meal['aliments'])
+        self.num_days += 1
+    
+    def snapshot(self) -> Dict:
+        """Statistiques sur les jours ajoutés jusqu'ici"""
+        num_days = max(self.num_days, 1)
+        
+        return {
+            'days_generated': self.num_days,
+            'avg_daily_calories': self.total_calories / num_days,
+            'avg_daily_proteins': self.total_proteins / num_days,
+            'avg_daily_carbs': self.total_carbs / num_days,
+            'avg_daily_fats': self.total_fats / num_days,
+            'unique_foods_count': len(self.unique_foods),
+            'variety_score': len(self.unique_foods) / (num_days * 4) * 100  # % de variété
+        }
 
 class MealPlanGenerator:
     """
@@ -32,6 +82,29 @@ class MealPlanGenerator:
         'Collation', 'Dîner', 'Collation du soir'
     ]
     
+    DAY_NAMES = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
+    
+    # Colonnes de la matrice de macros (ordre de CompactMealPlan)
+    MACRO_COLUMNS = ['Caloric Value', 'Protein', 'Carbohydrates', 'Fat']
+    
+    # Périodisation: multiplicateurs appliqués semaine par semaine (cycle)
+    PERIODIZATION_PRESETS = {
+        'Constante': [],
+        'Cycle 3+1 (semaine allégée)': [
+            {}, {}, {},
+            {'calories': 0.90, 'carbs': 0.85}
+        ],
+        'Vagues glucidiques': [
+            {'calories': 1.05, 'carbs': 1.10},
+            {'calories': 0.95, 'carbs': 0.90}
+        ],
+        'Progression': [
+            {},
+            {'calories': 1.03, 'carbs': 1.05},
+            {'calories': 1.06, 'carbs': 1.10}
+        ]
+    }
+    
     MEAL_CALORIE_RATIOS = {
         'Petit-déjeuner': 0.25,
         'Collation matinale': 0.10,
@@ -63,6 +136,7 @@ class MealPlanGenerator:
     def __init__(self, food_df: pd.DataFrame, recommender):
         self.food_df = food_df
         self.recommender = recommender
+        self.macro_matrix = food_df[self.MACRO_COLUMNS].fillna(0).to_numpy(dtype=np.float32)
         self._categorize_foods()
     
     def _categorize_foods(self):
@@ -108,6 +182,18 @@ class MealPlanGenerator:
             # Glucides généraux
             if row['Carbohydrates'] > 20:
                 self.categories['glucide'].append(food_name)
+        
+        # Mêmes catégories en identifiants de lignes (optimisation du plan)
+        self.category_ids = {
+            category: np.flatnonzero(self.food_df['food'].isin(set(names)).to_numpy())
+            for category, names in self.categories.items()
+        }
+    
+    def meal_template(self, meal_name: str) -> Dict:
+        """Structure (catégories + portions) d'un repas"""
+        if meal_name in ['Collation matinale', 'Collation', 'Collation du soir']:
+            return self.MEAL_TEMPLATES['Collation']
+        return self.MEAL_TEMPLATES.get(meal_name, self.MEAL_TEMPLATES['Déjeuner'])
     
     def _select_food_for_slot(
         self,
@@ -115,11 +201,13 @@ class MealPlanGenerator:
         calorie_target: float,
         macro_target: Dict[str, float],
         used_foods: List[str],
-        goal: str
-    ) -> Tuple[str, float]:
+        goal: str,
+        variety: Optional[VarietyTracker] = None
+    ) -> Tuple[str, float, int]:
         """
         Sélectionne un aliment pour un slot du repas
-        Retourne (nom_aliment, portion_grammes)
+        Retourne (nom_aliment, portion_grammes, id_aliment)
+        Avec `variety`, les exclusions passent par le masque de bitsets
         """
         # Import du NutritionalTarget depuis le module 2
         try:
@@ -143,11 +231,26 @@ class MealPlanGenerator:
             goal=goal
         )
         
-        recommendations = self.recommender.recommend_foods(
-            target, 
-            n_recommendations=20,
-            exclude_foods=used_foods
-        )
+        if variety is not None:
+            recommendations = self.recommender.recommend_foods(
+                target,
+                n_recommendations=20,
+                exclude_mask=variety.mask()
+            )
+            
+            # Fenêtre trop restrictive: on ne garde que l'exclusion du jour
+            if recommendations.empty:
+                recommendations = self.recommender.recommend_foods(
+                    target,
+                    n_recommendations=20,
+                    exclude_mask=variety.mask(include_window=False)
+                )
+        else:
+            recommendations = self.recommender.recommend_foods(
+                target, 
+                n_recommendations=20,
+                exclude_foods=used_foods
+            )
         
         # Filtrer par catégorie si disponible
         if self.categories.get(category) and self.categories[category]:
@@ -158,7 +261,7 @@ class MealPlanGenerator:
                 recommendations = cat_foods
         
         if recommendations.empty:
-            return None, 0
+            return None, 0, -1
         
         # Sélectionner aléatoirement parmi les top 5
         top_foods = recommendations.head(5)
@@ -170,7 +273,7 @@ class MealPlanGenerator:
         else:
             portion = 100
         
-        return selected['food'], portion
+        return selected['food'], portion, int(selected['food_id'])
     
     def _generate_meal(
         self,
@@ -178,20 +281,20 @@ class MealPlanGenerator:
         calorie_target: float,
         macro_targets: Dict[str, float],
         goal: str,
-        used_foods_today: List[str]
+        used_foods_today: List[str],
+        variety: Optional[VarietyTracker] = None
     ) -> Dict:
         """
         Génère un repas complet
         """
         # Obtenir le template
-        if meal_name in ['Collation matinale', 'Collation', 'Collation du soir']:
-            template = self.MEAL_TEMPLATES['Collation']
-        else:
-            template = self.MEAL_TEMPLATES.get(meal_name, self.MEAL_TEMPLATES['Déjeuner'])
+        template = self.meal_template(meal_name)
         
         meal = {
             'nom': meal_name,
             'aliments': [],
+            'food_ids': [],
+            'slots': [],  # Indice dans la structure du template (un slot sans aliment est sauté)
             'portions': [],
             'calories': 0,
             'proteines': 0,
@@ -213,21 +316,24 @@ class MealPlanGenerator:
                 'fats': macro_targets['fats'] * portions_ratio[i]
             }
             
-            food, portion = self._select_food_for_slot(
+            food, portion, food_id = self._select_food_for_slot(
                 category,
                 slot_calories,
                 slot_macros,
                 used_foods_today,
-                goal
+                goal,
+                variety
             )
             
             if food:
                 # Récupérer les données nutritionnelles
-                food_data = self.food_df[self.food_df['food'] == food].iloc[0]
+                food_data = self.food_df.iloc[food_id]
                 
                 # Calculer apport
                 factor = portion / 100
                 meal['aliments'].append(food)
+                meal['food_ids'].append(food_id)
+                meal['slots'].append(i)
                 meal['portions'].append(portion)
                 meal['calories'] += food_data['Caloric Value'] * factor
                 meal['proteines'] += food_data['Protein'] * factor
@@ -235,7 +341,10 @@ class MealPlanGenerator:
                 meal['lipides'] += food_data['Fat'] * factor
                 
                 meal['description'].append(f"{food} ({portion:.0f}g)")
-                used_foods_today.append(food)
+                if variety is not None:
+                    variety.use(food_id)
+                else:
+                    used_foods_today.append(food)
         
         return meal
     
@@ -244,13 +353,17 @@ class MealPlanGenerator:
         day_name: str,
         nutritional_needs: Dict,
         preferences: MealPlanPreferences,
-        used_foods_week: List[str] = None
+        used_foods_week: List[str] = None,
+        variety: Optional[VarietyTracker] = None
     ) -> Dict[str, Dict]:
         """
         Génère un plan pour une journée
+        La variété entre les jours est portée par `variety` (bitsets d'ids);
+        `used_foods_week` n'est conservé que pour compatibilité
         """
-        if used_foods_week is None:
-            used_foods_week = []
+        if variety is None:
+            # Exclusion intra-journée uniquement
+            variety = VarietyTracker(len(self.food_df), cooldown_days=1)
         
         day_plan = {}
         used_foods_today = []
@@ -280,13 +393,181 @@ class MealPlanGenerator:
                 meal_targets['calories'],
                 meal_targets,
                 goal,
-                used_foods_today
+                used_foods_today,
+                variety
             )
             
             day_plan[meal_name] = meal
         
         return day_plan
     
+    @staticmethod
+    def _periodized_needs(
+        nutritional_needs: Dict,
+        week_index: int,
+        periodization: List[Dict[str, float]]
+    ) -> Dict:
+        """
+        Applique les multiplicateurs de la semaine aux besoins (cycle sur la liste)
+        """
+        if not periodization:
+            return nutritional_needs
+        
+        factors = periodization[week_index % len(periodization)]
+        if not factors:
+            return nutritional_needs
+        
+        macros = dict(nutritional_needs['macros'])
+        for key in ('proteins', 'carbs', 'fats'):
+            macros[key] = macros[key] * factors.get(key, 1.0)
+        
+        needs = dict(nutritional_needs)
+        needs['target_calories'] = nutritional_needs['target_calories'] * factors.get('calories', 1.0)
+        needs['macros'] = macros
+        return needs
+    
+    def daily_targets(
+        self,
+        nutritional_needs: Dict,
+        preferences: MealPlanPreferences,
+        n_days: int
+    ) -> np.ndarray:
+        """
+        Cibles journalières (n_jours, 4) calories/protéines/glucides/lipides,
+        périodisation comprise
+        """
+        targets = np.empty((n_days, 4))
+        for i in range(n_days):
+            needs = self._periodized_needs(nutritional_needs, i // 7, preferences.periodization)
+            targets[i] = (
+                needs['target_calories'],
+                needs['macros']['proteins'],
+                needs['macros']['carbs'],
+                needs['macros']['fats']
+            )
+        return targets
+    
+    def format_day_label(self, day_date: date) -> str:
+        """Libellé d'affichage d'une journée datée (ex: 'Lundi 03/11')"""
+        return f"{self.DAY_NAMES[day_date.weekday()]} {day_date:%d/%m}"
+    
+    def iter_plan_days(
+        self,
+        nutritional_needs: Dict,
+        preferences: MealPlanPreferences,
+        n_days: Optional[int] = None,
+        start_date: Optional[date] = None
+    ) -> Iterator[Tuple[date, Dict[str, Dict]]]:
+        """
+        Génère un programme de N jours sous forme de flux (date, plan_du_jour)
+        Fenêtre de variété glissante de `variety_days` jours et périodisation
+        hebdomadaire; seul le jour courant est conservé en mémoire
+        """
+        if n_days is None:
+            n_days = preferences.horizon_days
+        if start_date is None:
+            start_date = preferences.start_date or date.today()
+        
+        variety = VarietyTracker(len(self.food_df), cooldown_days=preferences.variety_days)
+        
+        for i in range(n_days):
+            day_date = start_date + timedelta(days=i)
+            week_needs = self._periodized_needs(
+                nutritional_needs, i // 7, preferences.periodization
+            )
+            
+            day_plan = self.generate_day_plan(
+                self.DAY_NAMES[day_date.weekday()],
+                week_needs,
+                preferences,
+                variety=variety
+            )
+            variety.next_day()
+            
+            yield day_date, day_plan
+    
+    def stream_plan(
+        self,
+        nutritional_needs: Dict,
+        preferences: MealPlanPreferences,
+        n_days: Optional[int] = None,
+        start_date: Optional[date] = None
+    ) -> Iterator[Tuple[date, Dict[str, Dict], Dict]]:
+        """
+        Comme iter_plan_days, mais chaque jour terminé est accompagné
+        des statistiques courantes du plan: (date, plan_du_jour, stats)
+        """
+        stats = PlanStatsAccumulator()
+        
+        for day_date, day_plan in self.iter_plan_days(
+            nutritional_needs, preferences, n_days=n_days, start_date=start_date
+        ):
+            stats.add_day(day_plan)
+            yield day_date, day_plan, stats.snapshot()
+    
+    def new_compact_plan(self, start_date: date) -> CompactMealPlan:
+        """Plan compact vide, aligné sur le catalogue du générateur"""
+        return CompactMealPlan(start_date, catalog_size=len(self.food_df))
+    
+    def generate_compact_plan(
+        self,
+        nutritional_needs: Dict,
+        preferences: MealPlanPreferences
+    ) -> CompactMealPlan:
+        """
+        Génère tout l'horizon directement au format compact
+        """
+        start_date = preferences.start_date or date.today()
+        plan = self.new_compact_plan(start_date)
+        
+        for _, day_plan in self.iter_plan_days(nutritional_needs, preferences, start_date=start_date):
+            plan.append_day(day_plan, self.MEAL_NAMES, self.macro_matrix)
+        
+        if preferences.improve_ms > 0:
+            self.improve_plan(plan, nutritional_needs, preferences)
+        
+        plan.trim()
+        return plan
+    
+    def slot_categories(self, plan: CompactMealPlan) -> List[Optional[str]]:
+        """
+        Catégorie attendue pour chaque ligne du plan (pool de remplacement)
+        Le slot enregistré est l'indice dans la structure du template, pas le rang de l'aliment
+        """
+        rec = plan.records
+        categories = []
+        for meal_idx, slot in zip(rec['meal'].tolist(), rec['slot'].tolist()):
+            structure = self.meal_template(self.MEAL_NAMES[meal_idx])['structure']
+            categories.append(structure[slot] if slot < len(structure) else None)
+        return categories
+    
+    def improve_plan(
+        self,
+        plan: CompactMealPlan,
+        nutritional_needs: Dict,
+        preferences: MealPlanPreferences,
+        time_budget_ms: Optional[float] = None,
+        seed: Optional[int] = None
+    ) -> Dict:
+        """
+        Étape optionnelle: recherche locale (recuit simulé) sur un plan compact
+        Retourne le résumé de l'optimisation
+        """
+        if time_budget_ms is None:
+            time_budget_ms = preferences.improve_ms or 200
+        
+        slot_categories = self.slot_categories(plan)
+        
+        improver = PlanImprover(
+            self.macro_matrix,
+            self.category_ids,
+            cooldown_days=preferences.variety_days,
+            seed=seed
+        )
+        targets = self.daily_targets(nutritional_needs, preferences, plan.n_days)
+        
+        return improver.improve(plan, targets, slot_categories, time_budget_ms=time_budget_ms)
+    
     def generate_week_plan(
         self,
         nutritional_needs: Dict,
@@ -295,23 +576,13 @@ class MealPlanGenerator:
         """
         Génère un plan complet pour la semaine
         """
-        days = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
+        n_days = min(preferences.variety_days, len(self.DAY_NAMES))
         week_plan = {}
-        used_foods_week = []
         
-        for i in range(preferences.variety_days):
-            day_name = days[i]
-            day_plan = self.generate_day_plan(
-                day_name,
-                nutritional_needs,
-                preferences,
-                used_foods_week
-            )
+        # Pas de répétition d'un aliment avant `variety_days` jours
+        days_stream = self.iter_plan_days(nutritional_needs, preferences, n_days=n_days)
+        for day_name, (_, day_plan) in zip(self.DAY_NAMES, days_stream):
             week_plan[day_name] = day_plan
-            
-            # Ajouter les aliments utilisés
-            for meal in day_plan.values():
-                used_foods_week.extend(meal['aliments'])
         
         return week_plan
     
@@ -319,48 +590,34 @@ class MealPlanGenerator:
         """
         Formate le plan pour l'affichage (compatible avec Streamlit)
         """
-        formatted = {}
-        
-        for day, meals in week_plan.items():
-            formatted[day] = {}
-            for meal_name, meal_data in meals.items():
-                formatted[day][meal_name] = {
-                    'aliments': meal_data['description'],
-                    'calories': int(meal_data['calories']),
-                    'proteines': int(meal_data['proteines']),
-                    'glucides': int(meal_data['glucides']),
-                    'lipides': int(meal_data['lipides'])
-                }
-        
-        return formatted
+        return {
+            day: self.format_day_for_display(meals)
+            for day, meals in week_plan.items()
+        }
     
     def calculate_plan_stats(self, week_plan: Dict) -> Dict:
         """
         Calcule les statistiques du plan
         """
-        total_calories = 0
-        total_proteins = 0
-        total_carbs = 0
-        total_fats = 0
-        unique_foods = set()
-        
+        stats = PlanStatsAccumulator()
         for day_meals in week_plan.values():
-            for meal in day_meals.values():
-                total_calories += meal['calories']
-                total_proteins += meal['proteines']
-                total_carbs += meal['glucides']
-                total_fats += meal['lipides']
-                unique_foods.update(meal['aliments'])
-        
-        num_days = len(week_plan)
+            stats.add_day(day_meals)
         
+        return stats.snapshot()
+    
+    def format_day_for_display(self, day_meals: Dict[str, Dict]) -> Dict:
+        """
+        Formate une seule journée (affichage progressif)
+        """
         return {
-            'avg_daily_calories': total_calories / num_days,
-            'avg_daily_proteins': total_proteins / num_days,
-            'avg_daily_carbs': total_carbs / num_days,
-            'avg_daily_fats': total_fats / num_days,
-            'unique_foods_count': len(unique_foods),
-            'variety_score': len(unique_foods) / (num_days * 4) * 100  # % de variété
+            meal_name: {
+                'aliments': meal_data['description'],
+                'calories': int(meal_data['calories']),
+                'proteines': int(meal_data['proteines']),
+                'glucides': int(meal_data['glucides']),
+                'lipides': int(meal_data['lipides'])
+            }
+            for meal_name, meal_data in day_meals.items()
         }
 
 
@@ -450,6 +707,68 @@ def test_meal_plan_generator():
     print(f"Score de variété: {stats['variety_score']:.1f}%")
     print()
     
+    # Test 4: Programme multi-semaines en flux
+    print("Test 4: Programme de 2 semaines avec périodisation")
+    program_prefs = MealPlanPreferences(
+        meals_per_day=3,
+        variety_days=3,
+        horizon_days=14,
+        start_date=date(2024, 1, 1),
+        periodization=MealPlanGenerator.PERIODIZATION_PRESETS['Vagues glucidiques']
+    )
+    
+    program_days = list(generator.iter_plan_days(nutritional_needs, program_prefs))
+    week2_cal = sum(m['calories'] for m in program_days[7][1].values())
+    
+    print(f"Jours générés: {len(program_days)} "
+          f"({generator.format_day_label(program_days[0][0])} → {generator.format_day_label(program_days[-1][0])})")
+    print(f"Calories jour 8 (semaine basse): {week2_cal:.0f} kcal")
+    print()
+    assert len(program_days) == 14, "Horizon du programme incorrect"
+    assert program_days[7][0] == date(2024, 1, 8), "Dates du programme incorrectes"
+    
+    # Test 5: Flux avec statistiques courantes
+    print("Test 5: Génération en flux avec statistiques courantes")
+    streamed = []
+    for day_date, day_plan, running in generator.stream_plan(nutritional_needs, preferences, n_days=3):
+        streamed.append(running)
+        print(f"  {generator.format_day_label(day_date)}: {running['days_generated']} jour(s), "
+              f"{running['avg_daily_calories']:.0f} kcal/jour en moyenne")
+    print()
+    assert [r['days_generated'] for r in streamed] == [1, 2, 3], "Statistiques courantes incorrectes"
+    
+    # Test 6: Format compact: mêmes totaux que le plan en dictionnaires
+    print("Test 6: Plan compact du programme")
+    compact = generator.new_compact_plan(date(2024, 1, 1))
+    for _, program_day in program_days:
+        compact.append_day(program_day, generator.MEAL_NAMES, generator.macro_matrix)
+    day1_cal = sum(m['calories'] for m in program_days[0][1].values())
+    print(f"Jours compacts: {compact.n_days}, calories jour 1: {compact.daily_totals()[0, 0]:.0f} kcal")
+    print()
+    assert compact.n_days == 14, "Plan compact incomplet"
+    assert abs(compact.daily_totals()[0, 0] - day1_cal) < 1, "Totaux du plan compact incorrects"
+    
+    # Test 7: Slot sans aliment: les slots suivants gardent leur catégorie
+    print("Test 7: Slot du template sauté")
+    select = generator._select_food_for_slot
+    generator._select_food_for_slot = lambda category, *args: (
+        (None, 0, None) if category == 'féculent' else select(category, *args)
+    )
+    try:
+        lunch = generator._generate_meal('Déjeuner', 700, {'proteins': 45, 'carbs': 70, 'fats': 25},
+                                         'Maintien', [])
+    finally:
+        del generator._select_food_for_slot
+    structure = generator.meal_template('Déjeuner')['structure']
+    skipped = generator.new_compact_plan(date(2024, 1, 1))
+    skipped.append_day({'Déjeuner': lunch}, generator.MEAL_NAMES, generator.macro_matrix)
+    categories = generator.slot_categories(skipped)
+    print(f"Slots: {lunch['slots']} -> {categories}")
+    print()
+    assert 'féculent' not in categories and len(categories) == len(lunch['food_ids'])
+    assert categories == [structure[i] for i in lunch['slots']], "Catégories décalées après un slot sauté"
+    assert skipped.records['slot'].tolist() == lunch['slots']
+    
     # Validation
     assert len(day_plan) == preferences.meals_per_day, "Nombre de repas incorrect"
     assert 1800 <= total_cal <= 2200, "Calories totales hors cible"
@@ -4,19 +4,233 @@ Système basé sur des règles et templates (sans API externe)
 """
 
 import re
-from typing import Dict, List, Optional, Tuple
+import time
+import asyncio
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
 from dataclasses import dataclass
 import pandas as pd
 
+try:
+    from .food_matcher import FoodNameMatcher
+    from .food_aliases import FoodAliasIndex
+    from .food_cards import FoodAnalysisCards
+    from .food_catalog import with_display_fields
+    from .intent_classifier import IntentClassifier
+    from .nutrition_calculator import NutritionalCalculator
+except ImportError:
+    from food_matcher import FoodNameMatcher
+    from food_aliases import FoodAliasIndex
+    from food_cards import FoodAnalysisCards
+    from food_catalog import with_display_fields
+    from intent_classifier import IntentClassifier
+    from nutrition_calculator import NutritionalCalculator
+
 @dataclass
 class ConversationContext:
+    """
+    État propre à une conversation (une session utilisateur)
+    Passé à chaque appel: l'assistant lui-même reste partagé et en lecture seule
+    """
     user_profile: Optional[Dict] = None
     nutritional_needs: Optional[Dict] = None
     recent_queries: List[str] = None
     
+    MAX_RECENT_QUERIES = 20
+    
     def __post_init__(self):
         if self.recent_queries is None:
             self.recent_queries = []
+    
+    def remember(self, query: str):
+        """Mémorise une question (historique borné)"""
+        self.recent_queries.append(query)
+        if len(self.recent_queries) > self.MAX_RECENT_QUERIES:
+            del self.recent_queries[0]
+
+@dataclass(frozen=True)
+class IntentMatch:
+    intent: str
+    start: int  # positions dans la requête en minuscules
+    end: int
+    text: str
+
+
+class IntentMatcher:
+    """
+    Reconnaissance d'intentions en une seule passe
+    Les patterns (langages finis: groupes, alternatives, classes de caractères)
+    sont développés en mots-clés puis compilés en une regex en forme de trie:
+    une recherche par occurrence, correspondance la plus longue à chaque position
+    Les patterns non développables sont testés séparément (repli)
+    """
+    
+    _UNSUPPORTED = set('\\.*+?{}^$')
+    
+    def __init__(self, patterns: Dict[str, str]):
+        self.intents = list(patterns)
+        self._priority = {intent: i for i, intent in enumerate(self.intents)}
+        
+        keywords = {}
+        self._fallback = []
+        for intent, pattern in patterns.items():
+            expanded = self._expand(pattern)
+            if expanded is None:
+                self._fallback.append((intent, re.compile(f"(?=({pattern}))")))
+                continue
+            for keyword in expanded:
+                keywords.setdefault(keyword, set()).add(intent)
+        
+        # Pour chaque mot-clé: intentions de tous ses préfixes (plus long par intention),
+        # car une correspondance plus courte au même endroit en est forcément un préfixe
+        self._hits = {}
+        for keyword in keywords:
+            best = {}
+            for length in range(1, len(keyword) + 1):
+                for intent in keywords.get(keyword[:length], ()):
+                    best[intent] = length
+            self._hits[keyword] = sorted(
+                best.items(), key=lambda item: self._priority[item[0]]
+            )
+        
+        self.regex = re.compile(self._trie_pattern(keywords)) if keywords else None
+    
+    @classmethod
+    def _expand(cls, pattern: str) -> Optional[List[str]]:
+        """Liste des chaînes reconnues par le pattern, None si langage non fini"""
+        if cls._UNSUPPORTED & set(pattern):
+            return None
+        pos = 0
+        
+        def alternation():
+            nonlocal pos
+            words = sequence()
+            while pos < len(pattern) and pattern[pos] == '|':
+                pos += 1
+                words += sequence()
+            return words
+        
+        def sequence():
+            nonlocal pos
+            words = ['']
+            while pos < len(pattern) and pattern[pos] not in '|)':
+                char = pattern[pos]
+                if char == '(':
+                    pos += 1
+                    options = alternation()
+                    pos += 1
+                elif char == '[':
+                    end = pattern.index(']', pos)
+                    options = list(pattern[pos + 1:end])
+                    pos = end + 1
+                else:
+                    options = [char]
+                    pos += 1
+                words = [w + o for w in words for o in options]
+            return words
+        
+        return alternation()
+    
+    @staticmethod
+    def _trie_pattern(words) -> str:
+        """Regex factorisée par préfixes communs (quantificateurs gloutons = plus long)"""
+        trie = {}
+        for word in words:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[''] = {}
+        
+        def build(node):
+            branches = [re.escape(char) + build(child)
+                        for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ''
+            if '' in node:
+                return f"(?:{'|'.join(branches)})?"
+            return branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        
+        return build(trie)
+    
+    def find_all(self, query: str) -> List[IntentMatch]:
+        """Toutes les intentions trouvées, dans l'ordre d'apparition"""
+        query_lower = query.lower()
+        matches = []
+        
+        if self.regex is not None:
+            match = self.regex.search(query_lower)
+            while match:
+                start = match.start()
+                for intent, length in self._hits[match.group()]:
+                    matches.append(IntentMatch(intent, start, start + length,
+                                               query_lower[start:start + length]))
+                match = self.regex.search(query_lower, start + 1)
+        
+        for intent, regex in self._fallback:
+            for match in regex.finditer(query_lower):
+                start, end = match.span(1)
+                matches.append(IntentMatch(intent, start, end, match.group(1)))
+        
+        if self._fallback:
+            matches.sort(key=lambda m: (m.start, self._priority[m.intent]))
+        return matches
+    
+    def intents_in(self, query: str) -> List[str]:
+        """Intentions distinctes, triées par priorité (ordre de PATTERNS)"""
+        found = {m.intent for m in self.find_all(query)}
+        return sorted(found, key=self._priority.__getitem__)
+    
+    def primary(self, query: str) -> Optional[str]:
+        """Intention prioritaire (même résultat que le parcours séquentiel des patterns)"""
+        query_lower = query.lower()
+        best = None
+        
+        if self.regex is not None:
+            match = self.regex.search(query_lower)
+            while match:
+                intent = self._hits[match.group()][0][0]
+                if best is None or self._priority[intent] < self._priority[best]:
+                    best = intent
+                    if self._priority[best] == 0:
+                        return best
+                match = self.regex.search(query_lower, match.start() + 1)
+        
+        for intent, regex in self._fallback:
+            if (best is None or self._priority[intent] < self._priority[best]) \
+                    and regex.search(query_lower):
+                best = intent
+        return best
+    
+    def primary_batch(self, queries: Sequence[str]) -> List[Optional[str]]:
+        """
+        Intention prioritaire de chaque requête, en une seule recherche sur le lot
+        Les requêtes sont jointes par un saut de ligne (absent des mots-clés):
+        aucune correspondance ne peut chevaucher deux requêtes
+        """
+        lowered = [query.lower() for query in queries]
+        best: List[Optional[str]] = [None] * len(lowered)
+        priority = self._priority
+        
+        if self.regex is not None and lowered:
+            text = '\n'.join(lowered)
+            offsets = list(accumulate((len(q) + 1 for q in lowered[:-1]), initial=0))
+            match = self.regex.search(text)
+            while match:
+                i = bisect_right(offsets, match.start()) - 1
+                intent = self._hits[match.group()][0][0]
+                if best[i] is None or priority[intent] < priority[best[i]]:
+                    best[i] = intent
+                match = self.regex.search(text, match.start() + 1)
+        
+        for intent, regex in self._fallback:
+            for i, query_lower in enumerate(lowered):
+                if (best[i] is None or priority[intent] < priority[best[i]]) \
+                        and regex.search(query_lower):
+                    best[i] = intent
+        return best
+
 
 class NutritionAssistant:
     """
@@ -41,6 +255,12 @@ class NutritionAssistant:
         'timing': r'(quand|heure|moment|timing)'
     }
     
+    # Seuil du classifieur (questions sans mot-clé reconnu par PATTERNS)
+    MIN_INTENT_CONFIDENCE = 0.4
+    
+    # Réponses mémorisées (intention + valeurs consommées par le template)
+    RESPONSE_CACHE_SIZE = 512
+    
     # Templates de réponses
     RESPONSE_TEMPLATES = {
         'petit_dejeuner': {
@@ -117,8 +337,8 @@ Objectif: {calories:.0f} kcal | {proteins:.0f}g protéines
 Si entraînement intense > 60 min:
 - 20-40g protéines rapides (whey, blanc poulet)
 - 0.5-1g/kg glucides selon objectif
-  * Perte: 0.5g/kg (ex: {weight}kg = {carbs_loss:.0f}g)
-  * Masse: 1g/kg (ex: {weight}kg = {carbs_gain:.0f}g)
+  * Perte: 0.5g/kg (ex: {weight:g}kg = {carbs_loss:.0f}g)
+  * Masse: 1g/kg (ex: {weight:g}kg = {carbs_gain:.0f}g)
 
 **Exemples pratiques:**
 
@@ -168,7 +388,7 @@ Si entraînement intense > 60 min:
 💧 **Hydratation optimale pour votre profil**
 
 **Besoin quotidien estimé:** {water:.1f} litres/jour
-(Basé sur: {weight}kg + activité {activity})
+(Basé sur: {weight:g}kg + activité {activity})
 
 **Répartition recommandée:**
 - Au réveil: 300-500ml (réhydratation nocturne)
@@ -196,13 +416,30 @@ Si entraînement intense > 60 min:
 """
     }
     
-    def __init__(self, food_df: pd.DataFrame, recommender):
-        self.food_df = food_df
+    def __init__(self, food_df: pd.DataFrame, recommender,
+                 alias_index: Optional[FoodAliasIndex] = None,
+                 intent_classifier: Optional[IntentClassifier] = None):
+        # Champs d'affichage partagés avec les pages (calculés une fois si absents)
+        self.food_df = food_df = with_display_fields(food_df)
         self.recommender = recommender
         self.context = ConversationContext()
+        self.intent_matcher = IntentMatcher(self.PATTERNS)
+        self.intent_classifier = (intent_classifier if intent_classifier is not None
+                                  else IntentClassifier.load_or_train())
+        self.food_matcher = FoodNameMatcher.from_catalog(food_df['food'].astype(str))
+        self.alias_index = alias_index if alias_index is not None else FoodAliasIndex.from_csv(food_df)
+        self.cards = FoodAnalysisCards(
+            food_df, recommender.features_scaled,
+            self.RESPONSE_TEMPLATES['analyse_aliment'],
+            self._rate_nutrient, self._analyze_food_for_goal
+        )
+        self._cached_response = lru_cache(maxsize=self.RESPONSE_CACHE_SIZE)(self._template_response)
     
     def set_context(self, profile: Dict, needs: Dict):
-        """Configure le contexte utilisateur"""
+        """
+        Configure le contexte par défaut (usage mono-utilisateur, scripts et tests)
+        Avec plusieurs sessions, passer un ConversationContext à answer_query
+        """
         self.context.user_profile = profile
         self.context.nutritional_needs = needs
     
@@ -211,39 +448,41 @@ Si entraînement intense > 60 min:
         Détecte l'intention de l'utilisateur
         Retourne (intent, confidence)
         """
-        query_lower = query.lower()
-        
-        # Chercher patterns
-        for intent, pattern in self.PATTERNS.items():
-            if re.search(pattern, query_lower):
-                return intent, 0.9
-        
-        # Intent par défaut
-        return 'general', 0.5
+        intent = self.intent_matcher.primary(query)
+        if intent is not None:
+            return intent, 0.9
+        return self._classify([query])[0]
+    
+    def _classify(self, queries: Sequence[str]) -> List[Tuple[str, float]]:
+        """
+        Repli sur le classifieur pour les questions sans mot-clé (un seul produit matriciel)
+        Confiance insuffisante: intention générale
+        """
+        if self.intent_classifier is None or not queries:
+            return [('general', 0.5)] * len(queries)
+        return [
+            (intent, proba) if proba >= self.MIN_INTENT_CONFIDENCE else ('general', 0.5)
+            for intent, proba in self.intent_classifier.predict(queries)
+        ]
+    
+    def detect_intents(self, query: str) -> List[IntentMatch]:
+        """Toutes les intentions présentes dans la requête, avec leurs positions"""
+        return self.intent_matcher.find_all(query)
+    
+    def _extract_food_id(self, query: str) -> Optional[int]:
+        """
+        Ligne du catalogue de l'aliment cité: noms du catalogue et alias,
+        mention la plus longue puis la première
+        """
+        mentions = self.food_matcher.find_all(query) + self.alias_index.find(query)
+        if not mentions:
+            return None
+        return min(mentions, key=lambda m: (m.start - m.end, m.start)).food_id
     
     def _extract_food_name(self, query: str) -> Optional[str]:
         """Extrait un nom d'aliment de la requête"""
-        query_lower = query.lower()
-        
-        # Chercher dans la base
-        for food in self.food_df['food'].values:
-            if food.lower() in query_lower:
-                return food
-        
-        # Mots clés communs
-        keywords = ['poulet', 'saumon', 'riz', 'avoine', 'œuf', 'banane', 
-                   'brocoli', 'quinoa', 'amande', 'yaourt', 'thon']
-        
-        for keyword in keywords:
-            if keyword in query_lower:
-                # Chercher correspondance partielle
-                matches = self.food_df[
-                    self.food_df['food'].str.contains(keyword, case=False, na=False)
-                ]
-                if not matches.empty:
-                    return matches.iloc[0]['food']
-        
-        return None
+        food_id = self._extract_food_id(query)
+        return self.food_df['food'].iloc[food_id] if food_id is not None else None
     
     def _rate_nutrient(self, value: float, nutrient_type: str) -> str:
         """Évalue un nutriment"""
@@ -293,15 +532,137 @@ Si entraînement intense > 60 min:
         
         return analyses.get(goal, analyses['Maintien'])(food_data)
     
-    def answer_query(self, query: str) -> str:
+    def answer_query(self, query: str, context: Optional[ConversationContext] = None) -> str:
         """
         Répond à une question utilisateur
+        context: conversation de l'utilisateur (contexte par défaut si absent)
+        Aucun état partagé n'est modifié: appels concurrents possibles sans verrou
         """
+        if context is None:
+            context = self.context
+        context.remember(query)
+        
         # Détection intention
         intent, confidence = self._detect_intent(query)
+        food_id = self._extract_food_id(query) if intent == 'analyse_aliment' else None
+        
+        return self._respond(query, intent, food_id, context, self.cards.render)
+    
+    def answer_queries(
+        self,
+        queries: Sequence[str],
+        contexts: Union[None, ConversationContext, Sequence[Optional[ConversationContext]]] = None
+    ) -> List[str]:
+        """
+        Répond à un lot de questions (mêmes réponses que answer_query, dans l'ordre)
+        contexts: un contexte commun ou un contexte par question
+        Intentions détectées en une passe sur le lot; chaque question distincte
+        n'est analysée qu'une fois et chaque fiche (aliment, objectif) rendue une fois
+        """
+        if contexts is None or isinstance(contexts, ConversationContext):
+            contexts = [contexts] * len(queries)
+        elif len(contexts) != len(queries):
+            raise ValueError("Un contexte par question attendu")
         
+        unique = list(dict.fromkeys(queries))
+        intents = self.intent_matcher.primary_batch(unique)
+        unmatched = [i for i, intent in enumerate(intents) if intent is None]
+        for i, (intent, _) in zip(unmatched, self._classify([unique[i] for i in unmatched])):
+            intents[i] = intent
+        analyses = {
+            query: (intent, self._extract_food_id(query) if intent == 'analyse_aliment' else None)
+            for query, intent in zip(unique, intents)
+        }
+        
+        rendered = {}
+        
+        def render(food_id: int, goal: str) -> str:
+            key = (food_id, goal)
+            if key not in rendered:
+                rendered[key] = self.cards.render(food_id, goal)
+            return rendered[key]
+        
+        answers = []
+        for query, context in zip(queries, contexts):
+            context = context if context is not None else self.context
+            context.remember(query)
+            answers.append(self._respond(query, *analyses[query], context, render))
+        return answers
+    
+    async def answer_async(
+        self,
+        query: str,
+        context: Optional[ConversationContext] = None,
+        executor=None
+    ) -> str:
+        """
+        Version asyncio de answer_query: le calcul tourne dans un pool de threads
+        (executor, pool par défaut de la boucle si absent) sans bloquer la boucle
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, self.answer_query, query, context)
+    
+    async def answer_queries_async(
+        self,
+        queries: Sequence[str],
+        contexts: Union[None, ConversationContext, Sequence[Optional[ConversationContext]]] = None,
+        executor=None
+    ) -> List[str]:
+        """Version asyncio de answer_queries (un lot = une tâche du pool)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, self.answer_queries, queries, contexts)
+    
+    def _template_response(self, intent: str, *values) -> str:
+        """
+        Formate le template d'une intention à partir des seules valeurs qu'il consomme
+        Appelé via _cached_response: un profil modifié donne une nouvelle clé,
+        les anciennes réponses sortent du cache (LRU borné)
+        Valeurs numériques converties en float par l'appelant: 80 et 80.0 ont la même
+        clé, elles doivent aussi donner le même texte
+        """
+        if intent == 'petit_dejeuner':
+            goal, calories, proteins = values
+            template = self.RESPONSE_TEMPLATES['petit_dejeuner'].get(goal, '')
+            return template.format(calories=calories, proteins=proteins)
+        
+        if intent == 'post_entrainement':
+            weight, = values
+            return self.RESPONSE_TEMPLATES['post_entrainement'].format(
+                weight=weight,
+                carbs_loss=weight * 0.5,
+                carbs_gain=weight * 1.0
+            )
+        
+        if intent == 'hydratation':
+            weight, activity_level = values
+            water = NutritionalCalculator.calculate_water_needs(weight, activity_level)
+            return self.RESPONSE_TEMPLATES['hydratation'].format(
+                water=water,
+                weight=weight,
+                activity=activity_level
+            )
+        
+        raise ValueError(f"Pas de template mis en cache pour l'intention {intent!r}")
+    
+    def response_cache_info(self):
+        """Statistiques du cache de réponses (hits, misses, taille)"""
+        return self._cached_response.cache_info()
+    
+    def clear_response_cache(self):
+        """Vide le cache de réponses (templates modifiés)"""
+        self._cached_response.cache_clear()
+    
+    def _respond(
+        self,
+        query: str,
+        intent: str,
+        food_id: Optional[int],
+        context: ConversationContext,
+        render: Callable[[int, str], str]
+    ) -> str:
+        """Réponse à partir de l'analyse de la requête et du contexte de la conversation"""
         # Pas de contexte
-        if not self.context.user_profile:
+        if not context.user_profile:
             return """
 ⚠️ **Profil non configuré**
 
@@ -313,32 +674,24 @@ Pour des recommandations personnalisées, merci de configurer votre profil avec:
 Je pourrai ensuite vous fournir des conseils adaptés! 💪
 """
         
-        profile = self.context.user_profile
-        needs = self.context.nutritional_needs
+        profile = context.user_profile
+        needs = context.nutritional_needs
         
         # Génération réponse selon intent
         if intent == 'petit_dejeuner':
-            goal = profile.get('goal', 'Maintien')
-            template = self.RESPONSE_TEMPLATES['petit_dejeuner'].get(goal, '')
-            
             meal_ratio = 0.25
-            return template.format(
-                calories=needs['target_calories'] * meal_ratio,
-                proteins=needs['macros']['proteins'] * meal_ratio
+            return self._cached_response(
+                intent,
+                profile.get('goal', 'Maintien'),
+                float(needs['target_calories'] * meal_ratio),
+                float(needs['macros']['proteins'] * meal_ratio)
             )
         
         elif intent == 'post_entrainement':
-            weight = profile['weight']
-            return self.RESPONSE_TEMPLATES['post_entrainement'].format(
-                weight=weight,
-                carbs_loss=weight * 0.5,
-                carbs_gain=weight * 1.0
-            )
+            return self._cached_response(intent, float(profile['weight']))
         
         elif intent == 'analyse_aliment':
-            food_name = self._extract_food_name(query)
-            
-            if not food_name:
+            if food_id is None:
                 return """
 ❓ **Aliment non trouvé**
 
@@ -349,39 +702,10 @@ Essayez: "Analyse les bienfaits du poulet pour mon objectif"
 💡 Aliments disponibles: poulet, saumon, riz, avoine, œufs, etc.
 """
             
-            food_data = self.food_df[self.food_df['food'] == food_name].iloc[0]
-            
-            # Trouver alternatives
-            alternatives = self.recommender.find_alternatives(food_name, n_alternatives=3)
-            alt_list = ', '.join(alternatives['food'].tolist()) if not alternatives.empty else 'N/A'
-            
-            return self.RESPONSE_TEMPLATES['analyse_aliment'].format(
-                food_name=food_name,
-                calories=food_data['Caloric Value'],
-                proteins=food_data['Protein'],
-                protein_rating=self._rate_nutrient(food_data['Protein'], 'protein'),
-                carbs=food_data['Carbohydrates'],
-                fats=food_data['Fat'],
-                fiber=food_data['Dietary Fiber'],
-                fiber_rating=self._rate_nutrient(food_data['Dietary Fiber'], 'fiber'),
-                goal=profile['goal'],
-                goal_analysis=self._analyze_food_for_goal(food_data, profile['goal']),
-                timing_advice="Idéal post-entraînement" if food_data['Protein'] > 20 else "Tout moment de la journée",
-                alternatives=alt_list
-            )
+            return render(food_id, profile['goal'])
         
         elif intent == 'hydratation':
-            from nutrition_calculator import NutritionalCalculator
-            water = NutritionalCalculator.calculate_water_needs(
-                profile['weight'],
-                profile['activity_level']
-            )
-            
-            return self.RESPONSE_TEMPLATES['hydratation'].format(
-                water=water,
-                weight=profile['weight'],
-                activity=profile['activity_level']
-            )
+            return self._cached_response(intent, float(profile['weight']), profile['activity_level'])
         
         # Réponse générale
         return f"""
@@ -404,6 +728,34 @@ Je comprends votre question sur: **{query}**
 """
 
 
+def benchmark_intent_matcher(queries: Sequence[str], repeat: int = 3) -> Dict[str, float]:
+    """
+    Compare le débit (requêtes/s) du parcours séquentiel et du matcher compilé
+    """
+    patterns = NutritionAssistant.PATTERNS
+    matcher = IntentMatcher(patterns)
+    
+    def sequential(query):
+        query_lower = query.lower()
+        for intent, pattern in patterns.items():
+            if re.search(pattern, query_lower):
+                return intent
+        return None
+    
+    results = {}
+    for name, func in [('sequential', sequential), ('compiled', matcher.primary)]:
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for query in queries:
+                func(query)
+            best = min(best, time.perf_counter() - start)
+        results[name] = len(queries) / best
+    
+    results['speedup'] = results['compiled'] / results['sequential']
+    return results
+
+
 # ===== TESTS =====
 def test_assistant():
     """Tests de l'assistant"""
@@ -451,6 +803,39 @@ def test_assistant():
         "Combien d'eau dois-je boire?"
     ]
     
+    # Intentions multiples et positions
+    matches = assistant.detect_intents("Combien de protéines au petit-déjeuner pour la prise de masse?")
+    print("Intentions détectées:", [(m.intent, m.start, m.text) for m in matches])
+    assert [m.intent for m in matches] == ['portion', 'proteines', 'petit_dejeuner', 'prise_masse']
+    assert assistant._detect_intent("Combien de protéines au petit-déjeuner?")[0] == 'petit_dejeuner'
+    
+    # Sans mot-clé: repli sur le classifieur (ou intention générale si peu sûr)
+    for query in ["Que prendre en sortant de la piscine ?", "Salut, tu vas bien ?", "xyz"]:
+        print(f"Classifieur: {query!r} -> {assistant._detect_intent(query)}")
+    assert assistant._detect_intent("Que prendre en sortant de la piscine ?")[0] == 'post_entrainement'
+    assert assistant._detect_intent("xyz") == ('general', 0.5)
+    
+    # Pattern non développable (quantificateur): repli sur une regex dédiée
+    custom = IntentMatcher({**NutritionAssistant.PATTERNS, 'sport': r'(sport+|gym)'})
+    assert custom.intents_in("Séance de gym, combien de kcal?") == ['calories', 'portion', 'sport']
+    
+    # Équivalence avec le parcours séquentiel et débit sur un corpus
+    import random
+    rng = random.Random(0)
+    fragments = ["suggère-moi", "un petit-déjeuner", "après musculation", "combien de kcal",
+                 "pour maigrir", "la prise de masse", "analyse le saumon", "remplacer le riz",
+                 "boire de l'eau", "des vitamines", "une recette rapide", "quelle quantité",
+                 "à quel moment", "bonjour", "merci beaucoup", "je mange du poulet"]
+    corpus = [' '.join(rng.sample(fragments, rng.randint(1, 4))) for _ in range(20000)]
+    for query in corpus[:2000]:
+        expected = next((i for i, p in NutritionAssistant.PATTERNS.items()
+                         if re.search(p, query.lower())), None)
+        assert assistant.intent_matcher.primary(query) == expected, query
+    
+    bench = benchmark_intent_matcher(corpus)
+    print(f"Débit: séquentiel {bench['sequential']:.0f} req/s, "
+          f"compilé {bench['compiled']:.0f} req/s (x{bench['speedup']:.1f})")
+    
     for query in queries:
         print(f"\n{'='*60}")
         print(f"Q: {query}")
@@ -459,6 +844,64 @@ def test_assistant():
         print(response)
         print()
     
+    # Sessions concurrentes sur un assistant partagé
+    from concurrent.futures import ThreadPoolExecutor
+    loss = ConversationContext(profile, needs)
+    gain = ConversationContext(
+        {**profile, 'weight': 65, 'goal': 'Prise de masse'},
+        {'target_calories': 3000, 'macros': {'proteins': 130, 'carbs': 380, 'fats': 90}}
+    )
+    question = "Suggère-moi un petit-déjeuner"
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        answers = list(pool.map(
+            lambda ctx: assistant.answer_query(question, ctx), [loss, gain] * 200
+        ))
+    assert all('perte de poids' in a for a in answers[0::2]), "Réponse d'une autre session"
+    assert all('prise de masse' in a and '750 kcal' in a for a in answers[1::2])
+    assert len(gain.recent_queries) == ConversationContext.MAX_RECENT_QUERIES
+    print("Sessions concurrentes: 400 réponses sans mélange de contexte")
+    
+    # Cache des réponses: clé = intention + valeurs du template
+    info = assistant.response_cache_info()
+    print(f"Cache de réponses: {info.hits} hits, {info.misses} misses, {info.currsize} entrées")
+    assert info.misses <= 5 and info.hits >= 395, "Les questions répétées doivent venir du cache"
+    heavier = ConversationContext({**profile, 'weight': 95}, needs)
+    assert '95kg' in assistant.answer_query("Combien d'eau dois-je boire?", heavier), \
+        "Un profil modifié ne doit pas réutiliser l'ancienne réponse"
+    as_int, as_float = (
+        assistant.answer_query("Combien d'eau dois-je boire?",
+                               ConversationContext({**profile, 'weight': weight}, needs))
+        for weight in (80, 80.0)
+    )
+    assert as_int == as_float and '80kg' in as_int, "80 et 80.0: même clé, même texte"
+    
+    # Réponses par lot et asynchrones identiques aux réponses unitaires
+    assert assistant.intent_matcher.primary_batch(corpus[:2000]) == \
+        [assistant.intent_matcher.primary(q) for q in corpus[:2000]]
+    batch = queries + ["Analyse le saumon", "Analyse le poulet pour mon objectif", "Bonjour"]
+    contexts = [loss, gain] * (len(batch) // 2) + [loss] * (len(batch) % 2)
+    expected = [assistant.answer_query(q, ctx) for q, ctx in zip(batch, contexts)]
+    assert assistant.answer_queries(batch, contexts) == expected, "Lot différent des réponses unitaires"
+    
+    async def gateway():
+        single = await asyncio.gather(*(
+            assistant.answer_async(q, ctx) for q, ctx in zip(batch * 50, contexts * 50)
+        ))
+        grouped = await assistant.answer_queries_async(batch, contexts)
+        return single, grouped
+    
+    single, grouped = asyncio.run(gateway())
+    assert single == expected * 50 and grouped == expected
+    
+    start = time.perf_counter()
+    for q, ctx in zip(corpus[:5000], [loss, gain] * 2500):
+        assistant.answer_query(q, ctx)
+    unit_time = time.perf_counter() - start
+    start = time.perf_counter()
+    assistant.answer_queries(corpus[:5000], [loss, gain] * 2500)
+    batch_time = time.perf_counter() - start
+    print(f"Lot de 5000 questions: {unit_time * 1000:.0f} ms unitaires, {batch_time * 1000:.0f} ms par lot")
+    
     print("✅ Tests complétés!\n")
 
 
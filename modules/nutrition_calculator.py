@@ -4,11 +4,17 @@ Calculs des besoins caloriques et macronutriments
 """
 
 import numpy as np
-from dataclasses import dataclass
-from typing import Dict, Tuple
+import pandas as pd
+from dataclasses import asdict, dataclass
+from datetime import date
+from functools import lru_cache
+from typing import Dict, Mapping, Optional, Tuple, Union
 
-@dataclass
+@dataclass(frozen=True)
 class UserProfile:
+    # Profil immuable et hachable: sert de clé au cache des besoins
+    __slots__ = ('weight', 'height', 'age', 'sex', 'activity_level', 'goal', 'target_weight')
+    
     weight: float  # kg
     height: float  # cm
     age: int
@@ -16,6 +22,164 @@ class UserProfile:
     activity_level: str
     goal: str  # 'Perte de poids', 'Maintien', 'Prise de masse'
     target_weight: float
+    
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+    
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            object.__setattr__(self, name, value)
+
+class AdaptiveTDEEEstimator:
+    """
+    Estimation de la dépense réelle à partir des pesées et des apports
+    Bilan énergétique: apport - TDEE = 7700 kcal × variation de poids (kg/jour)
+    Régression linéaire poids/temps tenue par sommes cumulées (mise à jour O(1),
+    ajout, retrait ou remplacement d'une pesée sans réajuster l'historique)
+    """
+    
+    KCAL_PER_KG = 7700
+    
+    def __init__(self, prior_sd: float = 250.0, weight_noise_kg: float = 0.5):
+        self.prior_sd = prior_sd                # incertitude de la formule (kcal)
+        self.weight_noise_kg = weight_noise_kg  # fluctuation journalière du poids
+        self.reset()
+    
+    def reset(self):
+        """Oublie toutes les pesées"""
+        self.n = 0
+        self._t0 = None
+        self._w0 = None
+        self._sum_t = 0.0
+        self._sum_w = 0.0
+        self._sum_tt = 0.0
+        self._sum_tw = 0.0
+        self._sum_ww = 0.0
+        self._sum_intake = 0.0
+        self._t_min = 0.0
+        self._t_max = 0.0
+        self._day_counts: Dict[float, int] = {}
+    
+    @staticmethod
+    def _day_number(day: Union[date, float]) -> float:
+        return float(day.toordinal()) if isinstance(day, date) else float(day)
+    
+    def _accumulate(self, t: float, weight: float, intake_kcal: float, sign: int):
+        """Ajoute (sign=1) ou retire (sign=-1) une pesée des sommes cumulées"""
+        # Valeurs recentrées sur la première pesée (stabilité numérique)
+        t -= self._t0
+        w = weight - self._w0
+        
+        self.n += sign
+        self._sum_t += sign * t
+        self._sum_w += sign * w
+        self._sum_tt += sign * t * t
+        self._sum_tw += sign * t * w
+        self._sum_ww += sign * w * w
+        self._sum_intake += sign * intake_kcal
+    
+    def add_weigh_in(self, day: Union[date, float], weight: float, intake_kcal: float):
+        """
+        Ajoute une pesée avec l'apport calorique suivi sur la période
+        day: date ou numéro de jour
+        """
+        t = self._day_number(day)
+        if self._t0 is None:
+            self._t0, self._w0 = t, weight
+        
+        self._accumulate(t, weight, intake_kcal, 1)
+        self._day_counts[t] = self._day_counts.get(t, 0) + 1
+        self._t_min = min(self._t_min, t - self._t0)
+        self._t_max = max(self._t_max, t - self._t0)
+    
+    def remove_weigh_in(self, day: Union[date, float], weight: float, intake_kcal: float):
+        """
+        Retire une pesée ajoutée auparavant (mêmes valeurs qu'à l'ajout)
+        Bornes de la période recalculées seulement si la date retirée en était une
+        """
+        t = self._day_number(day)
+        if not self._day_counts.get(t):
+            raise ValueError(f"Aucune pesée enregistrée pour le jour {day}")
+        if self.n == 1:
+            self.reset()
+            return
+        
+        self._accumulate(t, weight, intake_kcal, -1)
+        self._day_counts[t] -= 1
+        if not self._day_counts[t]:
+            del self._day_counts[t]
+            if t - self._t0 in (self._t_min, self._t_max):
+                self._t_min = min(self._day_counts) - self._t0
+                self._t_max = max(self._day_counts) - self._t0
+    
+    def replace_weigh_in(self, day: Union[date, float], old_weight: float, old_intake_kcal: float,
+                         weight: float, intake_kcal: float):
+        """Nouvelle mesure pour une date déjà pesée (période inchangée: O(1))"""
+        t = self._day_number(day)
+        if not self._day_counts.get(t):
+            raise ValueError(f"Aucune pesée enregistrée pour le jour {day}")
+        self._accumulate(t, old_weight, old_intake_kcal, -1)
+        self._accumulate(t, weight, intake_kcal, 1)
+    
+    @property
+    def span_days(self) -> float:
+        return self._t_max - self._t_min
+    
+    @property
+    def mean_intake(self) -> Optional[float]:
+        return self._sum_intake / self.n if self.n else None
+    
+    def _centered_sums(self) -> Tuple[float, float, float]:
+        """Sommes centrées (Sxx, Sxy, Syy) de la régression"""
+        sxx = self._sum_tt - self._sum_t ** 2 / self.n
+        sxy = self._sum_tw - self._sum_t * self._sum_w / self.n
+        syy = self._sum_ww - self._sum_w ** 2 / self.n
+        return sxx, sxy, syy
+    
+    @property
+    def slope_kg_per_day(self) -> Optional[float]:
+        """Tendance du poids (kg/jour), None sans au moins deux dates"""
+        if self.n < 2 or self.span_days <= 0:
+            return None
+        sxx, sxy, _ = self._centered_sums()
+        return sxy / sxx
+    
+    def observed_tdee(self) -> Optional[Tuple[float, float]]:
+        """
+        TDEE mesuré et son écart-type (kcal), None si données insuffisantes
+        """
+        slope = self.slope_kg_per_day
+        if slope is None:
+            return None
+        
+        sxx, sxy, syy = self._centered_sums()
+        
+        # Variance résiduelle, jamais inférieure au bruit de pesée
+        residual_var = max(syy - sxy * slope, 0.0) / (self.n - 2) if self.n > 2 else 0.0
+        noise_var = max(residual_var, self.weight_noise_kg ** 2)
+        slope_sd = np.sqrt(noise_var / sxx)
+        
+        tdee = self.mean_intake - self.KCAL_PER_KG * slope
+        return tdee, self.KCAL_PER_KG * slope_sd
+    
+    def confidence(self) -> float:
+        """Part de la mesure dans l'estimation (0 = formule seule)"""
+        observed = self.observed_tdee()
+        if observed is None:
+            return 0.0
+        _, sd = observed
+        return self.prior_sd ** 2 / (self.prior_sd ** 2 + sd ** 2)
+    
+    def estimate(self, prior_tdee: float) -> float:
+        """
+        Moyenne pondérée (inverse des variances) entre la formule et la mesure
+        """
+        observed = self.observed_tdee()
+        if observed is None:
+            return prior_tdee
+        tdee, _ = observed
+        return prior_tdee + self.confidence() * (tdee - prior_tdee)
+
 
 class NutritionalCalculator:
     """
@@ -140,15 +304,43 @@ class NutritionalCalculator:
         return round(base_water, 1)
     
     @staticmethod
-    def calculate_complete_needs(profile: UserProfile) -> Dict:
+    def calculate_complete_needs(
+        profile: UserProfile,
+        tdee_estimator: Optional[AdaptiveTDEEEstimator] = None
+    ) -> Dict:
         """
         Calcul complet de tous les besoins nutritionnels
+        tdee_estimator: ajuste la dépense selon l'historique de poids
+        Sans estimateur, le résultat est mémorisé par profil (copie retournée)
         """
+        if tdee_estimator is None:
+            needs = _cached_complete_needs(profile)
+            return {**needs, 'macros': dict(needs['macros'])}
+        return NutritionalCalculator._compute_complete_needs(profile, tdee_estimator)
+    
+    @staticmethod
+    def needs_cache_info():
+        """Statistiques du cache des besoins (hits, misses, maxsize, currsize)"""
+        return _cached_complete_needs.cache_info()
+    
+    @staticmethod
+    def clear_needs_cache():
+        """Vide le cache des besoins"""
+        _cached_complete_needs.cache_clear()
+    
+    @staticmethod
+    def _compute_complete_needs(
+        profile: UserProfile,
+        tdee_estimator: Optional[AdaptiveTDEEEstimator] = None
+    ) -> Dict:
+        """Calcul effectif des besoins (sans cache)"""
         bmr = NutritionalCalculator.calculate_bmr(
             profile.weight, profile.height, profile.age, profile.sex
         )
         
         tdee = NutritionalCalculator.calculate_tdee(bmr, profile.activity_level)
+        if tdee_estimator is not None:
+            tdee = round(tdee_estimator.estimate(tdee), 2)
         
         target_calories = NutritionalCalculator.calculate_target_calories(
             tdee, profile.goal
@@ -178,6 +370,121 @@ class NutritionalCalculator:
         }
 
 
+    @staticmethod
+    def _round_batch(values: np.ndarray, ndigits: int) -> np.ndarray:
+        """
+        Arrondi vectorisé identique à round() de Python
+        np.round passe par une mise à l'échelle: les rares valeurs proches
+        d'une demi-unité sont recalculées avec round()
+        """
+        rounded = np.round(values, ndigits)
+        scaled = values * 10.0 ** ndigits
+        ambiguous = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6
+        if ambiguous.any():
+            rounded[ambiguous] = [round(v, ndigits) for v in values[ambiguous].tolist()]
+        return rounded
+    
+    @staticmethod
+    def _lookup_batch(values: pd.Series, func) -> np.ndarray:
+        """Applique une fonction scalaire une seule fois par valeur distincte"""
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        return np.array([func(u) for u in uniques])[codes]
+    
+    @staticmethod
+    def calculate_complete_needs_batch(
+        profiles: Union[pd.DataFrame, Mapping[str, np.ndarray]]
+    ) -> pd.DataFrame:
+        """
+        Version vectorisée de calculate_complete_needs sur un tableau de profils
+        Colonnes attendues: weight, height, age, sex, activity_level, goal, target_weight
+        Résultats identiques au calcul profil par profil
+        """
+        calc = NutritionalCalculator
+        df = profiles if isinstance(profiles, pd.DataFrame) else pd.DataFrame(profiles)
+        
+        weight = df['weight'].to_numpy(dtype=float)
+        height = df['height'].to_numpy(dtype=float)
+        age = df['age'].to_numpy(dtype=float)
+        target_weight = df['target_weight'].to_numpy(dtype=float)
+        goal = df['goal']
+        
+        # BMR (Mifflin-St Jeor)
+        base = (10 * weight) + (6.25 * height) - (5 * age)
+        bmr = calc._round_batch(
+            np.where(df['sex'].to_numpy() == 'Homme', base + 5, base - 161), 2
+        )
+        
+        # TDEE et calories cibles
+        activity_factor = calc._lookup_batch(
+            df['activity_level'], lambda a: calc.ACTIVITY_FACTORS.get(a, 1.2)
+        )
+        tdee = calc._round_batch(bmr * activity_factor, 2)
+        
+        goal_adjustment = calc._lookup_batch(goal, lambda g: calc.GOAL_ADJUSTMENTS.get(g, 1.0))
+        target_calories = calc._round_batch(tdee * goal_adjustment, 2)
+        
+        # Macronutriments
+        protein_factor = calc._lookup_batch(
+            goal, lambda g: 2.0 if g in ('Prise de masse', 'Perte de poids') else 1.8
+        )
+        proteins_g = weight * protein_factor
+        proteins_cal = proteins_g * 4
+        fats_cal = target_calories * 0.27
+        fats_g = fats_cal / 9
+        carbs_cal = target_calories - proteins_cal - fats_cal
+        carbs_g = carbs_cal / 4
+        
+        # Durée estimée
+        weight_diff = np.abs(weight - target_weight)
+        goal_values = goal.to_numpy()
+        is_loss = goal_values == 'Perte de poids'
+        is_gain = goal_values == 'Prise de masse'
+        reached = weight_diff < 0.5
+        
+        duration = np.zeros(len(df))
+        duration = np.where(is_loss, calc._round_batch(weight_diff / 0.75, 1), duration)
+        duration = np.where(is_gain, calc._round_batch(weight_diff / 0.375, 1), duration)
+        duration = np.where(reached, 0, duration)
+        
+        duration_msg = np.select(
+            [reached, is_loss, is_gain],
+            ["Vous êtes déjà à votre poids cible!",
+             "Perte recommandée: 0.75kg/semaine",
+             "Gain recommandé: 0.375kg/semaine"],
+            default="Objectif de maintien - pas de durée estimée"
+        )
+        
+        # Eau: mêmes règles que calculate_water_needs, évaluées par niveau d'activité
+        active = calc._lookup_batch(df['activity_level'], lambda a: 'actif' in a.lower())
+        very = calc._lookup_batch(df['activity_level'], lambda a: 'très' in a.lower())
+        water = weight * 0.033
+        water = np.where(active, water * 1.2, water)
+        water = np.where(very, water * 1.3, water)
+        
+        return pd.DataFrame({
+            'bmr': bmr,
+            'tdee': tdee,
+            'target_calories': target_calories,
+            'proteins': calc._round_batch(proteins_g, 1),
+            'carbs': calc._round_batch(carbs_g, 1),
+            'fats': calc._round_batch(fats_g, 1),
+            'proteins_cal': calc._round_batch(proteins_cal, 1),
+            'carbs_cal': calc._round_batch(carbs_cal, 1),
+            'fats_cal': calc._round_batch(fats_cal, 1),
+            'proteins_pct': calc._round_batch((proteins_cal / target_calories) * 100, 1),
+            'carbs_pct': calc._round_batch((carbs_cal / target_calories) * 100, 1),
+            'fats_pct': calc._round_batch((fats_cal / target_calories) * 100, 1),
+            'duration_weeks': duration,
+            'duration_message': duration_msg,
+            'water_liters': calc._round_batch(water, 1),
+            'deficit_surplus': target_calories - tdee
+        }, index=df.index)
+
+
+# Cache borné des besoins calculés avec la formule statique
+_cached_complete_needs = lru_cache(maxsize=1024)(NutritionalCalculator._compute_complete_needs)
+
+
 # ===== TESTS =====
 def test_calculator():
     """Tests unitaires du calculateur"""
@@ -233,6 +540,71 @@ def test_calculator():
     assert results1['target_calories'] < results1['tdee'], "Déficit pour perte"
     assert results2['target_calories'] > results2['tdee'], "Surplus pour prise"
     
+    # Test 3: Calcul vectorisé sur un tableau de profils
+    profiles = [profile1, profile2, UserProfile(70, 170, 40, 'Homme', 'Modérément actif', 'Maintien', 70.2)]
+    batch = NutritionalCalculator.calculate_complete_needs_batch(
+        pd.DataFrame([asdict(p) for p in profiles])
+    )
+    print(f"Test 3 - Calcul vectorisé sur {len(batch)} profils:")
+    print(batch[['bmr', 'tdee', 'target_calories', 'proteins', 'water_liters']].to_string())
+    
+    for i, profile in enumerate(profiles):
+        single = NutritionalCalculator.calculate_complete_needs(profile)
+        row = batch.iloc[i]
+        expected = {**single.pop('macros'), **single}
+        for key, value in expected.items():
+            assert row[key] == value, f"Écart sur {key} (profil {i + 1})"
+    print()
+    
+    # Test 4: Estimation adaptative de la dépense
+    estimator = AdaptiveTDEEEstimator()
+    static = results1['tdee']
+    assert estimator.estimate(static) == static, "Sans pesée: formule seule"
+    
+    # Dépense réelle de 2500 kcal, apport 2200 kcal: -300/7700 kg par jour
+    rng = np.random.default_rng(0)
+    for day in range(0, 42, 2):
+        weight = 80 - 300 / 7700 * day + rng.normal(0, 0.3)
+        estimator.add_weigh_in(day, weight, 2200)
+    
+    adapted = NutritionalCalculator.calculate_complete_needs(profile1, estimator)
+    print(f"Test 4 - TDEE adaptatif après {estimator.n} pesées:")
+    print(f"Formule: {static} kcal, adaptatif: {adapted['tdee']} kcal "
+          f"(confiance {estimator.confidence():.0%})\n")
+    assert abs(adapted['tdee'] - 2500) < abs(static - 2500), "L'estimation doit se rapprocher du réel"
+    assert estimator.confidence() > 0.5, "Six semaines de pesées doivent dominer la formule"
+    
+    # Remplacement et retrait incrémentaux = estimateur reconstruit
+    entries = {day: (80 - 300 / 7700 * day + rng.normal(0, 0.3), 2200) for day in range(0, 42, 2)}
+    estimator = AdaptiveTDEEEstimator()
+    for day, (weight, intake) in entries.items():
+        estimator.add_weigh_in(day, weight, intake)
+    estimator.replace_weigh_in(20, *entries[20], 79.1, 2100)  # Même date: nouvelle mesure
+    entries[20] = (79.1, 2100)
+    for day in (0, 40):  # Retrait des deux bornes de la période
+        estimator.remove_weigh_in(day, *entries.pop(day))
+    rebuilt = AdaptiveTDEEEstimator()
+    for day, (weight, intake) in entries.items():
+        rebuilt.add_weigh_in(day, weight, intake)
+    assert estimator.n == rebuilt.n and estimator.span_days == rebuilt.span_days == 36
+    assert np.allclose(estimator.observed_tdee(), rebuilt.observed_tdee()), "Écart avec la reconstruction"
+    try:
+        estimator.remove_weigh_in(41, 80, 2200)
+        assert False, "Date jamais pesée"
+    except ValueError:
+        pass
+    
+    # Test 5: Cache des besoins par profil
+    NutritionalCalculator.clear_needs_cache()
+    first = NutritionalCalculator.calculate_complete_needs(profile1)
+    first['macros']['proteins'] = 0  # la copie retournée ne doit pas altérer le cache
+    same = UserProfile(85, 175, 30, 'Homme', 'Modérément actif', 'Perte de poids', 75)
+    second = NutritionalCalculator.calculate_complete_needs(same)
+    info = NutritionalCalculator.needs_cache_info()
+    print(f"Test 5 - Cache: {info.hits} hit(s), {info.misses} miss(es)\n")
+    assert info.hits == 1 and info.misses == 1, "Profil identique non retrouvé dans le cache"
+    assert second == results1, "Résultat en cache altéré"
+    
     print("✅ Tous les tests passés!\n")
 
 
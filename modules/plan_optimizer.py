@@ -0,0 +1,330 @@
+"""
+Module utilitaire: Amélioration locale des plans alimentaires
+Recuit simulé sous budget de temps (remplacement, échange, portions)
+Auteurs: Asma Bélkahla & Monia Selleoui
+"""
+
+import math
+import random
+import time
+import numpy as np
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Optional, Sequence
+
+try:
+    from .compact_plan import CompactMealPlan
+except ImportError:
+    from compact_plan import CompactMealPlan
+
+
+class PlanImprover:
+    """
+    Améliore un CompactMealPlan après la génération gloutonne
+
+    Objectif = Σ jours Σ macros poids * (écart relatif à la cible)²
+             + pénalité de variété (paires d'usages d'un même aliment
+               à moins de `cooldown_days` jours d'écart)
+
+    Chaque mouvement ne touche qu'une ou deux lignes: le coût est mis à jour
+    de façon incrémentale sur les totaux du jour concerné
+    """
+
+    # Poids des écarts: calories, protéines, glucides, lipides
+    MACRO_WEIGHTS = (1.0, 1.0, 0.5, 0.5)
+
+    MIN_PORTION = 10.0
+    MAX_PORTION = 250.0
+
+    def __init__(
+        self,
+        macro_matrix: np.ndarray,
+        category_ids: Optional[Dict[str, np.ndarray]] = None,
+        cooldown_days: int = 7,
+        variety_weight: float = 0.05,
+        seed: Optional[int] = None
+    ):
+        # Macros pour 100g en tuples Python: accès rapide dans la boucle
+        self.macros = [tuple(row) for row in np.asarray(macro_matrix, dtype=float).tolist()]
+        self.n_foods = len(self.macros)
+        self.category_ids = category_ids or {}
+        self.cooldown_days = max(1, int(cooldown_days))
+        self.variety_weight = variety_weight
+        self.rng = random.Random(seed)
+
+    # ----- Coût -----
+
+    def _day_cost(self, totals: Sequence[float], targets: Sequence[float]) -> float:
+        cost = 0.0
+        for w, value, target in zip(self.MACRO_WEIGHTS, totals, targets):
+            if target > 0:
+                err = (value - target) / target
+                cost += w * err * err
+        return cost
+
+    def _window_count(self, food_days: Dict[int, list], food: int, day: int) -> int:
+        """Nombre d'usages de `food` à moins de cooldown_days jours de `day`"""
+        days = food_days.get(food)
+        if not days:
+            return 0
+        w = self.cooldown_days
+        return bisect_right(days, day + w - 1) - bisect_left(days, day - w + 1)
+
+    # ----- Recherche locale -----
+
+    def improve(
+        self,
+        plan: CompactMealPlan,
+        daily_targets: np.ndarray,
+        slot_categories: Optional[Sequence[str]] = None,
+        time_budget_ms: float = 200,
+        initial_temperature: float = 0.05,
+        final_temperature: float = 1e-4
+    ) -> Dict:
+        """
+        Améliore le plan en place sous un budget de temps (ms)
+        slot_categories: catégorie de chaque ligne (pool des remplacements)
+        Retourne un résumé (coûts initial/final, mouvements, durée)
+        """
+        rec = plan.records
+        n_rows = len(rec)
+        if n_rows == 0:
+            return {'initial_cost': 0.0, 'final_cost': 0.0, 'iterations': 0,
+                    'accepted': 0, 'elapsed_ms': 0.0}
+
+        rng = self.rng
+        macros = self.macros
+        row_day = rec['day'].tolist()
+        food = rec['food_id'].tolist()
+        grams = rec['grams'].astype(float).tolist()
+        targets = np.asarray(daily_targets, dtype=float).tolist()
+        n_days = plan.n_days
+
+        # Totaux par jour
+        totals = [[0.0, 0.0, 0.0, 0.0] for _ in range(n_days)]
+        for r in range(n_rows):
+            m, f = macros[food[r]], grams[r] / 100
+            t = totals[row_day[r]]
+            for k in range(4):
+                t[k] += m[k] * f
+
+        # Jours d'utilisation de chaque aliment (listes triées)
+        food_days: Dict[int, list] = {}
+        for r in range(n_rows):
+            insort(food_days.setdefault(food[r], []), row_day[r])
+
+        # Pools de remplacement et groupes d'échange par catégorie
+        all_ids = range(self.n_foods)
+        pools = []
+        groups: Dict[str, list] = {}
+        for r in range(n_rows):
+            category = slot_categories[r] if slot_categories is not None else None
+            ids = self.category_ids.get(category)
+            pools.append(ids.tolist() if ids is not None and len(ids) else all_ids)
+            groups.setdefault(category, []).append(r)
+        row_group = [groups[slot_categories[r] if slot_categories is not None else None]
+                     for r in range(n_rows)]
+
+        day_costs = [self._day_cost(totals[d], targets[d]) for d in range(n_days)]
+        variety_pairs = sum(
+            self._window_count(food_days, food[r], row_day[r]) - 1 for r in range(n_rows)
+        ) / 2
+        lam = self.variety_weight
+        cost = sum(day_costs) + lam * variety_pairs
+        initial_cost = best_cost = cost
+        best_food, best_grams = food[:], grams[:]
+
+        budget = time_budget_ms / 1000
+        start = time.perf_counter()
+        elapsed = 0.0
+        temperature = initial_temperature
+        cooling = math.log(final_temperature / initial_temperature)
+        iterations = accepted = 0
+
+        while True:
+            if iterations % 128 == 0:
+                elapsed = time.perf_counter() - start
+                if elapsed >= budget:
+                    break
+                temperature = initial_temperature * math.exp(cooling * elapsed / budget)
+            iterations += 1
+
+            move = rng.random()
+            r = rng.randrange(n_rows)
+            d = row_day[r]
+            old_f, old_g = food[r], grams[r]
+            m_old = macros[old_f]
+
+            if move < 0.45:
+                # Remplacement: nouvel aliment du même type, calories du slot conservées
+                new_f = rng.choice(pools[r])
+                if new_f == old_f:
+                    continue
+                m_new = macros[new_f]
+                old_cal = m_old[0] * old_g / 100
+                new_g = old_cal / m_new[0] * 100 if m_new[0] > 0 else old_g
+                new_g = min(self.MAX_PORTION, max(self.MIN_PORTION, new_g))
+
+                new_totals = [
+                    totals[d][k] - m_old[k] * old_g / 100 + m_new[k] * new_g / 100
+                    for k in range(4)
+                ]
+                delta_day = self._day_cost(new_totals, targets[d]) - day_costs[d]
+                delta_var = (
+                    self._window_count(food_days, new_f, d)
+                    - (self._window_count(food_days, old_f, d) - 1)
+                )
+                delta = delta_day + lam * delta_var
+
+                if delta < 0 or rng.random() < math.exp(-delta / temperature):
+                    totals[d] = new_totals
+                    day_costs[d] += delta_day
+                    days = food_days[old_f]
+                    del days[bisect_left(days, d)]
+                    insort(food_days.setdefault(new_f, []), d)
+                    food[r], grams[r] = new_f, new_g
+                    cost += delta
+                    accepted += 1
+
+            elif move < 0.8:
+                # Portion: ajustement de ±25% maximum
+                new_g = old_g * rng.uniform(0.75, 1.25)
+                new_g = min(self.MAX_PORTION, max(self.MIN_PORTION, new_g))
+                diff = (new_g - old_g) / 100
+                new_totals = [totals[d][k] + m_old[k] * diff for k in range(4)]
+                delta = self._day_cost(new_totals, targets[d]) - day_costs[d]
+
+                if delta < 0 or rng.random() < math.exp(-delta / temperature):
+                    totals[d] = new_totals
+                    day_costs[d] += delta
+                    grams[r] = new_g
+                    cost += delta
+                    accepted += 1
+
+            else:
+                # Échange: deux lignes de même catégorie sur des jours différents
+                r2 = rng.choice(row_group[r])
+                d2 = row_day[r2]
+                if d2 == d or food[r2] == old_f:
+                    continue
+                f2, g2 = food[r2], grams[r2]
+                m2 = macros[f2]
+
+                t1 = [totals[d][k] - m_old[k] * old_g / 100 + m2[k] * g2 / 100 for k in range(4)]
+                t2 = [totals[d2][k] - m2[k] * g2 / 100 + m_old[k] * old_g / 100 for k in range(4)]
+                c1 = self._day_cost(t1, targets[d])
+                c2 = self._day_cost(t2, targets[d2])
+                delta_day = c1 + c2 - day_costs[d] - day_costs[d2]
+
+                # Variété: chaque aliment quitte un jour pour un autre
+                delta_var = (
+                    self._window_count(food_days, old_f, d2) - (self._window_count(food_days, old_f, d) - 1)
+                    + self._window_count(food_days, f2, d) - (self._window_count(food_days, f2, d2) - 1)
+                )
+                if abs(d - d2) < self.cooldown_days:
+                    # L'usage déplacé était compté dans la fenêtre de son nouveau jour
+                    delta_var -= 2
+                delta = delta_day + lam * delta_var
+
+                if delta < 0 or rng.random() < math.exp(-delta / temperature):
+                    totals[d], totals[d2] = t1, t2
+                    day_costs[d], day_costs[d2] = c1, c2
+                    days1 = food_days[old_f]
+                    del days1[bisect_left(days1, d)]
+                    insort(days1, d2)
+                    days2 = food_days[f2]
+                    del days2[bisect_left(days2, d2)]
+                    insort(days2, d)
+                    food[r], grams[r], food[r2], grams[r2] = f2, g2, old_f, old_g
+                    cost += delta
+                    accepted += 1
+
+            if cost < best_cost - 1e-12:
+                best_cost = cost
+                best_food, best_grams = food[:], grams[:]
+
+        plan.update_rows(
+            np.asarray(best_food, dtype=np.int32),
+            np.asarray(best_grams, dtype=np.float32),
+            np.asarray(macros, dtype=np.float32)
+        )
+
+        return {
+            'initial_cost': initial_cost,
+            'final_cost': best_cost,
+            'iterations': iterations,
+            'accepted': accepted,
+            'elapsed_ms': (time.perf_counter() - start) * 1000
+        }
+
+    def plan_cost(self, plan: CompactMealPlan, daily_targets: np.ndarray) -> float:
+        """Coût complet d'un plan (recalcul non incrémental, pour contrôle)"""
+        totals = plan.daily_totals()
+        cost = sum(self._day_cost(totals[d], daily_targets[d]) for d in range(plan.n_days))
+
+        food_days: Dict[int, list] = {}
+        rec = plan.records
+        for f, d in zip(rec['food_id'].tolist(), rec['day'].tolist()):
+            insort(food_days.setdefault(f, []), d)
+        pairs = sum(
+            self._window_count(food_days, f, d) - 1
+            for f, d in zip(rec['food_id'].tolist(), rec['day'].tolist())
+        ) / 2
+
+        return cost + self.variety_weight * pairs
+
+
+# ===== TESTS =====
+def test_plan_optimizer():
+    """Tests de l'optimiseur de plan"""
+    print("=== TESTS DE L'OPTIMISEUR DE PLAN ===\n")
+
+    from datetime import date
+
+    macro_matrix = np.array([
+        [165, 31, 0, 3.6],     # Poulet
+        [370, 7.9, 77, 2.9],   # Riz
+        [34, 2.8, 6.6, 0.4],   # Brocoli
+        [208, 20, 0, 13],      # Saumon
+        [368, 14, 64, 6],      # Quinoa
+        [23, 2.9, 3.6, 0.4]    # Épinards
+    ], dtype=np.float32)
+    category_ids = {
+        'protéine': np.array([0, 3]),
+        'féculent': np.array([1, 4]),
+        'légume': np.array([2, 5])
+    }
+    meal_names = ['Déjeuner']
+
+    # Plan glouton volontairement déséquilibré et répétitif
+    plan = CompactMealPlan(date(2024, 1, 1), catalog_size=len(macro_matrix))
+    day = {'Déjeuner': {'food_ids': [0, 1, 2], 'portions': [80.0, 40.0, 100.0]}}
+    for _ in range(5):
+        plan.append_day(day, meal_names, macro_matrix)
+    slot_categories = ['protéine', 'féculent', 'légume'] * 5
+
+    targets = np.tile([900.0, 70.0, 90.0, 20.0], (5, 1))
+    improver = PlanImprover(macro_matrix, category_ids, cooldown_days=2, seed=42)
+
+    before = improver.plan_cost(plan, targets)
+    result = improver.improve(plan, targets, slot_categories, time_budget_ms=100)
+    after = improver.plan_cost(plan, targets)
+
+    print(f"Coût: {before:.3f} → {after:.3f} "
+          f"({result['iterations']} mouvements, {result['accepted']} acceptés, "
+          f"{result['elapsed_ms']:.0f} ms)")
+    print(f"Calories jour 1: {plan.daily_totals()[0, 0]:.0f} kcal (cible 900)")
+    print()
+
+    assert abs(result['initial_cost'] - before) < 1e-6, "Coût initial incohérent"
+    assert abs(result['final_cost'] - after) < 1e-3, "Coût incrémental incohérent"
+    assert after < before, "Le plan doit être amélioré"
+    # Arrêt uniquement au contrôle du budget (toutes les 128 itérations); la durée
+    # mesurée n'est qu'affichée, elle dépend de la charge de la machine
+    assert result['iterations'] > 0 and result['iterations'] % 128 == 0, "Arrêt hors contrôle du budget"
+    assert 0 < result['accepted'] <= result['iterations'], "Compteurs de mouvements incohérents"
+
+    print("✅ Tous les tests passés!\n")
+
+
+if __name__ == "__main__":
+    test_plan_optimizer()
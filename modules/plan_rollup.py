@@ -0,0 +1,156 @@
+"""
+Module utilitaire: Bilan nutritionnel complet et liste de courses d'un plan
+Matrice creuse (jour × aliment) en grammes multipliée par la table nutritionnelle
+Auteurs: Asma Bélkahla & Monia Selleoui
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from typing import Dict, Optional
+
+try:
+    from .compact_plan import CompactMealPlan
+    from .food_catalog import DISPLAY_COLUMNS, with_display_fields
+except ImportError:
+    from compact_plan import CompactMealPlan
+    from food_catalog import DISPLAY_COLUMNS, with_display_fields
+
+
+class PlanRollup:
+    """
+    Agrège un CompactMealPlan sur toutes les colonnes nutritionnelles
+    Un seul produit creux-dense par agrégation: recalcul à chaque modification
+    """
+
+    # Colonnes non additives ou techniques (dont les champs d'affichage du catalogue)
+    EXCLUDED_COLUMNS = ['food', 'Nutrition Density'] + DISPLAY_COLUMNS
+
+    def __init__(self, food_df: pd.DataFrame):
+        self.food_names = food_df['food'].to_numpy()
+        self.nutrient_columns = [
+            col for col in food_df.select_dtypes(include='number').columns
+            if col not in self.EXCLUDED_COLUMNS and not str(col).startswith('Unnamed')
+        ]
+        # Valeurs pour 1g (la table est exprimée pour 100g)
+        self.nutrients_per_gram = food_df[self.nutrient_columns].fillna(0).to_numpy(dtype=np.float64) / 100
+
+    def gram_matrix(self, plan: CompactMealPlan) -> sparse.csr_matrix:
+        """Matrice creuse (n_jours, n_aliments) des grammes servis"""
+        rec = plan.records
+        return sparse.csr_matrix(
+            (rec['grams'].astype(np.float64), (rec['day'], rec['food_id'])),
+            shape=(plan.n_days, len(self.food_names))
+        )
+
+    def daily_totals(self, plan: CompactMealPlan, grams: Optional[sparse.csr_matrix] = None) -> pd.DataFrame:
+        """Apports par jour pour toutes les colonnes nutritionnelles"""
+        if grams is None:
+            grams = self.gram_matrix(plan)
+        totals = grams @ self.nutrients_per_gram
+        index = pd.Index([plan.day_date(d) for d in range(plan.n_days)], name='date')
+        return pd.DataFrame(totals, index=index, columns=self.nutrient_columns)
+
+    def weekly_totals(self, plan: CompactMealPlan, grams: Optional[sparse.csr_matrix] = None) -> pd.DataFrame:
+        """Apports par semaine de programme (semaine 1 = 7 premiers jours)"""
+        if grams is None:
+            grams = self.gram_matrix(plan)
+        n_weeks = (plan.n_days + 6) // 7
+        week_of_day = sparse.csr_matrix(
+            (np.ones(plan.n_days), (np.arange(plan.n_days) // 7, np.arange(plan.n_days))),
+            shape=(n_weeks, plan.n_days)
+        )
+        totals = (week_of_day @ grams) @ self.nutrients_per_gram
+        index = pd.Index(np.arange(1, n_weeks + 1), name='semaine')
+        return pd.DataFrame(totals, index=index, columns=self.nutrient_columns)
+
+    def shopping_list(
+        self,
+        plan: CompactMealPlan,
+        first_day: int = 0,
+        last_day: Optional[int] = None,
+        grams: Optional[sparse.csr_matrix] = None
+    ) -> pd.DataFrame:
+        """
+        Quantités totales par aliment sur les jours [first_day, last_day]
+        """
+        if grams is None:
+            grams = self.gram_matrix(plan)
+        if last_day is None:
+            last_day = plan.n_days - 1
+
+        per_food = grams[first_day:last_day + 1].sum(axis=0).A1
+        food_ids = np.flatnonzero(per_food)
+        order = food_ids[np.argsort(per_food[food_ids])[::-1]]
+
+        return pd.DataFrame({
+            'food': self.food_names[order],
+            'grams': per_food[order].round(0)
+        }).reset_index(drop=True)
+
+    def rollup(self, plan: CompactMealPlan) -> Dict[str, pd.DataFrame]:
+        """Bilan complet: jours, semaines et liste de courses"""
+        grams = self.gram_matrix(plan)
+        daily = self.daily_totals(plan, grams)
+
+        return {
+            'daily': daily,
+            'weekly': self.weekly_totals(plan, grams),
+            'shopping_list': self.shopping_list(plan, grams=grams)
+        }
+
+
+# ===== TESTS =====
+def test_plan_rollup():
+    """Tests du bilan de plan"""
+    print("=== TESTS DU BILAN DE PLAN ===\n")
+
+    from datetime import date
+
+    food_df = pd.DataFrame({
+        'food': ['Poulet grillé', 'Riz complet', 'Brocoli'],
+        'Caloric Value': [165, 370, 34],
+        'Protein': [31, 7.9, 2.8],
+        'Carbohydrates': [0, 77, 6.6],
+        'Fat': [3.6, 2.9, 0.4],
+        'Vitamin C': [0, 0, 89],
+        'Calcium': [15, 23, 47],
+        'Nutrition Density': [8.5, 7.2, 9.1]
+    })
+    macro_matrix = food_df[['Caloric Value', 'Protein', 'Carbohydrates', 'Fat']].to_numpy(dtype=np.float32)
+
+    plan = CompactMealPlan(date(2024, 1, 1), catalog_size=len(food_df))
+    for _ in range(8):
+        plan.append_day(
+            {'Déjeuner': {'food_ids': [0, 1, 2], 'portions': [150.0, 80.0, 200.0]},
+             'Dîner': {'food_ids': [0, 2], 'portions': [100.0, 100.0]}},
+            ['Déjeuner', 'Dîner'], macro_matrix
+        )
+
+    rollup = PlanRollup(with_display_fields(food_df))
+    result = rollup.rollup(plan)
+
+    daily = result['daily']
+    print(f"Colonnes agrégées: {rollup.nutrient_columns}")
+    print(f"Jour 1: {daily['Caloric Value'].iloc[0]:.0f} kcal, {daily['Vitamin C'].iloc[0]:.0f} mg vitamine C")
+    assert 'Nutrition Density' not in daily.columns, "Score non additif agrégé"
+    assert 'density_progress' not in daily.columns, "Champ d'affichage agrégé"
+    assert abs(daily['Caloric Value'].iloc[0] - plan.daily_totals()[0, 0]) < 1, "Calories incohérentes"
+    assert abs(daily['Vitamin C'].iloc[0] - 89 * 3) < 1e-6, "Vitamine C incorrecte"
+
+    weekly = result['weekly']
+    print(f"Semaines: {len(weekly)} (semaine 2 = {weekly['Protein'].iloc[1]:.0f}g protéines)")
+    assert len(weekly) == 2 and abs(weekly['Protein'].iloc[0] - 7 * daily['Protein'].iloc[0]) < 1e-6
+
+    shopping = result['shopping_list']
+    print("Liste de courses:")
+    for _, item in shopping.iterrows():
+        print(f"  • {item['food']}: {item['grams']:.0f}g")
+    assert shopping.iloc[0]['food'] == 'Brocoli' and shopping.iloc[0]['grams'] == 2400
+    print()
+
+    print("✅ Tous les tests passés!\n")
+
+
+if __name__ == "__main__":
+    test_plan_rollup()
@@ -0,0 +1,549 @@
+"""
+Module utilitaire: Stockage local persistant des données utilisateur
+SQLite en mode WAL: profils, pesées par (utilisateur, date), favoris,
+plans sérialisés et messages du chat
+Pool de connexions de lecture partagé entre les sessions, écritures
+regroupées par un unique thread d'écriture (une transaction par lot),
+file bornée et ticket par écriture (attente ciblée, statut de l'écriture)
+Auteurs: Asma Bélkahla & Monia Selleoui
+"""
+
+import atexit
+import itertools
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from .compact_plan import CompactMealPlan
+except ImportError:
+    from compact_plan import CompactMealPlan
+
+DEFAULT_DB_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'user', 'fitlife.sqlite3'
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    user_id TEXT PRIMARY KEY,
+    profile TEXT NOT NULL,
+    needs TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS weigh_ins (
+    user_id TEXT NOT NULL,
+    day TEXT NOT NULL,
+    weight REAL NOT NULL,
+    intake REAL,
+    notes TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (user_id, day)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS favorites (
+    user_id TEXT NOT NULL,
+    food TEXT NOT NULL,
+    added_at REAL NOT NULL,
+    PRIMARY KEY (user_id, food)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_favorites_user ON favorites (user_id, added_at);
+CREATE TABLE IF NOT EXISTS meal_plans (
+    user_id TEXT PRIMARY KEY,
+    plan BLOB NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chat_messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_chat_user ON chat_messages (user_id, id);
+"""
+
+
+def _encode(value: Any):
+    """Types non JSON des profils: dates (balisées) et scalaires numpy"""
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, date):
+        return {'__date__': value.isoformat()}
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"Type non sérialisable: {type(value).__name__}")
+
+
+def _decode(obj: Dict):
+    if '__datetime__' in obj:
+        return datetime.fromisoformat(obj['__datetime__'])
+    if '__date__' in obj:
+        return date.fromisoformat(obj['__date__'])
+    return obj
+
+
+def _dumps(value) -> Optional[str]:
+    return None if value is None else json.dumps(value, default=_encode, ensure_ascii=False)
+
+
+def _loads(text: Optional[str]):
+    return None if text is None else json.loads(text, object_hook=_decode)
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    """Connexion partageable entre threads (une session Streamlit peut changer de thread)"""
+    conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")  # Suffisant en WAL: pas de corruption, fsync au checkpoint
+    return conn
+
+
+class ConnectionPool:
+    """Connexions de lecture réutilisées (créées à la demande, au plus `size`)"""
+
+    def __init__(self, db_path: str, size: int = 4):
+        self.db_path = db_path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.size
+                self._created += create
+            conn = _connect(self.db_path) if create else self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class WriteTicket:
+    """Suivi d'une écriture soumise: numéro d'ordre et résultat une fois appliquée"""
+
+    __slots__ = ('seq', 'error', '_done')
+
+    def __init__(self, seq: int):
+        self.seq = seq
+        self.error: Optional[Exception] = None
+        self._done = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """True si l'écriture est appliquée sans erreur (False: échec ou délai dépassé)"""
+        return self._done.wait(timeout) and self.error is None
+
+    def _resolve(self, error: Optional[Exception] = None):
+        self.error = error
+        self._done.set()
+
+
+class BatchWriter(threading.Thread):
+    """
+    Thread d'écriture unique: toutes les écritures en attente sont appliquées
+    dans une même transaction (un seul commit par lot au lieu d'un par écriture)
+    Pas d'attente artificielle: pendant un commit, les écritures suivantes
+    s'accumulent et forment le lot suivant
+    File bornée (`max_pending`): un écrivain trop rapide attend (contre-pression)
+    au lieu de faire grossir la mémoire sans limite
+    """
+
+    _STOP = object()
+
+    def __init__(self, db_path: str, batch_size: int = 500, max_pending: int = 10000):
+        super().__init__(name='fitlife-storage-writer', daemon=True)
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.batches = 0
+        self.failed_writes = 0
+        self.last_error: Optional[Exception] = None
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._seq = itertools.count(1)
+        self._seq_lock = threading.Lock()
+
+    def submit(self, sql: str, params: Tuple = ()) -> WriteTicket:
+        # Numérotation et mise en file sous le même verrou: l'ordre des tickets suit celui de la file
+        with self._seq_lock:
+            ticket = WriteTicket(next(self._seq))
+            self._queue.put((sql, params, ticket))
+        return ticket
+
+    def flush(self):
+        """Attend l'application de toutes les écritures soumises (tous utilisateurs confondus)"""
+        self._queue.join()
+
+    def stop(self):
+        self._queue.put(self._STOP)
+        self.join()
+
+    def run(self):
+        conn = _connect(self.db_path)
+        try:
+            while True:
+                batch = [self._queue.get()]
+                while batch[-1] is not self._STOP and len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                stop = batch[-1] is self._STOP
+                writes = batch[:-1] if stop else batch
+                try:
+                    self._apply(conn, writes)
+                finally:
+                    for _, _, ticket in writes:
+                        if not ticket.done:
+                            ticket._resolve(self.last_error)
+                    for _ in batch:
+                        self._queue.task_done()
+                if stop:
+                    break
+        finally:
+            conn.close()
+
+    def _apply(self, conn: sqlite3.Connection, writes: List[Tuple[str, Tuple, WriteTicket]]):
+        if not writes:
+            return
+        try:
+            with conn:
+                for sql, params, _ in writes:
+                    conn.execute(sql, params)
+            self.batches += 1
+            for _, _, ticket in writes:
+                ticket._resolve()
+        except sqlite3.Error:
+            # Lot annulé: rejouer une à une pour ne perdre que l'écriture fautive
+            for sql, params, ticket in writes:
+                try:
+                    with conn:
+                        conn.execute(sql, params)
+                    ticket._resolve()
+                except sqlite3.Error as e:
+                    self.failed_writes += 1
+                    self.last_error = e
+                    ticket._resolve(e)
+
+
+class LocalStore:
+    """
+    Données de tous les utilisateurs d'un nœud, partagées entre les sessions
+    Écritures asynchrones regroupées, chacune renvoie un WriteTicket; une lecture
+    attend seulement la dernière écriture soumise pour le même utilisateur (une
+    session relit ce qu'elle vient d'écrire sans attendre celles des autres)
+    Chaque lecture est une requête sur la clé primaire ou un index (user_id, ...)
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, pool_size: int = 4, batch_size: int = 500,
+                 max_pending: int = 10000):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        conn.close()
+
+        self.pool = ConnectionPool(db_path, pool_size)
+        self.writer = BatchWriter(db_path, batch_size, max_pending)
+        self.writer.start()
+        self._last_write: Dict[str, WriteTicket] = {}
+        self._last_write_lock = threading.Lock()
+        # Thread d'écriture daemon: appliquer les écritures en attente à l'arrêt du processus
+        atexit.register(self.close)
+
+    def _write(self, user_id: str, sql: str, params: Tuple) -> WriteTicket:
+        ticket = self.writer.submit(sql, params)  # Bloque si la file est pleine (hors verrou des lectures)
+        with self._last_write_lock:
+            last = self._last_write.get(user_id)
+            if last is None or last.seq < ticket.seq:
+                self._last_write[user_id] = ticket
+        return ticket
+
+    def _read(self, user_id: str, sql: str, params: Tuple = ()) -> List[Tuple]:
+        with self._last_write_lock:
+            ticket = self._last_write.get(user_id)
+            if ticket is not None and ticket.done:
+                del self._last_write[user_id]
+                ticket = None
+        if ticket is not None:
+            ticket.wait()  # Écritures appliquées dans l'ordre: les précédentes le sont aussi
+        with self.pool.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def flush(self):
+        self.writer.flush()
+
+    def close(self):
+        atexit.unregister(self.close)
+        if self.writer.is_alive():
+            self.writer.stop()
+        self.pool.close()
+
+    # ----- Profils -----
+
+    def save_profile(self, user_id: str, profile: Dict, needs: Optional[Dict] = None) -> WriteTicket:
+        """Profil et besoins calculés (remplace la version précédente)"""
+        return self._write(
+            user_id,
+            "INSERT INTO profiles (user_id, profile, needs, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (user_id) DO UPDATE SET profile = excluded.profile, "
+            "needs = excluded.needs, updated_at = excluded.updated_at",
+            (user_id, _dumps(profile), _dumps(needs), time.time())
+        )
+
+    def load_profile(self, user_id: str) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """(profil, besoins), (None, None) si l'utilisateur n'a pas de profil"""
+        rows = self._read(user_id, "SELECT profile, needs FROM profiles WHERE user_id = ?", (user_id,))
+        if not rows:
+            return None, None
+        return _loads(rows[0][0]), _loads(rows[0][1])
+
+    # ----- Pesées -----
+
+    def add_weigh_in(self, user_id: str, day: date, weight: float,
+                     notes: str = '', intake: Optional[float] = None) -> WriteTicket:
+        """Pesée du jour (une seule par date: une nouvelle mesure remplace l'ancienne)"""
+        return self._write(
+            user_id,
+            "INSERT OR REPLACE INTO weigh_ins (user_id, day, weight, intake, notes) VALUES (?, ?, ?, ?, ?)",
+            (user_id, day.isoformat(), float(weight), None if intake is None else float(intake), notes or '')
+        )
+
+    def weigh_ins(self, user_id: str) -> List[Dict]:
+        """Pesées par date croissante: {'date', 'weight', 'notes', 'intake'}"""
+        rows = self._read(
+            user_id,
+            "SELECT day, weight, notes, intake FROM weigh_ins WHERE user_id = ? ORDER BY day", (user_id,)
+        )
+        return [{'date': date.fromisoformat(day), 'weight': weight, 'notes': notes, 'intake': intake}
+                for day, weight, notes, intake in rows]
+
+    # ----- Favoris -----
+
+    def add_favorite(self, user_id: str, food: str) -> WriteTicket:
+        return self._write(
+            user_id,
+            "INSERT OR IGNORE INTO favorites (user_id, food, added_at) VALUES (?, ?, ?)",
+            (user_id, food, time.time())
+        )
+
+    def remove_favorite(self, user_id: str, food: str) -> WriteTicket:
+        return self._write(user_id, "DELETE FROM favorites WHERE user_id = ? AND food = ?", (user_id, food))
+
+    def favorites(self, user_id: str) -> List[str]:
+        """Favoris dans l'ordre d'ajout"""
+        rows = self._read(
+            user_id, "SELECT food FROM favorites WHERE user_id = ? ORDER BY added_at", (user_id,)
+        )
+        return [food for food, in rows]
+
+    # ----- Plans -----
+
+    def save_plan(self, user_id: str, plan: CompactMealPlan) -> WriteTicket:
+        """Plan courant de l'utilisateur (format binaire de CompactMealPlan)"""
+        return self._write(
+            user_id,
+            "INSERT OR REPLACE INTO meal_plans (user_id, plan, updated_at) VALUES (?, ?, ?)",
+            (user_id, plan.to_bytes(), time.time())
+        )
+
+    def delete_plan(self, user_id: str) -> WriteTicket:
+        return self._write(user_id, "DELETE FROM meal_plans WHERE user_id = ?", (user_id,))
+
+    def load_plan(self, user_id: str, catalog_size: Optional[int] = None) -> Optional[CompactMealPlan]:
+        """
+        Plan sauvegardé, None si absent ou créé pour un autre catalogue
+        (les indices d'aliments ne seraient plus valides)
+        """
+        rows = self._read(user_id, "SELECT plan FROM meal_plans WHERE user_id = ?", (user_id,))
+        if not rows:
+            return None
+        try:
+            return CompactMealPlan.from_bytes(rows[0][0], catalog_size)
+        except ValueError:
+            return None
+
+    # ----- Chat -----
+
+    def append_message(self, user_id: str, role: str, content: str) -> WriteTicket:
+        return self._write(
+            user_id,
+            "INSERT INTO chat_messages (user_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+            (user_id, role, content, time.time())
+        )
+
+    def count_messages(self, user_id: str) -> int:
+        return self._read(user_id, "SELECT COUNT(*) FROM chat_messages WHERE user_id = ?", (user_id,))[0][0]
+
+    def messages(self, user_id: str, limit: int, offset: int = 0) -> List[Dict[str, str]]:
+        """`limit` messages en partant des plus récents (décalés de `offset`), du plus ancien au plus récent"""
+        rows = self._read(
+            user_id, "SELECT role, content FROM chat_messages WHERE user_id = ? "
+            "ORDER BY id DESC LIMIT ? OFFSET ?",
+            (user_id, limit, offset)
+        )
+        return [{'role': role, 'content': content} for role, content in reversed(rows)]
+
+    def clear_messages(self, user_id: str) -> WriteTicket:
+        return self._write(user_id, "DELETE FROM chat_messages WHERE user_id = ?", (user_id,))
+
+
+# ===== TESTS =====
+def test_storage():
+    """Tests du stockage local"""
+    print("=== TESTS DU STOCKAGE LOCAL ===\n")
+
+    import subprocess
+    import sys
+    import tempfile
+    import numpy as np
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'store.sqlite3')
+        store = LocalStore(path)
+
+        # Test 1: Profil, pesées, favoris et plan
+        created = datetime(2024, 3, 1, 8, 30)
+        store.save_profile('alice', {'weight': 70.0, 'goal': 'Maintien', 'allergies': ['Arachides'],
+                                     'created_at': created},
+                           {'target_calories': np.float64(2200.5), 'macros': {'proteins': 140}})
+        store.add_weigh_in('alice', date(2024, 3, 2), 70.2, 'matin', intake=2200)
+        store.add_weigh_in('alice', date(2024, 3, 1), 70.5)
+        store.add_weigh_in('alice', date(2024, 3, 2), 69.9)  # Même jour: remplace
+        for food in ['Saumon', 'Brocoli', 'Saumon', 'Riz']:
+            store.add_favorite('alice', food)
+        store.remove_favorite('alice', 'Brocoli')
+
+        profile, needs = store.load_profile('alice')
+        assert profile['created_at'] == created and profile['allergies'] == ['Arachides']
+        assert needs['target_calories'] == 2200.5
+        assert store.load_profile('bob') == (None, None)
+        history = store.weigh_ins('alice')
+        print(f"Pesées: {[(e['date'].isoformat(), e['weight']) for e in history]}")
+        assert [e['weight'] for e in history] == [70.5, 69.9]
+        assert store.favorites('alice') == ['Saumon', 'Riz']
+
+        macro_matrix = np.array([[165, 31, 0, 3.6], [370, 7.9, 77, 2.9]], dtype=np.float32)
+        plan = CompactMealPlan(date(2024, 3, 4), catalog_size=2)
+        plan.append_day({'Déjeuner': {'food_ids': [0, 1], 'portions': [150.0, 80.0]}},
+                        ['Déjeuner'], macro_matrix)
+        store.save_plan('alice', plan)
+        loaded = store.load_plan('alice', catalog_size=2)
+        assert np.array_equal(loaded.records, plan.records)
+        assert store.load_plan('alice', catalog_size=3) is None, "Plan d'un autre catalogue"
+
+        # Test 2: Écrivains concurrents (plusieurs sessions sur le même nœud)
+        n_threads, n_writes = 16, 250
+
+        def session(i):
+            user = f"user{i}"
+            for k in range(n_writes):
+                store.append_message(user, 'user', f"message {k}")
+                if k % 10 == 0:
+                    store.add_weigh_in(user, date(2024, 1, 1 + k // 10), 80 - k / 100)
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=session, args=(i,)) for i in range(n_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        store.flush()
+        elapsed = time.perf_counter() - start
+        n_total = n_threads * n_writes * 1.1
+        print(f"{n_total:.0f} écritures concurrentes: {elapsed * 1000:.0f} ms "
+              f"({n_total / elapsed:,.0f} écritures/s, {store.writer.batches} transactions)")
+        assert store.writer.failed_writes == 0
+        assert store.count_messages('user3') == n_writes
+        assert store.messages('user3', 2) == [{'role': 'user', 'content': f"message {n_writes - 2}"},
+                                              {'role': 'user', 'content': f"message {n_writes - 1}"}]
+        assert len(store.weigh_ins('user3')) == n_writes // 10
+
+        # Test 3: Lecture pendant que l'écrivain est bloqué: seules les lectures
+        # de l'utilisateur concerné attendent ses écritures, pas la file entière
+        blocker = sqlite3.connect(path, isolation_level=None)
+        blocker.execute("BEGIN IMMEDIATE")  # Verrou d'écriture: le lot suivant reste en attente
+        for i in range(32):
+            store.append_message(f"chatty{i}", 'user', "message")
+        ticket = store.add_favorite('alice', 'Avocat')
+        assert store.favorites('user3') == [] and store.count_messages('user3') == n_writes
+        assert not ticket.done, "Lecture d'un autre utilisateur servie sans attendre la file"
+        reader = threading.Thread(target=lambda: store.favorites('alice'))
+        reader.start()
+        reader.join(0.2)
+        assert reader.is_alive(), "Lecture d'alice en attente de sa propre écriture"
+        blocker.execute("COMMIT")
+        blocker.close()
+        reader.join()
+        assert ticket.wait(5) and store.favorites('alice') == ['Saumon', 'Riz', 'Avocat']
+        store.remove_favorite('alice', 'Avocat')
+
+        # Test 4: Statut d'une écriture en échec (contrainte NOT NULL)
+        failed = store.writer.submit("INSERT INTO favorites (user_id, food, added_at) VALUES (?, ?, NULL)",
+                                     ('alice', 'Pomme'))
+        assert not failed.wait(5) and isinstance(failed.error, sqlite3.Error)
+        assert store.save_profile('alice', profile, needs).wait(5)
+
+        # Test 5: Lecture indexée et persistance après réouverture
+        with store.pool.connection() as conn:
+            plan_rows = conn.execute(
+                "EXPLAIN QUERY PLAN SELECT day, weight FROM weigh_ins WHERE user_id = ? ORDER BY day",
+                ('user3',)
+            ).fetchall()
+        assert all('SCAN' not in row[-1] for row in plan_rows), plan_rows
+        store.close()
+
+        reopened = LocalStore(path)
+        assert reopened.favorites('alice') == ['Saumon', 'Riz']
+        with reopened.pool.connection() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        reopened.close()
+
+        # Test 6: File bornée (contre-pression) et écritures appliquées à l'arrêt du processus
+        bounded = BatchWriter(path, max_pending=8)
+        for k in range(8):
+            bounded.submit("INSERT INTO chat_messages (user_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+                           ('bounded', 'user', str(k), 0.0))
+        assert bounded._queue.full()
+        blocked = threading.Thread(target=bounded.submit, args=("DELETE FROM chat_messages WHERE user_id = 'x'",))
+        blocked.start()
+        blocked.join(0.2)
+        assert blocked.is_alive(), "Écrivain bloqué tant que la file est pleine"
+        bounded.start()
+        blocked.join()
+        bounded.stop()
+
+        script = (f"import sys; sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r})\n"
+                  f"from storage import LocalStore\n"
+                  f"LocalStore({path!r}).add_favorite('atexit', 'Riz')\n")
+        subprocess.run([sys.executable, '-c', script], check=True)
+        reopened = LocalStore(path)
+        assert reopened.favorites('atexit') == ['Riz']
+        assert reopened.count_messages('bounded') == 8
+        reopened.close()
+    print()
+
+    print("✅ Tous les tests passés!\n")
+
+
+if __name__ == "__main__":
+    test_storage()
@@ -0,0 +1,120 @@
+"""
+Module utilitaire: Suivi de la variété alimentaire
+Bitsets d'identifiants d'aliments avec fenêtre de non-répétition glissante
+Auteurs: Asma Bélkahla & Monia Selleoui
+"""
+
+import numpy as np
+from collections import deque
+from typing import Iterable
+
+
+class VarietyTracker:
+    """
+    Suit les aliments utilisés sous forme de bitsets entiers (bit i = aliment i)
+    Un aliment utilisé le jour J est bloqué jusqu'au jour J + cooldown_days - 1
+    Coût constant par slot, quelle que soit la longueur du plan
+    """
+
+    def __init__(self, n_foods: int, cooldown_days: int = 7):
+        self.n_foods = n_foods
+        self.cooldown_days = max(1, int(cooldown_days))
+        self._n_bytes = (n_foods + 7) // 8
+
+        # Bitsets des jours précédents encore dans la fenêtre
+        self._past_days = deque(maxlen=self.cooldown_days - 1)
+        self._window_bits = 0
+        self.today_bits = 0
+        self.day_index = 0
+
+    def use(self, food_id: int):
+        """Marque un aliment comme utilisé aujourd'hui"""
+        self.today_bits |= 1 << int(food_id)
+
+    def use_many(self, food_ids: Iterable[int]):
+        """Marque plusieurs aliments comme utilisés aujourd'hui"""
+        for food_id in food_ids:
+            self.today_bits |= 1 << int(food_id)
+
+    def is_blocked(self, food_id: int) -> bool:
+        """Indique si l'aliment est encore dans la fenêtre de non-répétition"""
+        return bool(((self._window_bits | self.today_bits) >> int(food_id)) & 1)
+
+    def blocked_bits(self, include_window: bool = True) -> int:
+        """Bitset des aliments bloqués (jour courant + fenêtre si demandé)"""
+        if include_window:
+            return self._window_bits | self.today_bits
+        return self.today_bits
+
+    def mask(self, include_window: bool = True) -> np.ndarray:
+        """
+        Convertit le bitset bloqué en masque booléen aligné sur les lignes du catalogue
+        """
+        bits = self.blocked_bits(include_window)
+        raw = np.frombuffer(bits.to_bytes(self._n_bytes, 'little'), dtype=np.uint8)
+        return np.unpackbits(raw, bitorder='little')[:self.n_foods].astype(bool)
+
+    def next_day(self):
+        """Clôture le jour courant et fait glisser la fenêtre"""
+        self._past_days.append(self.today_bits)
+
+        window = 0
+        for bits in self._past_days:
+            window |= bits
+        self._window_bits = window
+
+        self.today_bits = 0
+        self.day_index += 1
+
+    def reset(self):
+        """Réinitialise complètement le suivi"""
+        self._past_days.clear()
+        self._window_bits = 0
+        self.today_bits = 0
+        self.day_index = 0
+
+
+# ===== TESTS =====
+def test_variety_tracker():
+    """Tests du suivi de variété"""
+    print("=== TESTS DU SUIVI DE VARIÉTÉ ===\n")
+
+    tracker = VarietyTracker(n_foods=20, cooldown_days=3)
+
+    # Jour 0: aliments 1 et 5
+    tracker.use(1)
+    tracker.use(5)
+    assert tracker.is_blocked(1) and tracker.is_blocked(5), "Aliments du jour bloqués"
+    assert not tracker.is_blocked(2), "Aliment non utilisé libre"
+
+    mask = tracker.mask()
+    assert mask.shape == (20,) and mask.sum() == 2, "Masque incorrect"
+
+    # Jour 1: toujours bloqués (fenêtre de 3 jours)
+    tracker.next_day()
+    tracker.use(7)
+    assert tracker.is_blocked(1), "Fenêtre non respectée"
+    assert not tracker.mask(include_window=False)[1], "Masque du jour seul incorrect"
+
+    # Jour 2: encore bloqués
+    tracker.next_day()
+    assert tracker.is_blocked(5), "Fenêtre non respectée (jour 2)"
+
+    # Jour 3: libérés, l'aliment 7 reste bloqué
+    tracker.next_day()
+    assert not tracker.is_blocked(1), "Aliment devrait être libéré"
+    assert tracker.is_blocked(7), "Aliment du jour 1 encore bloqué"
+
+    print(f"Jour courant: {tracker.day_index}, aliments bloqués: {int(tracker.mask().sum())}")
+
+    # Fenêtre de 1 jour = exclusion intra-journée uniquement
+    daily = VarietyTracker(n_foods=10, cooldown_days=1)
+    daily.use(3)
+    daily.next_day()
+    assert not daily.is_blocked(3), "Fenêtre d'un jour incorrecte"
+
+    print("✅ Tous les tests passés!\n")
+
+
+if __name__ == "__main__":
+    test_variety_tracker()